@@ -14,7 +14,9 @@ import vexriscv.plugin._
 import vexriscv.{VexRiscv, VexRiscvConfig, plugin}
 
 // Define a Ram as a BlackBox
-class BlockRam(wordWidth: Int, wordCount: BigInt) extends BlackBox {
+// lane: byte lane of the 32-bit bus the RAM holds, selects the byte of
+// every word the Verilator simulation preloads (+ram_hex), -1 for none
+class BlockRam(wordWidth: Int, wordCount: BigInt, lane: Int = -1) extends BlackBox {
 
   // SpinalHDL will look at Generic classes to get attributes which
   // should be used ad VHDL gererics / Verilog parameter
@@ -23,6 +25,7 @@ class BlockRam(wordWidth: Int, wordCount: BigInt) extends BlackBox {
   val generic = new Generic {
     val ADDR_WIDTH = log2Up(BlockRam.this.wordCount)
     val DATA_WIDTH = BlockRam.this.wordWidth
+    val LANE = BlockRam.this.lane
   }
 
   // Define io of the VHDL entiry / Verilog module
@@ -45,10 +48,10 @@ class MuraxBusBlockRam(onChipRamSize : BigInt, onChipRamHexFile : String, simple
     val bus = slave(SimpleBus(simpleBusConfig))
   }
 
-  val ram0 = new BlockRam(8, (onChipRamSize / 4).toInt)
-  val ram1 = new BlockRam(8, (onChipRamSize / 4).toInt)
-  val ram2 = new BlockRam(8, (onChipRamSize / 4).toInt)
-  val ram3 = new BlockRam(8, (onChipRamSize / 4).toInt)
+  val ram0 = new BlockRam(8, (onChipRamSize / 4).toInt, 0)
+  val ram1 = new BlockRam(8, (onChipRamSize / 4).toInt, 1)
+  val ram2 = new BlockRam(8, (onChipRamSize / 4).toInt, 2)
+  val ram3 = new BlockRam(8, (onChipRamSize / 4).toInt, 3)
 
   val addr = (io.bus.cmd.address >> 2).resized
 
@@ -23,7 +23,8 @@
 module BlockRam
 #(
   parameter DATA_WIDTH = 10,
-  parameter ADDR_WIDTH = 8
+  parameter ADDR_WIDTH = 8,
+  parameter LANE = -1
 )
 (
   input  wire                  clk,
@@ -48,5 +49,40 @@ module BlockRam
     dout <= mem[addr];
   end
 
+`ifdef VERILATOR
+  // simulation only: +ram_hex=<file> preloads the on-chip RAM of Murax with a
+  // $readmemh image of 32-bit words; the byte lanes of MuraxBusBlockRam each
+  // take their byte (LANE n: bits 8n+7..8n) of every word. Without LANE (a
+  // MuraxHW.v generated before it was passed) the lane is the digit the
+  // instance names ram0..ram3 end with.
+  reg [8*256-1:0] ram_hex;
+  reg [8*256-1:0] scope;
+  reg [31:0] words [0:SIZE-1];
+  integer i, lane;
+
+  initial
+  begin
+    if (DATA_WIDTH == 8 && $value$plusargs("ram_hex=%s", ram_hex))
+    begin
+      lane = LANE;
+      if (lane < 0)
+      begin
+        $sformat(scope, "%m");
+        lane = scope[7:0] - "0";
+      end
+      if (lane < 0 || lane > 3)
+        $display("ERROR: %m: byte lane unknown, +ram_hex not loaded (set LANE)");
+      else
+      begin
+        for (i = 0; i < SIZE; i = i + 1)
+          words[i] = 32'h0;
+        $readmemh(ram_hex, words);
+        for (i = 0; i < SIZE; i = i + 1)
+          mem[i] = words[i][8*lane +: 8];
+      end
+    end
+  end
+`endif
+
 endmodule
 
@@ -50,6 +50,11 @@ public:
 	}
 };
 
+// rising edges of the clock domains, the cycle budget of Workspace::run
+static uint64_t workspaceCycles = 0;
+// set by a process (e.g. UartRx on its marker line) to end Workspace::run
+static bool workspaceDone = false;
+
 class ClockDomain : public TimeProcess{
 public:
 	CData* clk;
@@ -73,6 +78,7 @@ public:
 			}
 			postCycle = true;
 			*clk = 1;
+			workspaceCycles++;
 			schedule(0);
 		}else{
 			if(postCycle){
@@ -126,7 +132,6 @@ public:
 
 
 class success : public std::exception { };
-static uint32_t workspaceCycles = 0;
 template <class T> class Workspace{
 public:
 
@@ -179,7 +184,8 @@ public:
 		#endif
 	}
 
-	Workspace* run(uint32_t timeout = 5000){
+	// timeout in clock cycles, 0 runs until $finish or workspaceDone
+	Workspace* run(uint64_t timeout = 5000){
 
 		// init trace dump
 		#ifdef TRACE
@@ -198,7 +204,7 @@ public:
 
 		uint32_t flushCounter = 0;
 		try {
-			while(1){
+			while(timeout == 0 || workspaceCycles < timeout){
 				uint64_t delay = ~0l;
 				for(TimeProcess* p : timeProcesses)
 					if(p->wakeEnable && p->wakeDelay < delay)
@@ -260,8 +266,10 @@ public:
 
 				if (Verilated::gotFinish())
 					exit(0);
+				if (workspaceDone)
+					pass();
 			}
-			cout << "timeout" << endl;
+			cout << endl << "timeout" << endl;
 			fail();
 		} catch (const success e) {
 			cout <<"SUCCESS " << name <<  endl;
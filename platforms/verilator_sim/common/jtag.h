@@ -37,7 +37,7 @@ public:
 	uint64_t tooglePeriod;
 //	char buffer[1024];
 
-	Jtag(CData *tms, CData *tdi, CData *tdo, CData* tck,uint64_t period){
+	Jtag(CData *tms, CData *tdi, CData *tdo, CData* tck,uint64_t period,uint16_t port = 7894){
 		this->tms = tms;
 		this->tdi = tdi;
 		this->tdo = tdo;
@@ -77,7 +77,7 @@ public:
 		//---- Configure settings of the server address struct ----//
 		// Address family = Internet //
 		serverAddr.sin_family = AF_INET;
-		serverAddr.sin_port = htons(7894);
+		serverAddr.sin_port = htons(port);
 		serverAddr.sin_addr.s_addr = inet_addr("127.0.0.1");
 		memset(serverAddr.sin_zero, '\0', sizeof serverAddr.sin_zero);
 
@@ -6,9 +6,13 @@ public:
 
 	CData *rx;
 	uint32_t uartTimeRate;
-	UartRx(CData *rx, uint32_t uartTimeRate){
+	// a received line containing the marker sets workspaceDone
+	string marker;
+	string line;
+	UartRx(CData *rx, uint32_t uartTimeRate, string marker = ""){
 		this->rx = rx;
 		this->uartTimeRate = uartTimeRate;
+		this->marker = marker;
 		schedule(uartTimeRate);
 	}
 
@@ -40,6 +44,15 @@ public:
 			case STOP:
 				if(*rx){
 					cout << data << flush;
+					if(!marker.empty()){
+						if(data == '\n'){
+							if(line.find(marker) != string::npos)
+								workspaceDone = true;
+							line.clear();
+						} else {
+							line += data;
+						}
+					}
 				} else {
 					cout << "UART RX FRAME ERROR at " << time << endl;
 				}
@@ -84,7 +97,10 @@ public:
 
 	void inputThread(){
 		while(1){
-			uint8_t c = getchar();
+			int c = getchar();
+			// stdin closed (e.g. /dev/null), nothing more to send
+			if(c == EOF)
+				break;
 			inputsMutex.lock();
 			inputsQueue.push(c);
 			inputsMutex.unlock();
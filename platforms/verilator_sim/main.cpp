@@ -12,9 +12,18 @@
 #define PERIOD 100000
 #define BAUDRATE 9600
 
+// value of the plusarg +<name>=<value>, or def if it is not given
+static string plusArg(const char *name, string def){
+	string prefix = string(name) + "=";
+	string arg = Verilated::commandArgsPlusMatch(prefix.c_str());
+	if(arg.empty())
+		return def;
+	return arg.substr(prefix.size() + 1);
+}
+
 class MuraxWorkspace : public Workspace<VMURAX>{
 public:
-	MuraxWorkspace() : Workspace("Murax"){
+	MuraxWorkspace(string marker, uint16_t jtagPort) : Workspace("Murax"){
 		//ClockDomain *mainClk = new ClockDomain(&top->io_mainClk,NULL,100000,100000);
 		//AsyncReset *asyncReset = new AsyncReset(&top->io_asyncReset,1000000);
 		//UartRx *uartRx = new UartRx(&top->io_uart_txd,1.0e10/9600);
@@ -22,7 +31,7 @@ public:
 
       ClockDomain *mainClk = new ClockDomain(&top->io_mainClk,NULL,PERIOD,PERIOD);
       AsyncReset *asyncReset = new AsyncReset(&top->io_asyncReset,PERIOD*10);
-      UartRx *uartRx = new UartRx(&top->io_uart_txd,1.0e12/BAUDRATE);
+      UartRx *uartRx = new UartRx(&top->io_uart_txd,1.0e12/BAUDRATE,marker);
       UartTx *uartTx = new UartTx(&top->io_uart_rxd,1.0e12/BAUDRATE);
 
 
@@ -34,8 +43,11 @@ public:
 		timeProcesses.push_back(uartRx);
 		timeProcesses.push_back(uartTx);
 
-		Jtag *jtag = new Jtag(&top->io_jtag_tms,&top->io_jtag_tdi,&top->io_jtag_tdo,&top->io_jtag_tck,PERIOD*4);
-		timeProcesses.push_back(jtag);
+		// +jtag_port=0 runs without the openocd server (firmware preloaded with +ram_hex)
+		if(jtagPort){
+			Jtag *jtag = new Jtag(&top->io_jtag_tms,&top->io_jtag_tdi,&top->io_jtag_tdo,&top->io_jtag_tck,PERIOD*4,jtagPort);
+			timeProcesses.push_back(jtag);
+		}
 
 		#ifdef TRACE
 		//speedFactor = 10e-3;
@@ -68,7 +80,11 @@ int main(int argc, char **argv, char **env) {
 	printf("BOOT\n");
 	timespec startedAt = timer_start();
 
-	MuraxWorkspace().run(100e6);
+	// +max_cycles=<n> ends the run after n clock cycles (0: run until stopped),
+	// +marker=<text> on the first UART line containing <text>
+	uint64_t maxCycles = strtoull(plusArg("max_cycles", "100000000").c_str(), NULL, 10);
+	uint16_t jtagPort = atoi(plusArg("jtag_port", "7894").c_str());
+	MuraxWorkspace(plusArg("marker", ""), jtagPort).run(maxCycles);
 
 	uint64_t duration = timer_end(startedAt);
 	cout << endl << "****************************************************************" << endl;
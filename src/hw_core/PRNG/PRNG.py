@@ -16,12 +16,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import numpy as np
+# Python model of XorShift64.v.
+#
+# After a reset the core outputs the seed, then one XorShift64 step per clock
+# cycle, so output i of a stream is the seed advanced by i steps. The step is
+# linear over GF(2), i.e. a 64x64 bit matrix T, which gives
+#   - jump-ahead by any k steps with the precomputed powers T^(2^i)
+#   - fast streams: the stream is cut into lanes whose start states are found
+#     by jumping, and all lanes are stepped at once on a NumPy uint64 array
+#   - independent sub-streams per worker, starting far apart in the sequence
+
+import math
 import sys
 
+import numpy as np
+
 def XorShift64(init, previous):
   if (int(init) == 1):
-	return np.uint64(previous)
+    return np.uint64(previous)
   else:
     x = np.uint64(previous)
     x ^= x << np.uint64(21)
@@ -29,6 +41,240 @@ def XorShift64(init, previous):
     x ^= x << np.uint64(4)
     return np.uint64(x)
 
+MASK64 = (1 << 64) - 1
+
+# default distance between the sub-streams of different workers
+SUBSTREAM_STRIDE = 1 << 48
+
+# one step on a Python integer
+def xorshift64_step(x):
+  x ^= (x << 21) & MASK64
+  x ^= x >> 35
+  x ^= (x << 4) & MASK64
+  return x
+
+# one step on every element of a uint64 array
+def xorshift64_step_array(x):
+  x = x ^ (x << np.uint64(21))
+  x ^= x >> np.uint64(35)
+  x ^= x << np.uint64(4)
+  return x
+
+
+####################################################################
+# jump-ahead, a bit matrix is the list of its 64 columns (images of the bits)
+
+def _mat_vec(m, x):
+  res = 0
+  i = 0
+  while x:
+    if x & 1:
+      res ^= m[i]
+    x >>= 1
+    i += 1
+  return res
+
+# a after b
+def _mat_mul(a, b):
+  return [_mat_vec(a, col) for col in b]
+
+_powers = [[xorshift64_step(1 << i) for i in range(64)]]
+
+# T^(2^i)
+def _power(i):
+  while len(_powers) <= i:
+    _powers.append(_mat_mul(_powers[-1], _powers[-1]))
+  return _powers[i]
+
+# T^k as a matrix
+def jump_matrix(k):
+  res = [1 << i for i in range(64)]
+  i = 0
+  while k:
+    if k & 1:
+      res = _mat_mul(_power(i), res)
+    k >>= 1
+    i += 1
+  return res
+
+# state x advanced by k steps
+def jump(x, k):
+  i = 0
+  while k:
+    if k & 1:
+      x = _mat_vec(_power(i), x)
+    k >>= 1
+    i += 1
+  return x
+
+
+####################################################################
+# streams
 
-  
-	
\ No newline at end of file
+# the n outputs starting at state x as a uint64 array
+def xorshift64_stream(x, n, lanes = None):
+  if n <= 0:
+    return np.zeros(0, dtype=np.uint64)
+  if lanes is None:
+    lanes = max(1, int(math.sqrt(n)))
+  lanes = min(lanes, n)
+  steps = (n + lanes - 1) // lanes
+
+  # lane j starts at x advanced by j*steps
+  m = jump_matrix(steps)
+  starts = [x]
+  for j in range(lanes - 1):
+    starts.append(_mat_vec(m, starts[-1]))
+
+  state = np.array(starts, dtype=np.uint64)
+  out = np.empty((steps, lanes), dtype=np.uint64)
+  for i in range(steps):
+    out[i] = state
+    state = xorshift64_step_array(state)
+  return out.T.ravel()[:n]
+
+class xorshift64_stream_gen(object):
+  # seed: value loaded at reset, offset: number of outputs to skip
+  def __init__(self, seed, offset = 0):
+    self.state = jump(int(seed) & MASK64, offset)
+    self.position = offset
+
+  # next n outputs
+  def next(self, n):
+    res = xorshift64_stream(self.state, n)
+    if n > 0:
+      self.state = xorshift64_step(int(res[-1]))
+      self.position += n
+    return res
+
+  # skip k outputs
+  def skip(self, k):
+    self.state = jump(self.state, k)
+    self.position += k
+
+  # sub-stream of worker i: the same sequence, started i*stride outputs later
+  def substream(self, i, stride = SUBSTREAM_STRIDE):
+    res = xorshift64_stream_gen(0)
+    res.state = jump(self.state, i * stride)
+    res.position = self.position + i * stride
+    return res
+
+# one generator per worker
+def substreams(seed, workers, stride = SUBSTREAM_STRIDE):
+  base = xorshift64_stream_gen(seed)
+  return [base.substream(i, stride) for i in range(workers)]
+
+
+####################################################################
+# comparison with the Verilog core
+
+# values of a signal in a VCD file, in time order, skipping x/z values
+def read_vcd(path, signal = 'rngout'):
+  ids = set()
+  values = []
+  scope = []
+  with open(path) as f:
+    in_header = True
+    for line in f:
+      tokens = line.split()
+      if not tokens:
+        continue
+      if in_header:
+        if tokens[0] == '$scope':
+          scope.append(tokens[2])
+        elif tokens[0] == '$upscope':
+          scope.pop()
+        elif tokens[0] == '$var':
+          name = tokens[4]
+          full = '.'.join(scope + [name])
+          if name == signal or full == signal or full.endswith('.' + signal):
+            ids.add(tokens[3])
+        elif tokens[0] == '$enddefinitions':
+          in_header = False
+          if not ids:
+            raise ValueError("signal %s not found in %s" % (signal, path))
+        continue
+      if tokens[0][0] in 'bB' and len(tokens) == 2 and tokens[1] in ids:
+        bits = tokens[0][1:]
+        if any(c in bits for c in 'xXzZ'):
+          continue
+        value = int(bits, 2)
+        # every change of the output is one step, repeated dumps of a value are not
+        if not values or values[-1] != value:
+          values.append(value)
+  return values
+
+# one hex value per line, e.g. from $fwrite(f, "%h\n", rngout)
+def read_text(path):
+  values = []
+  with open(path) as f:
+    for line in f:
+      line = line.strip()
+      if line and not line.startswith('#'):
+        values.append(int(line, 16))
+  return values
+
+# index of the first output of the dump that differs from the model, or None
+# seed: value loaded at reset, by default the first value of the dump
+def check_dump(values, seed = None):
+  if not values:
+    return None
+  if seed is None:
+    seed = values[0]
+  ref = xorshift64_stream(seed, len(values))
+  got = np.array(values, dtype=np.uint64)
+  diff = np.nonzero(ref != got)[0]
+  return int(diff[0]) if len(diff) else None
+
+
+if __name__ == '__main__':
+  import argparse
+
+  parser = argparse.ArgumentParser(description='Generate or check XorShift64 streams of XorShift64.v.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-s', '--seed', dest='seed', type=lambda x: int(x, 0), required=False, default=None,
+            help='seed loaded at reset (default 1 when generating, the first dumped value when checking)')
+  parser.add_argument('-n', '--num', dest='num', type=int, required=False, default=1000,
+            help='number of outputs to generate')
+  parser.add_argument('-k', '--skip', dest='skip', type=int, required=False, default=0,
+            help='number of outputs to skip')
+  parser.add_argument('-w', '--worker', dest='worker', type=int, required=False, default=0,
+            help='generate the sub-stream of this worker')
+  parser.add_argument('--stride', dest='stride', type=int, required=False, default=SUBSTREAM_STRIDE,
+            help='distance between the sub-streams of the workers')
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False, default='-',
+            help='output file: .npy for a NumPy array, otherwise one hex value per line (- for stdout)')
+  parser.add_argument('-c', '--check', dest='check', type=str, required=False, default=None,
+            help='check a dump of the core (.vcd, or one hex value per line) instead of generating')
+  parser.add_argument('--signal', dest='signal', type=str, required=False, default='rngout',
+            help='output signal in the VCD file')
+
+  args = parser.parse_args()
+
+  if args.check is not None:
+    if args.check.endswith('.vcd'):
+      values = read_vcd(args.check, args.signal)
+    else:
+      values = read_text(args.check)
+    index = check_dump(values, args.seed)
+    if index is None:
+      print("%d outputs match" % len(values))
+    else:
+      ref = int(xorshift64_stream(values[0] if args.seed is None else args.seed, index + 1)[-1])
+      print("output %d differs: %016x, expected %016x" % (index, values[index], ref))
+      sys.exit(1)
+  else:
+    gen = xorshift64_stream_gen(1 if args.seed is None else args.seed)
+    if args.worker:
+      gen = gen.substream(args.worker, args.stride)
+    gen.skip(args.skip)
+    res = gen.next(args.num)
+    if args.out.endswith('.npy'):
+      np.save(args.out, res)
+    else:
+      text = ''.join('%016x\n' % x for x in res.tolist())
+      if args.out == '-':
+        sys.stdout.write(text)
+      else:
+        with open(args.out, 'w') as f:
+          f.write(text)
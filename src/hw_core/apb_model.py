@@ -0,0 +1,333 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Transaction-level model of the APB register maps of the accelerators.
+#
+# The accelerators sit behind one APB bridge at 0xf0030000 and move their
+# 256- and 1024-bit operands through 32-bit words. The register maps are the
+# PADDR decode of the wrappers in platforms/rtl (Apb3GenChain.v,
+# Apb3GenLeaf.v, Apb3SHA256XMSS.v), which all share one layout:
+#   io_apb_PADDR is 8 bits wide, so a wrapper decodes a window of 64 words
+#   0x04        write: command word, sha256/sha256XMSS flags in [7:0], cmd_reg
+#               in [10:8], for gen_leaf also reset [15] and start [16]
+#               read:  module_busy of the core selected by cmd_reg
+#   0x08        write: gen_chain start [0], start step [8+], end step [16+]
+#               (Apb3GenChain.v and Apb3GenLeaf.v only)
+#   0x10..0x8c  write: input_data_reg, 32 words; the write of 0x6c (768-bit
+#               message) or 0x8c (1024-bit message) raises
+#               second_block_data_available of sha256XMSS
+#   0x10..0x2c  read:  output_data, 8 words
+# The word offsets (CONTROL_BIT, CMD_BIT, DATA_BIT) in the headers of
+# ref_c_riscv/hardware/include agree with this decode; --check-rtl compares
+# every driver access with the case labels of the wrappers. Every driver of
+# ref_c_riscv/hardware/library is replayed access by access on an apb_trace,
+# which counts the reads and writes of one call. The status reads of the busy
+# loop are counted apart: one read finds the core done, the others only fill
+# time the core is computing anyway. module_busy rises two cycles after the
+# START write (the start register, then the busy register of the core), so
+# already the first status read, one APB access later, sees the core busy.
+#
+# On top of this, a batched chain command is proposed (CMD_CHAIN_BATCH): the
+# wrapper keeps pub_seed and an address template, the CPU pushes a batch of
+# chain jobs (data_in and one descriptor word with the chain index, start and
+# end step) into a job FIFO, rings the doorbell once, waits once and pops the
+# results. The FIFO input takes the words 36..43 (0x90..0xac) and the
+# descriptor register word 44 (0xb0), addresses the decode leaves unused
+# inside the 64-word window; register_map checks every access against it.
+# Against chain_hardware() this saves the pub_seed and address words and the
+# command, control and status accesses of every job but the first; the table
+# printed by this script accounts the saved transfers in cycles with the
+# perf_model.py parameters. murax_sim.py --batch runs it end to end.
+
+import argparse
+import os
+import re
+import sys
+
+from regress import SRC
+from bench import wots_len
+from perf_model import (BYTE_LEN_n, cost, midstate, load_params, hw_gen_chain, module_cost,
+                        sign_chain_steps)
+
+RTL = os.path.join(os.path.dirname(SRC), 'platforms', 'rtl')
+
+APB_BASE = 0xf0030000
+# words decoded by the 8-bit io_apb_PADDR of the wrappers
+APB_WINDOW = 64
+
+# word offsets of the registers of one wrapper, data and result are arrays
+class register_map(object):
+  def __init__(self, name, **regs):
+    self.name = name
+    self.regs = regs
+
+  def address(self, reg, index = 0):
+    word = self.regs[reg] + index
+    if word >= APB_WINDOW:
+      raise ValueError("%s: %s[%d] is word %d, outside the %d-word PADDR window"
+                       % (self.name, reg, index, word, APB_WINDOW))
+    return APB_BASE + 4 * word
+
+# Apb3GenChain.v: command word and status at 0x04, gen_chain control at 0x08
+CHAIN_MAP = register_map('gen_chain', cmd = 1, status = 1, control = 2, data = 4, result = 4)
+# Apb3GenLeaf.v: the gen_leaf reset and start bits are in the command word
+LEAF_MAP = register_map('gen_leaf', control = 1, status = 1, chain_control = 2, data = 4, result = 4)
+# Apb3SHA256XMSS.v, used by sha256_store_hardware() and hash_store() and
+# hash_restore() of hash.c
+SHA256XMSS_MAP = register_map('sha256XMSS', control = 1, status = 1, data = 4, result = 4)
+# proposed: the chain map with a job FIFO behind words 36..43 and a
+# descriptor register at word 44 that pushes the job
+CHAIN_BATCH_MAP = register_map('gen_chain batch', cmd = 1, status = 1, control = 2, data = 4,
+                               result = 4, job_data = 36, job_push = 44)
+
+CMD_SHA256XMSS = 2
+CMD_CHAIN = 3
+CMD_LEAF = 4
+CMD_CHAIN_BATCH = 5
+
+# accesses of one driver call, as (op, address) with op 'r', 'w' or 'p' (poll)
+class apb_trace(object):
+  def __init__(self, regs):
+    self.regs = regs
+    self.accesses = []
+
+  def write(self, reg, first = 0, words = 1):
+    self.accesses += [('w', self.regs.address(reg, first + i)) for i in range(words)]
+
+  def read(self, reg, first = 0, words = 1):
+    self.accesses += [('r', self.regs.address(reg, first + i)) for i in range(words)]
+
+  # the status read that finds the core done
+  def poll(self):
+    self.accesses.append(('p', self.regs.address('status')))
+
+  def count(self, op):
+    return sum(1 for (o, a) in self.accesses if o == op)
+
+  @property
+  def reads(self):
+    return self.count('r') + self.count('p')
+
+  @property
+  def writes(self):
+    return self.count('w')
+
+  # bus cycles of the transfers, busy-loop reads other than the last excluded
+  def cycles(self, params):
+    return len(self.accesses) * params['apb_access']
+
+
+####################################################################
+# drivers of ref_c_riscv/hardware/library
+
+def chain_hardware():
+  bus = apb_trace(CHAIN_MAP)
+  bus.write('data', 0, 8)    # pub_seed
+  bus.write('data', 8, 8)    # data_in
+  bus.write('data', 16, 8)   # hash_addr
+  bus.write('cmd')
+  bus.write('control')       # start, end step and START
+  bus.poll()
+  bus.read('result', 0, 8)
+  return bus
+
+def wots_hardware():
+  bus = apb_trace(LEAF_MAP)
+  bus.write('control')       # reset
+  bus.write('data', 0, 8)    # sec_seed
+  bus.write('data', 8, 8)    # pub_seed
+  bus.write('data', 16, 8)   # hash_addr
+  bus.write('control')       # command and START
+  bus.poll()
+  bus.read('result', 0, 8)
+  return bus
+
+def sha256_store_hardware(message_length, store_intermediate, continue_intermediate):
+  bus = apb_trace(SHA256XMSS_MAP)
+  last = 32 if message_length else 24
+  if continue_intermediate:
+    bus.write('data', 16, last - 16)
+    bus.write('control')
+  else:
+    bus.write('data', 0, 16)
+    bus.write('control')
+    if not store_intermediate:
+      bus.write('data', 16, last - 16)
+  bus.poll()
+  if not store_intermediate:
+    bus.read('result', 0, 8)
+  return bus
+
+def hash_store():
+  bus = apb_trace(SHA256XMSS_MAP)
+  bus.read('result', 0, 8)
+  return bus
+
+def hash_restore():
+  bus = apb_trace(SHA256XMSS_MAP)
+  bus.write('data', 0, 8)
+  bus.write('control')       # LOAD_IV
+  return bus
+
+# proposed batched driver: jobs chain jobs of one WOTS key pair, new_seed if
+# the wrapper does not hold pub_seed and the address template yet
+def chain_batch_hardware(jobs, new_seed = True):
+  bus = apb_trace(CHAIN_BATCH_MAP)
+  if new_seed:
+    bus.write('data', 0, 8)    # pub_seed
+    bus.write('data', 16, 8)   # address template, chain and hash words ignored
+  for i in range(jobs):
+    bus.write('job_data', 0, 8)
+    bus.write('job_push')      # chain << 24 | end << 16 | start << 8 | PUSH
+  bus.write('cmd')
+  bus.write('control')         # doorbell
+  bus.poll()
+  for i in range(jobs):
+    bus.read('result', 0, 8)   # the last word pops the result FIFO
+  return bus
+
+
+####################################################################
+# check against the PADDR decode of the RTL
+
+# (write words, read words) decoded by an Apb3*.v wrapper: the case labels of
+# the clocked write block and of the combinational io_apb_PRDATA block
+def rtl_decode(path):
+  with open(path) as f:
+    text = f.read()
+  (write_block, read_block) = text.split("io_apb_PRDATA = (32'd0)", 1)
+  words = lambda block: set(int(b, 2) >> 2 for b in re.findall(r"8'b([01]{8})\s*:", block))
+  return (words(write_block), words(read_block))
+
+# wrapper file and the drivers that talk to it
+RTL_DRIVERS = [
+  ('Apb3GenChain.v', [chain_hardware, lambda: sha256_store_hardware(0, 0, 0), hash_store, hash_restore]),
+  ('Apb3GenLeaf.v', [wots_hardware, chain_hardware, lambda: sha256_store_hardware(1, 0, 0)]),
+  ('Apb3SHA256XMSS.v', [lambda: sha256_store_hardware(0, 0, 0), lambda: sha256_store_hardware(1, 0, 0),
+                        lambda: sha256_store_hardware(0, 1, 0), lambda: sha256_store_hardware(0, 0, 1),
+                        hash_store, hash_restore]),
+]
+
+# list of problems: driver accesses the wrapper does not decode, and proposed
+# batch registers that collide with decoded words
+def check_rtl(rtl = RTL):
+  problems = []
+  for (name, drivers) in RTL_DRIVERS:
+    (writes, reads) = rtl_decode(os.path.join(rtl, name))
+    for driver in drivers:
+      for (op, addr) in driver().accesses:
+        word = (addr - APB_BASE) >> 2
+        if word not in (writes if op == 'w' else reads):
+          problems.append("%s: %s of word %d (0x%02x) is not decoded" % (name, op, word, 4 * word))
+  (writes, reads) = rtl_decode(os.path.join(rtl, 'Apb3GenChain.v'))
+  for reg in ('job_data', 'job_push'):
+    first = CHAIN_BATCH_MAP.regs[reg]
+    used = set(range(first, first + (8 if reg == 'job_data' else 1))) & (writes | reads)
+    if used:
+      problems.append("Apb3GenChain.v: %s overlaps decoded words %s" % (reg, sorted(used)))
+  return problems
+
+
+####################################################################
+# cycle accounting
+
+# (name, trace, compute cycles) of every driver call of a Murax target for
+# Winternitz parameter w
+def driver_calls(params, w, variant = 'wots', core = 'sha256XMSSprecomp'):
+  mid = midstate(variant, core)
+  w_len = wots_len(w, BYTE_LEN_n)
+  compression = params['compression']
+  hash_call = params['hash_call']
+  chain = lambda steps: (hw_gen_chain(mid, steps) + cost(op = 1)).cycles(params)
+  return [
+    ('sha256_store_hardware hash768', sha256_store_hardware(0, 0, 0), hash_call + 2 * compression),
+    ('sha256_store_hardware hash1024', sha256_store_hardware(1, 0, 0), hash_call + 3 * compression),
+    ('sha256_store_hardware store', sha256_store_hardware(0, 1, 0), hash_call + 2 * compression),
+    ('sha256_store_hardware continue', sha256_store_hardware(0, 0, 1), hash_call + compression),
+    ('hash_restore', hash_restore(), 0),
+    ('chain_hardware 1 step', chain_hardware(), chain(1)),
+    ('chain_hardware %d steps' % (w - 1), chain_hardware(), chain(w - 1)),
+    ('wots_hardware', wots_hardware(), module_cost('gen_leaf', variant, core, w, w_len).cycles(params)),
+  ]
+
+# (writes, reads, transfer cycles, compute cycles) of jobs chains of the
+# given steps, one chain_hardware() call each or batches of up to batch jobs
+def chain_jobs(params, steps, jobs, batch, mid = True):
+  compute = jobs * (hw_gen_chain(mid, steps) + cost(op = 1)).cycles(params)
+  if batch <= 1:
+    bus = chain_hardware()
+    return (jobs * bus.writes, jobs * bus.reads, jobs * bus.cycles(params), compute)
+  (writes, reads, cycles) = (0, 0, 0)
+  for first in range(0, jobs, batch):
+    bus = chain_batch_hardware(min(batch, jobs - first), first == 0)
+    writes += bus.writes
+    reads += bus.reads
+    cycles += bus.cycles(params)
+  return (writes, reads, cycles, compute)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='APB transfers per accelerator call and a batched chain command.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--params', dest='params', type=str, required=False, default=None,
+            help='JSON file with cycles per event, e.g. written by perf_model.py --save-params')
+  parser.add_argument('-w', '--wots_w', dest='wots_w', type=int, nargs='+', default=[16],
+            choices=[4, 16, 256], help='Winternitz parameters')
+  parser.add_argument('-b', '--batch', dest='batch', type=int, nargs='+', default=[4, 16, 67],
+            help='jobs per batch of the proposed chain command')
+  parser.add_argument('--core', dest='core', type=str, required=False, default='sha256XMSSprecomp',
+            choices=['sha256XMSS', 'sha256XMSSprecomp'], help='sha256 core behind the accelerators')
+  parser.add_argument('--check-rtl', dest='check_rtl', type=str, nargs='?', const=RTL, default=None,
+            help='only check the register maps against the Apb3*.v wrappers in this folder')
+
+  args = parser.parse_args()
+
+  if args.check_rtl is not None:
+    problems = check_rtl(args.check_rtl)
+    for p in problems:
+      print(p)
+    print("%d problems, register maps %s %s" % (len(problems), 'differ from' if problems else 'match',
+                                                 args.check_rtl))
+    sys.exit(1 if problems else 0)
+
+  params = load_params(args.params)
+  variant = 'wots' if args.core == 'sha256XMSSprecomp' else 'wots_no_store'
+  mid = midstate(variant, args.core)
+
+  for w in args.wots_w:
+    w_len = wots_len(w, BYTE_LEN_n)
+    print("w = %d, %d chains, %d cycles per APB access" % (w, w_len, params['apb_access']))
+    print("  %-34s %6s %6s %10s %10s %9s" % ('call', 'writes', 'reads', 'transfer', 'compute', 'transfer/compute'))
+    for (name, bus, compute) in driver_calls(params, w, variant, args.core):
+      print("  %-34s %6d %6d %10d %10d %9s" % (name, bus.writes, bus.reads, bus.cycles(params), compute,
+                                               "%.1f%%" % (100 * bus.cycles(params) / compute) if compute else '-'))
+
+    # gen_pk of a WOTS key pair (the key generation path of MuraxSHA256XMSSChain)
+    # and wots_sign() with its mean number of non-empty chains and steps
+    (steps, chains) = sign_chain_steps(w)
+    workloads = (('wots_pkgen', w - 1, w_len), ('wots_sign', max(1, int(round(steps / chains))), int(round(chains))))
+    for (name, s, jobs) in workloads:
+      (writes, reads, base, compute) = chain_jobs(params, s, jobs, 1, mid)
+      print("  %s: %d chain jobs of %d steps, %d compute cycles" % (name, jobs, s, compute))
+      print("    %-14s %6s %6s %10s %10s %8s" % ('batch', 'writes', 'reads', 'transfer', 'saved', 'of total'))
+      print("    %-14s %6d %6d %10d %10s %8s" % ('chain_hardware', writes, reads, base, '-', '-'))
+      for batch in args.batch:
+        (bw, br, cycles, c) = chain_jobs(params, s, jobs, batch, mid)
+        print("    %-14d %6d %6d %10d %10d %7.1f%%" % (batch, bw, br, cycles, base - cycles,
+                                                       100 * (base - cycles) / (base + compute)))
+    print()
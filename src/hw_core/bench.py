@@ -0,0 +1,223 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Cycle-count benchmarks of the WOTS accelerators.
+#
+# Sweeps the Winternitz parameter and the key length over the hardware
+# variants (wots, wots_no_store) and the XMSS sha256 cores (sha256XMSS,
+# sha256XMSSprecomp) for gen_chain, gen_pk, l_tree and gen_leaf. Every
+# configuration is simulated through regress.py, so unchanged configurations
+# come from its cache, and the simulated results are checked against the
+# Python reference as usual.
+#
+# The cycles per operation (one chain, one public key, one leaf) of every run
+# are appended to a JSON-lines results file and compared with a baseline
+# file; --update-baseline stores the current numbers as the new baseline.
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import math
+import os
+import subprocess
+import sys
+
+from regress import HW_CORE, VARIANTS, testbench, runner, regress_cache
+
+CORES = ('sha256XMSS', 'sha256XMSSprecomp')
+
+# testbench folder of every benchmarked module, one operation per test vector
+MODULES = {
+  'gen_chain': os.path.join('gen_chain', 'gen_chain_with_sha_tb'),
+  'gen_pk':    os.path.join('gen_pk', 'gen_pk_tb'),
+  'l_tree':    os.path.join('l_tree', 'l_tree_tb'),
+  'gen_leaf':  os.path.join('gen_leaf', 'gen_leaf_tb'),
+}
+
+# WOTS length for Winternitz parameter w and n-byte hashes, see params.c
+def wots_len(w, n):
+  log_w = int(math.log2(w))
+  len1 = 8 * n // log_w
+  len2 = int(math.log2(len1 * (w - 1)) // log_w) + 1
+  return len1 + len2
+
+class bench_config(object):
+  def __init__(self, variant, module, core, wots_w, key_len):
+    self.variant = variant
+    self.module = module
+    self.core = core
+    self.wots_w = wots_w
+    self.key_len = key_len
+    self.wots_len = wots_len(wots_w, key_len // 8)
+
+  def id(self):
+    return '%s/%s %s w=%d len=%d n=%d' % (self.variant, self.module, self.core,
+                                          self.wots_w, self.wots_len, self.key_len // 8)
+
+  def make_vars(self):
+    res = ['SHA256XMSS=%s' % self.core, 'KEY_LEN=%d' % self.key_len]
+    if self.module != 'l_tree':
+      res.append('WOTS_W=%d' % self.wots_w)
+    if self.module != 'gen_chain':
+      res.append('WOTS_LEN=%d' % self.wots_len)
+    else:
+      # a full chain, same as in gen_pk
+      res += ['start_step=0', 'end_step=%d' % (self.wots_w - 2)]
+    return res
+
+  def testbench(self):
+    return testbench(os.path.join(HW_CORE, self.variant, MODULES[self.module]))
+
+def git_revision():
+  try:
+    res = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HW_CORE,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         universal_newlines=True)
+    return res.stdout.strip()
+  except OSError:
+    return ''
+
+def run_config(r, config):
+  res = r.run(config.testbench(), config.make_vars())
+  cycles = res['cycles']
+  record = {
+    'id': config.id(),
+    'variant': config.variant,
+    'module': config.module,
+    'core': config.core,
+    'wots_w': config.wots_w,
+    'wots_len': config.wots_len,
+    'key_len': config.key_len,
+    'status': res['status'],
+    'vectors': len(cycles),
+    'cycles_per_op': sum(cycles) / len(cycles) if cycles else None,
+    'min_cycles': min(cycles) if cycles else None,
+    'max_cycles': max(cycles) if cycles else None,
+  }
+  return (record, res)
+
+def load_baseline(path):
+  if not os.path.exists(path):
+    return {}
+  with open(path) as f:
+    return json.load(f)
+
+# compare with the baseline, returns 'new', 'same', 'better' or 'worse'
+def compare(record, baseline, tolerance):
+  base = baseline.get(record['id'])
+  cur = record['cycles_per_op']
+  if base is None or cur is None:
+    return ('new', None)
+  delta = (cur - base) / base
+  if cur > base * (1 + tolerance):
+    return ('worse', delta)
+  if cur < base * (1 - tolerance):
+    return ('better', delta)
+  return ('same', delta)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark the cycle counts of the WOTS accelerators.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--variants', dest='variants', type=str, nargs='+', default=list(VARIANTS),
+            choices=list(VARIANTS), help='hardware variants')
+  parser.add_argument('--modules', dest='modules', type=str, nargs='+', default=list(MODULES),
+            choices=list(MODULES), help='modules')
+  parser.add_argument('--cores', dest='cores', type=str, nargs='+', default=list(CORES),
+            choices=list(CORES), help='XMSS sha256 cores')
+  parser.add_argument('-w', '--wots_w', dest='wots_w', type=int, nargs='+', default=[4, 16, 256],
+            choices=[4, 16, 256], help='Winternitz parameters')
+  parser.add_argument('-l', '--key_len', dest='key_len', type=int, nargs='+', default=[256],
+            help='key lengths in bits (the Python reference only supports 256)')
+  parser.add_argument('--vectors', dest='vectors', type=int, required=False, default=2,
+            help='operations simulated per configuration')
+  parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, default=123,
+            help='seed of the test vectors')
+  parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=os.cpu_count(),
+            help='number of simulations run at the same time')
+  parser.add_argument('--cache', dest='cache', type=str, required=False,
+            default=os.path.join(HW_CORE, '.regress_cache'),
+            help='regression cache folder')
+  parser.add_argument('--no-cache', dest='no_cache', action='store_true',
+            help='neither read nor write the regression cache')
+  parser.add_argument('--results', dest='results', type=str, required=False,
+            default=os.path.join(HW_CORE, 'bench_results.jsonl'),
+            help='results file, one JSON record per configuration and run is appended')
+  parser.add_argument('--baseline', dest='baseline', type=str, required=False,
+            default=os.path.join(HW_CORE, 'bench_baseline.json'),
+            help='baseline file, cycles per operation of every configuration')
+  parser.add_argument('--tolerance', dest='tolerance', type=float, required=False, default=0.0,
+            help='relative increase of cycles per operation tolerated before flagging a regression')
+  parser.add_argument('--update-baseline', dest='update_baseline', action='store_true',
+            help='store the numbers of this run (of passing configurations) as baseline')
+
+  args = parser.parse_args()
+
+  configs = [bench_config(variant, module, core, w, key_len)
+             for variant in args.variants
+             for module in args.modules
+             for core in args.cores
+             for w in args.wots_w
+             for key_len in args.key_len]
+
+  make_vars = ['vectors=%d' % args.vectors, 's=%d' % args.seed]
+  r = runner(regress_cache(args.cache, not args.no_cache), make_vars)
+  baseline = load_baseline(args.baseline)
+
+  rev = git_revision()
+  now = datetime.datetime.now().isoformat(timespec='seconds')
+
+  records = []
+  worse = 0
+  failed = 0
+  with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+    for (record, res) in pool.map(lambda c: run_config(r, c), configs):
+      record['time'] = now
+      record['rev'] = rev
+      records.append(record)
+
+      if record['status'] != 'pass':
+        failed += 1
+        print("%-60s %s" % (record['id'], record['status'].upper()))
+        print('  ' + res['log'].strip().replace('\n', '\n  ')[-1000:])
+        continue
+      (verdict, delta) = compare(record, baseline, args.tolerance)
+      worse += verdict == 'worse'
+      line = "%-60s %10.1f cycles/op" % (record['id'], record['cycles_per_op'])
+      if delta is not None:
+        line += " %+7.2f%%" % (100 * delta)
+      if verdict != 'same':
+        line += "  " + verdict.upper()
+      print(line)
+      sys.stdout.flush()
+
+  with open(args.results, 'a') as f:
+    for record in records:
+      f.write(json.dumps(record, sort_keys=True) + '\n')
+
+  if args.update_baseline:
+    for record in records:
+      if record['status'] == 'pass':
+        baseline[record['id']] = record['cycles_per_op']
+    with open(args.baseline, 'w') as f:
+      json.dump(baseline, f, indent=1, sort_keys=True)
+      f.write('\n')
+
+  print("%d configurations, %d failed, %d slower than the baseline" % (len(records), failed, worse))
+  sys.exit(1 if failed or (worse and not args.update_baseline) else 0)
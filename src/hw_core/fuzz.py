@@ -0,0 +1,406 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Differential fuzzing of thash_f, gen_chain and l_tree between the Python
+# reference (ref_python), the x86 build of xmss-reference (ref_python.native)
+# and the iverilog simulations of wots/ and wots_no_store/.
+#
+# The work is cut into batches. Batch b draws everything from its own random
+# generator seeded with (seed, b): the module, its compile-time configuration
+# (Winternitz parameter and chain range, L-tree length, variant and sha256
+# core) and batch-size random keys, inputs and addresses. A batch therefore
+# gives the same vectors on any worker and with any number of workers, and
+# `--first b --batches 1` replays it. Batches run on a process pool; each
+# worker simulates a whole batch in one simulator run, in a scratch tree set up
+# like regress.py does, with the compiled simulators shared through the regress
+# cache.
+#
+# A vector on which the backends disagree is minimised (fields zeroed, bytes
+# and words cleared while the mismatch persists) and written as JSON to the
+# failure folder together with the outputs of every backend.
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from regress import HW_CORE, SRC, VARIANTS, testbench, runner, regress_cache, restore_files
+from bench import CORES, wots_len
+
+sys.path.insert(0, SRC)
+
+from ref_python import hash_function, wots_function, native
+from ref_python.hash_function import addr_to_raw
+from ref_python.ltree_buffer import ltree_engine
+from ref_python.vector_io import vector_writer
+
+BACKENDS = ('python', 'native', 'hdl')
+
+WOTS_W = (4, 16, 256)
+
+def _bytes(rng, num):
+  return bytes(rng.getrandbits(8) for i in range(num))
+
+def _addr(rng):
+  return [rng.getrandbits(32) for i in range(8)]
+
+# simpler variants of a vector: byte strings with halves, quarters, ... down
+# to single bytes cleared, single address words and single nodes cleared
+def _shrink(case):
+  for (name, value) in case.items():
+    if isinstance(value, bytes):
+      size = len(value)
+      while size:
+        for lo in range(0, len(value), size):
+          if any(value[lo:lo+size]):
+            yield dict(case, **{name: value[:lo] + bytes(len(value[lo:lo+size])) + value[lo+size:]})
+        size //= 2
+    elif name == 'addr':
+      for i in range(8):
+        if value[i]:
+          yield dict(case, addr=value[:i] + [0] + value[i+1:])
+    else:
+      # list of nodes
+      for i in range(len(value)):
+        if any(value[i]):
+          yield dict(case, **{name: value[:i] + [bytes(len(value[i]))] + value[i+1:]})
+
+def _to_json(value):
+  if isinstance(value, bytes):
+    return value.hex()
+  if isinstance(value, list) and value and isinstance(value[0], bytes):
+    return [x.hex() for x in value]
+  return value
+
+
+####################################################################
+# modules under test
+
+class thash_f_target(object):
+  name = 'thash_f'
+  tb = os.path.join('thash_f', 'thash_f_tb')
+
+  def config(self, rng):
+    return {}
+
+  def case(self, rng, config):
+    return {'key': _bytes(rng, 32), 'data': _bytes(rng, 32), 'addr': _addr(rng)}
+
+  def python(self, config, c):
+    return hash_function.thash_f_raw(c['data'], c['key'], list(c['addr']))
+
+  def native(self, config, c):
+    return native.thash_f_raw(c['data'], c['key'], list(c['addr']))
+
+  def make_vars(self, config):
+    return []
+
+  def in_fields(self, config):
+    return [("input_key", 32), ("input_data", 32), ("hash_addr", 32)]
+
+  def inputs(self, c):
+    return [c['key'], c['data'], addr_to_raw(c['addr'])]
+
+class gen_chain_target(thash_f_target):
+  name = 'gen_chain'
+  tb = os.path.join('gen_chain', 'gen_chain_with_sha_tb')
+
+  # chain range of gen_test.py: steps start_step, ..., end_step
+  def config(self, rng):
+    w = rng.choice(WOTS_W)
+    start = rng.randint(0, w - 2)
+    return {'w': w, 'start': start, 'end': rng.randint(start, w - 2)}
+
+  def python(self, config, c):
+    return wots_function.gen_chain_raw(config['w'], c['data'], config['start'],
+                                       config['end'] - config['start'] + 1, c['key'], list(c['addr']))
+
+  def native(self, config, c):
+    return native.gen_chain_raw(config['w'], c['data'], config['start'],
+                                config['end'] - config['start'] + 1, c['key'], list(c['addr']))
+
+  def make_vars(self, config):
+    return ['WOTS_W=%d' % config['w'], 'start_step=%d' % config['start'], 'end_step=%d' % config['end']]
+
+class l_tree_target(object):
+  name = 'l_tree'
+  tb = os.path.join('l_tree', 'l_tree_tb')
+
+  # the WOTS lengths of params.c, none of them a power of 2
+  def config(self, rng):
+    return {'w_len': wots_len(rng.choice(WOTS_W), 32)}
+
+  def case(self, rng, config):
+    return {'key': _bytes(rng, 32), 'addr': _addr(rng),
+            'pk': [_bytes(rng, 32) for i in range(config['w_len'])]}
+
+  def python(self, config, c):
+    return ltree_engine(config['w_len']).l_tree_raw(list(c['pk']), c['key'], list(c['addr']))
+
+  def native(self, config, c):
+    return native.l_tree_raw(list(c['pk']), c['key'], list(c['addr']))
+
+  def make_vars(self, config):
+    return ['WOTS_LEN=%d' % config['w_len']]
+
+  def in_fields(self, config):
+    return [("input_key", 32), ("hash_addr", 32), ("pk", 32, config['w_len'])]
+
+  def inputs(self, c):
+    return [c['key'], addr_to_raw(c['addr']), c['pk']]
+
+TARGETS = {t.name: t for t in (thash_f_target(), gen_chain_target(), l_tree_target())}
+
+
+####################################################################
+# simulation of a batch
+
+class hdl_sim(object):
+  # compiled simulator of one testbench configuration in its own scratch tree
+  def __init__(self, tb, make_vars, cache, root):
+    r = runner(cache, make_vars + ['SIM_ARGS=+novcd'])
+    (sim_key, gold_key, result_key, self.run_cmds) = r.plan(tb, [])
+    self.work = r.scratch(tb, tempfile.mkdtemp(prefix='fuzz-', dir=root))
+    entry = cache.get('sim', sim_key)
+    if entry is not None:
+      restore_files(entry, self.work)
+    else:
+      self._shell(' '.join(['make', '-B', tb.sim] + r.make_vars))
+      cache.put_files('sim', sim_key, self.work, [tb.sim])
+
+  def _shell(self, command):
+    res = subprocess.run(command, shell=True, cwd=self.work, stdout=subprocess.PIPE,
+                         stderr=subprocess.STDOUT, universal_newlines=True)
+    if res.returncode != 0:
+      raise RuntimeError("'%s' failed:\n%s" % (command, res.stdout[-2000:]))
+
+  # outputs of the simulator for a list of input vectors; expected is written
+  # to data.out as a gen_test.py would, the simulation does not read it
+  def run(self, fields, inputs, expected):
+    with vector_writer(os.path.join(self.work, 'data.in'), fields, 'memh') as f:
+      for vec in inputs:
+        f.write(*vec)
+    with vector_writer(os.path.join(self.work, 'data.out'), [("data_out", 32)], 'memh') as f:
+      for out in expected:
+        f.write(out)
+    test_out = os.path.join(self.work, 'test.out')
+    if os.path.exists(test_out):
+      os.remove(test_out)
+    for command in self.run_cmds:
+      self._shell(command)
+    with open(test_out) as f:
+      res = [bytes.fromhex(line.strip().zfill(64)) for line in f if line.strip()]
+    # a simulation that stopped early reports missing outputs as mismatches
+    return res + [b''] * (len(inputs) - len(res))
+
+# per worker process: options and the simulators built so far
+_worker = {}
+
+def _init_worker(options):
+  _worker.clear()
+  _worker.update(options)
+  _worker['sims'] = {}
+
+def _sim(target, config):
+  key = (target.name, tuple(sorted(config.items())))
+  sim = _worker['sims'].get(key)
+  if sim is None:
+    tb = testbench(os.path.join(HW_CORE, config['variant'], target.tb))
+    make_vars = target.make_vars(config) + ['SHA256XMSS=%s' % config['core']]
+    sim = _worker['sims'][key] = hdl_sim(tb, make_vars, regress_cache(_worker['cache']), _worker['scratch'])
+  return sim
+
+# outputs of every backend for a list of vectors, and the seconds spent per backend
+def evaluate(target, config, cases):
+  outputs = [{} for c in cases]
+  times = {}
+  for backend in _worker['backends']:
+    start = time.perf_counter()
+    if backend == 'hdl':
+      expected = [out['python'] for out in outputs] if 'python' in outputs[0] else [bytes(32)] * len(cases)
+      res = _sim(target, config).run(target.in_fields(config), [target.inputs(c) for c in cases], expected)
+    else:
+      func = getattr(target, backend)
+      res = [func(config, c) for c in cases]
+    times[backend] = time.perf_counter() - start
+    for (out, r) in zip(outputs, res):
+      out[backend] = r
+  return outputs, times
+
+def _mismatch(out):
+  return len(set(out.values())) > 1
+
+# greedily simplify a failing vector while the backends keep disagreeing
+def minimise(target, config, case, budget):
+  for i in range(budget):
+    for cand in _shrink(case):
+      if _mismatch(evaluate(target, config, [cand])[0][0]):
+        case = cand
+        break
+    else:
+      break
+  return case
+
+def run_batch(b):
+  rng = random.Random('%d/%d' % (_worker['seed'], b))
+  target = TARGETS[rng.choice(_worker['targets'])]
+  config = target.config(rng)
+  if 'hdl' in _worker['backends']:
+    config['variant'] = rng.choice(_worker['variants'])
+    config['core'] = rng.choice(_worker['cores'])
+  cases = [target.case(rng, config) for i in range(_worker['batch_size'])]
+
+  res = {'batch': b, 'target': target.name, 'config': config, 'vectors': len(cases),
+         'times': {}, 'failures': [], 'error': None}
+  try:
+    (outputs, res['times']) = evaluate(target, config, cases)
+    for (i, out) in enumerate(outputs):
+      if not _mismatch(out):
+        continue
+      small = minimise(target, config, cases[i], _worker['shrink'])
+      small_out = evaluate(target, config, [small])[0][0]
+      res['failures'].append({
+        'seed': _worker['seed'], 'batch': b, 'index': i, 'target': target.name, 'config': config,
+        'input': {k: _to_json(v) for (k, v) in cases[i].items()},
+        'output': {k: v.hex() for (k, v) in out.items()},
+        'minimised': {k: _to_json(v) for (k, v) in small.items()},
+        'minimised_output': {k: v.hex() for (k, v) in small_out.items()},
+      })
+  except (RuntimeError, OSError, ValueError) as e:
+    res['error'] = str(e)
+  return res
+
+# write a failure record; the name holds the seed and a hash of the minimised
+# input, so a rerun of the same seed overwrites its own record while runs with
+# other seeds (or inputs that minimise differently) keep theirs
+def save_failure(folder, failure):
+  os.makedirs(folder, exist_ok=True)
+  text = json.dumps(failure, indent=1, sort_keys=True)
+  digest = hashlib.sha256(json.dumps(failure['minimised'], sort_keys=True).encode()).hexdigest()
+  name = '%s-%d-%d-%d-%s.json' % (failure['target'], failure['seed'], failure['batch'], failure['index'],
+                                  digest[:12])
+  path = os.path.join(folder, name)
+  with open(path, 'w') as f:
+    f.write(text + '\n')
+  return path
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Differential fuzzing of ref_python, xmss-reference and the HDL cores.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--targets', dest='targets', type=str, nargs='+', default=list(TARGETS),
+            choices=list(TARGETS), help='modules to fuzz')
+  parser.add_argument('--backends', dest='backends', type=str, nargs='+', default=list(BACKENDS),
+            choices=list(BACKENDS), help='implementations to compare; unavailable ones are skipped')
+  parser.add_argument('--variants', dest='variants', type=str, nargs='+', default=list(VARIANTS),
+            choices=list(VARIANTS), help='hardware variants')
+  parser.add_argument('--cores', dest='cores', type=str, nargs='+', default=list(CORES),
+            choices=list(CORES), help='XMSS sha256 cores')
+  parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, default=123,
+            help='seed, batch b draws from a generator seeded with (seed, b)')
+  parser.add_argument('--first', dest='first', type=int, required=False, default=0,
+            help='index of the first batch')
+  parser.add_argument('-n', '--batches', dest='batches', type=int, required=False, default=None,
+            help='number of batches (default: until --time runs out)')
+  parser.add_argument('-t', '--time', dest='time', type=float, required=False, default=60,
+            help='seconds to fuzz when --batches is not given')
+  parser.add_argument('-b', '--batch-size', dest='batch_size', type=int, required=False, default=32,
+            help='vectors per batch, simulated in one simulator run')
+  parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=os.cpu_count(),
+            help='number of worker processes')
+  parser.add_argument('--shrink', dest='shrink', type=int, required=False, default=200,
+            help='maximum number of simplification steps per failing vector')
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False,
+            default=os.path.join(HW_CORE, 'fuzz_failures'),
+            help='folder the failing vectors are written to')
+  parser.add_argument('--cache', dest='cache', type=str, required=False,
+            default=os.path.join(HW_CORE, '.regress_cache'),
+            help='regression cache folder, for the compiled simulators')
+
+  args = parser.parse_args()
+
+  backends = list(args.backends)
+  if 'native' in backends and not native.available():
+    print("native backend not available, skipped")
+    backends.remove('native')
+  if 'hdl' in backends and shutil.which('iverilog') is None:
+    print("iverilog not found, HDL backend skipped")
+    backends.remove('hdl')
+  if len(backends) < 2:
+    print("need at least two backends to compare, have %s" % ', '.join(backends))
+    sys.exit(1)
+
+  scratch = tempfile.mkdtemp(prefix='fuzz-')
+  options = {
+    'seed': args.seed, 'targets': args.targets, 'backends': backends,
+    'variants': args.variants, 'cores': args.cores, 'batch_size': args.batch_size,
+    'shrink': args.shrink, 'cache': args.cache, 'scratch': scratch,
+  }
+
+  if args.batches is not None:
+    batches = range(args.first, args.first + args.batches)
+  else:
+    batches = itertools.count(args.first)
+  deadline = None if args.batches is not None else time.time() + args.time
+
+  start = time.time()
+  vectors = 0
+  times = dict((b, 0.0) for b in backends)
+  failures = 0
+  errors = 0
+  pool = multiprocessing.Pool(max(1, args.jobs), _init_worker, (options,))
+  try:
+    for res in pool.imap_unordered(run_batch, batches):
+      if res['error'] is not None:
+        errors += 1
+        print("batch %d %s %s: ERROR %s" % (res['batch'], res['target'], res['config'], res['error']))
+      else:
+        vectors += res['vectors']
+        for (b, t) in res['times'].items():
+          times[b] += t
+      for failure in res['failures']:
+        failures += 1
+        path = save_failure(args.out, failure)
+        print("batch %d %s %s: MISMATCH, written to %s" % (res['batch'], res['target'], res['config'], path))
+      elapsed = time.time() - start
+      sys.stdout.write("\r%d vectors, %.0f vectors/s, %d mismatches, %d errors " % (
+        vectors, vectors / max(elapsed, 1e-9), failures, errors))
+      sys.stdout.flush()
+      if deadline is not None and time.time() > deadline:
+        break
+  finally:
+    pool.terminate()
+    pool.join()
+    shutil.rmtree(scratch, ignore_errors=True)
+
+  elapsed = time.time() - start
+  print("\n%d vectors in %.1fs: %.0f vectors/s on %d workers" % (vectors, elapsed, vectors / max(elapsed, 1e-9),
+                                                             max(1, args.jobs)))
+  for b in backends:
+    if times[b] > 0:
+      print("  %-7s %10.0f vectors/s per worker" % (b, vectors / times[b]))
+  print("%d mismatches, %d errors" % (failures, errors))
+  sys.exit(1 if failures or errors else 0)
@@ -0,0 +1,27 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu> 
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# XMSS-specific sha256 core of a testbench, both have the same interface:
+#   SHA256XMSS = sha256XMSSprecomp   with precomp feature
+#   SHA256XMSS = sha256XMSS          without precomp feature, needs sha256XMSS_core
+# HASH_DIR is the path of this folder relative to the testbench
+
+HASH_DIR ?= ../../../hash
+SHA256XMSS ?= sha256XMSSprecomp
+
+SHA256XMSS_SRC = $(HASH_DIR)/$(SHA256XMSS).v $(if $(filter sha256XMSS,$(SHA256XMSS)),$(HASH_DIR)/sha256XMSS_core.v)
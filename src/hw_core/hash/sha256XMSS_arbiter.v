@@ -0,0 +1,208 @@
+/*
+ *
+ *
+ * Copyright (C) 2019
+ * Authors: Wen Wang <wen.wang.ww349@yale.edu>
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software Foundation,
+ * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+ *
+*/
+
+// Function: share CORES sha256XMSS cores between LANES hash users
+// Every lane sees the interface of one sha256XMSS core: it pulses start
+// together with data_in, message_length, store_intermediate and
+// continue_intermediate, and waits for done. A lane has at most one
+// request in flight, so one buffer per lane is enough.
+//
+// The precomp core stores one intermediate state (padding || key, the key in
+// data_in[767:512]), the arbiter keeps the key of every core:
+// - a continue request goes to a free core holding its key,
+// - if there is none, it is sent to any free core as a store request, which
+//   computes the same result and stores the key there.
+// So the result never depends on which core served a lane. The lanes of a
+// gen_leaf top share the public seed, so the continue requests of thash_f
+// find it on most cores.
+//
+// data_out of a lane is registered and stays unchanged until its next result,
+// done is one clock high with it. Both come one cycle after done of the core.
+
+module sha256XMSS_arbiter
+#(
+  parameter LANES = 2,
+  parameter CORES = 1,
+  parameter LANE_W = `CLOG2(LANES)
+)
+(
+  input wire clk,
+  input wire reset,
+
+  // interface to the lanes, lane i uses bit i and the i-th slice of the buses
+  input wire [LANES-1:0] start,
+  input wire [LANES*1024-1:0] data_in,
+  input wire [LANES-1:0] message_length,
+  input wire [LANES-1:0] store_intermediate,
+  input wire [LANES-1:0] continue_intermediate,
+  output reg [LANES-1:0] done,
+  output reg [LANES*256-1:0] data_out,
+
+  // interface to the sha256XMSS cores, the request signals of a core stay
+  // unchanged until it is granted the next request
+  output reg [CORES-1:0] core_start,
+  output reg [CORES*1024-1:0] core_data_in,
+  output reg [CORES-1:0] core_message_length,
+  output reg [CORES-1:0] core_store_intermediate,
+  output reg [CORES-1:0] core_continue_intermediate,
+  input wire [CORES-1:0] core_done,
+  input wire [CORES*256-1:0] core_data_out
+);
+
+// requests waiting for a free core
+reg [LANES-1:0] pending;
+reg [1023:0] pending_data_in [0:LANES-1];
+reg [LANES-1:0] pending_message_length;
+reg [LANES-1:0] pending_store_intermediate;
+reg [LANES-1:0] pending_continue_intermediate;
+
+// requests of this cycle, a new request can be granted right away
+wire [LANES-1:0] req = pending | start;
+wire [1023:0] req_data_in [0:LANES-1];
+wire [LANES-1:0] req_message_length = (start & message_length) | (~start & pending_message_length);
+wire [LANES-1:0] req_store_intermediate = (start & store_intermediate) | (~start & pending_store_intermediate);
+wire [LANES-1:0] req_continue_intermediate = (start & continue_intermediate) | (~start & pending_continue_intermediate);
+
+genvar g;
+generate
+  for (g = 0; g < LANES; g = g + 1)
+    begin : gen_req
+      assign req_data_in[g] = start[g] ? data_in[g*1024 +: 1024] : pending_data_in[g];
+    end
+endgenerate
+
+// state of the cores
+reg [CORES-1:0] core_busy;
+reg [LANE_W-1:0] core_owner [0:CORES-1];
+reg [CORES-1:0] core_key_valid;
+reg [255:0] core_key [0:CORES-1];
+
+// lane with the highest priority, rotates after every grant
+reg [LANE_W-1:0] first_lane;
+
+// grants of this cycle, computed with blocking assignments
+reg [CORES-1:0] free;
+reg [LANES-1:0] granted;
+reg [CORES-1:0] grant;
+reg [CORES-1:0] grant_convert;
+reg [LANE_W-1:0] grant_lane [0:CORES-1];
+integer c;
+integer i;
+integer l;
+
+always @(posedge clk) begin
+  if (reset) begin
+    pending <= {LANES{1'b0}};
+    done <= {LANES{1'b0}};
+    core_start <= {CORES{1'b0}};
+    core_busy <= {CORES{1'b0}};
+    core_key_valid <= {CORES{1'b0}};
+    first_lane <= {LANE_W{1'b0}};
+  end
+  else begin
+
+    // results go back to the lane that owns the core
+    done <= {LANES{1'b0}};
+    for (c = 0; c < CORES; c = c + 1) begin
+      if (core_done[c]) begin
+        done[core_owner[c]] <= 1'b1;
+        data_out[core_owner[c]*256 +: 256] <= core_data_out[c*256 +: 256];
+      end
+    end
+
+    core_busy <= core_busy & ~core_done;
+
+    // buffer the new requests, cleared below if granted in this cycle
+    for (l = 0; l < LANES; l = l + 1) begin
+      if (start[l]) begin
+        pending[l] <= 1'b1;
+        pending_data_in[l] <= data_in[l*1024 +: 1024];
+        pending_message_length[l] <= message_length[l];
+        pending_store_intermediate[l] <= store_intermediate[l];
+        pending_continue_intermediate[l] <= continue_intermediate[l];
+      end
+    end
+
+    // a core finishing in this cycle is free in the next one
+    free = ~core_busy;
+    granted = {LANES{1'b0}};
+    grant = {CORES{1'b0}};
+    grant_convert = {CORES{1'b0}};
+
+    // continue requests to a free core that holds their key
+    for (c = 0; c < CORES; c = c + 1) begin
+      for (i = 0; i < LANES; i = i + 1) begin
+        l = first_lane + i;
+        if (l >= LANES)
+          l = l - LANES;
+        if (free[c] && req[l] && !granted[l] && req_continue_intermediate[l] &&
+            core_key_valid[c] && (core_key[c] == req_data_in[l][767:512])) begin
+          free[c] = 1'b0;
+          granted[l] = 1'b1;
+          grant[c] = 1'b1;
+          grant_lane[c] = l;
+        end
+      end
+    end
+
+    // all other requests to any free core, continue turns into store
+    for (c = 0; c < CORES; c = c + 1) begin
+      for (i = 0; i < LANES; i = i + 1) begin
+        l = first_lane + i;
+        if (l >= LANES)
+          l = l - LANES;
+        if (free[c] && req[l] && !granted[l]) begin
+          free[c] = 1'b0;
+          granted[l] = 1'b1;
+          grant[c] = 1'b1;
+          grant_convert[c] = req_continue_intermediate[l];
+          grant_lane[c] = l;
+        end
+      end
+    end
+
+    core_start <= grant;
+
+    for (c = 0; c < CORES; c = c + 1) begin
+      if (grant[c]) begin
+        l = grant_lane[c];
+        pending[l] <= 1'b0;
+        core_busy[c] <= 1'b1;
+        core_owner[c] <= l;
+        core_data_in[c*1024 +: 1024] <= req_data_in[l];
+        core_message_length[c] <= req_message_length[l];
+        core_store_intermediate[c] <= req_store_intermediate[l] | grant_convert[c];
+        core_continue_intermediate[c] <= req_continue_intermediate[l] & !grant_convert[c];
+        if (req_store_intermediate[l] | grant_convert[c]) begin
+          core_key_valid[c] <= 1'b1;
+          core_key[c] <= req_data_in[l][767:512];
+        end
+      end
+    end
+
+    first_lane <= (|grant) ? ((first_lane == LANES-1) ? {LANE_W{1'b0}} : first_lane + 1'b1) :
+                  first_lane;
+
+  end
+end
+
+endmodule
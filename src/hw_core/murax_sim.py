@@ -0,0 +1,522 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Discrete-event model of XMSS on the Murax SoC targets of xmss-reference.
+#
+# perf_model.py adds up the cycles of every event. This model runs the
+# software of a target as a process on a simulated timeline instead, next to
+# the accelerator behind the APB bridge:
+#   - the CPU process executes the call sequence of xmss_core_fast.c, hash.c
+#     and the chain_hardware.c, wots_hardware.c and sha256_store_hardware.c
+#     drivers: software work, every 32-bit APB load and store, and the busy
+#     polling loop, which only notices the end of a job at its next poll
+#   - the accelerator takes jobs from a queue (depth slots) and runs them on
+#     its units, one job per unit; a sha256XMSS job computes its first block
+#     while the CPU is still writing the second one
+# The bus model follows two sources. The order and number of the accesses of
+# every driver are those of ref_c_riscv/hardware/library, replayed in
+# apb_model.py. The registers they hit are the PADDR decode of the wrappers in
+# platforms/rtl (Apb3GenChain.v, Apb3GenLeaf.v, Apb3SHA256XMSS.v), which
+# `apb_model.py --check-rtl` checks access by access. From the RTL:
+#   - the busy loop reads module_busy at 0x04, one APB read per iteration; it
+#     rises two cycles after the START write (start register, then the busy
+#     register of the core), so the first read already sees the job running
+#     and a job is only seen to end by a read issued after it
+#   - sha256XMSS gets second_block_data_available from the write of the last
+#     data word (0x6c for 768, 0x8c for 1024 bits), which is what releases
+#     the second block of a hash job here
+#   - a job starts when its START write completes; the cycle of the start
+#     register is left out
+# The cycles per event are the perf_model.py parameters (--params, e.g. the
+# file written by `perf_model.py --calibrate --save-params`). The default
+# queue depth and number of units (1 and 1) are the wrappers of the SoC; larger
+# values model what-if hardware such as the multi-lane gen_leaf top, with the
+# drivers keeping up to depth chain or leaf jobs in flight. --batch replaces
+# chain_hardware() by the batched chain command proposed in apb_model.py.
+#
+# A block of work (a leaf, a thash_h) that starts and ends with the
+# accelerator idle always takes the same time, so it is simulated once and
+# replayed from a cache, which keeps key generation for large trees cheap.
+
+import argparse
+import collections
+import heapq
+import math
+import random
+import sys
+
+from apb_model import chain_batch_hardware
+from bench import wots_len
+from perf_model import (TARGETS, BYTE_LEN_n, cost, soc_target, midstate, load_params,
+                        hw_prf, hw_gen_chain, module_cost, bds_schedule)
+
+# cycles per event used only by this model, added to the perf_model.py ones
+DES_PARAMS = {
+  'poll_loop': 3,     # branch and mask of the busy loop, besides the APB read
+  'load_iv': 1,       # hash_restore() loading the IV register
+}
+
+
+####################################################################
+# event kernel
+
+# a one-shot event, processes waiting on it resume when it fires
+class signal(object):
+  def __init__(self):
+    self.fired = False
+    self.time = None
+    self.waiters = []
+
+class simulator(object):
+  def __init__(self):
+    self.now = 0
+    self.heap = []
+    self.seq = 0
+
+  def _at(self, time, proc):
+    heapq.heappush(self.heap, (time, self.seq, proc))
+    self.seq += 1
+
+  # processes are generators yielding a number of cycles to wait or a signal
+  def start(self, proc):
+    self._at(self.now, proc)
+
+  def fire(self, sig):
+    sig.fired = True
+    sig.time = self.now
+    for proc in sig.waiters:
+      self._at(self.now, proc)
+    sig.waiters = []
+
+  def _step(self, proc):
+    try:
+      req = next(proc)
+    except StopIteration:
+      return
+    if isinstance(req, signal):
+      if req.fired:
+        self._at(self.now, proc)
+      else:
+        req.waiters.append(proc)
+    else:
+      self._at(self.now + req, proc)
+
+  def run(self):
+    while self.heap:
+      (self.now, seq, proc) = heapq.heappop(self.heap)
+      self._step(proc)
+    return self.now
+
+
+####################################################################
+# accelerator behind the APB bridge
+
+# add events to the counters shared by the CPU and the accelerator
+def tally(stats, events):
+  for (name, num) in events.items():
+    stats[name] = stats.get(name, 0) + num
+
+# phases: list of (cycles, gate), a phase starts once its gate signal (if not
+# None) has fired, e.g. the second block of a sha256XMSS message
+class job(object):
+  def __init__(self, kind, phases):
+    self.kind = kind
+    self.phases = phases
+    self.done = signal()
+
+class accelerator(object):
+  def __init__(self, sim, stats, units = 1, depth = 1):
+    self.sim = sim
+    self.stats = stats
+    self.depth = depth
+    self.queue = collections.deque()
+    self.inflight = []
+    self.kick = signal()
+    for u in range(units):
+      sim.start(self.unit())
+
+  def idle(self):
+    return not self.inflight
+
+  def full(self):
+    return len(self.inflight) >= self.depth
+
+  def submit(self, j):
+    self.inflight.append(j)
+    self.queue.append(j)
+    self.sim.fire(self.kick)
+
+  def unit(self):
+    while True:
+      while not self.queue:
+        if self.kick.fired:
+          self.kick = signal()
+        yield self.kick
+      j = self.queue.popleft()
+      for (cycles, gate) in j.phases:
+        if gate is not None:
+          yield gate
+        if cycles:
+          tally(self.stats, cost(hw_busy = cycles))
+          yield cycles
+      self.inflight.remove(j)
+      tally(self.stats, {'jobs_' + j.kind: 1})
+      self.sim.fire(j.done)
+
+
+####################################################################
+# software of a Murax target
+
+class murax_system(object):
+  def __init__(self, target, params, w, units = 1, depth = 1, batch = 1):
+    self.t = soc_target(target)
+    self.params = params
+    self.w = w
+    self.batch = batch
+    self.w_len = wots_len(w, BYTE_LEN_n)
+    self.mid = midstate(self.t.variant, self.t.core)
+    self.sim = simulator()
+    self.stats = cost()
+    self.accel = accelerator(self.sim, self.stats, units, depth)
+    self.cache = {}
+
+  # run one process to completion, returns its cycles and event counts
+  def measure(self, proc):
+    t0 = self.sim.now
+    s0 = cost(self.stats)
+    self.sim.start(proc)
+    self.sim.run()
+    return (self.sim.now - t0, self.stats + s0 * -1)
+
+  ##################################################################
+  # CPU and bus primitives
+
+  def cpu(self, cycles):
+    tally(self.stats, cost(cpu = cycles))
+    yield cycles
+
+  def write(self, words):
+    tally(self.stats, cost(apb_write = words))
+    yield words * self.params['apb_access']
+
+  def read(self, words):
+    tally(self.stats, cost(apb_read = words))
+    yield words * self.params['apb_access']
+
+  # the control word write that starts a job
+  def start(self, j):
+    while self.accel.full():
+      # only drivers that keep several jobs in flight get here
+      yield from self.poll(self.accel.inflight[0])
+    yield from self.write(1)
+    self.accel.submit(j)
+
+  # busy loop on module_busy (0x04): the end of a job is seen by the first
+  # read issued after it, every iteration is one APB read and the loop
+  def poll(self, j):
+    period = self.params['apb_access'] + self.params['poll_loop']
+    t0 = self.sim.now
+    if not j.done.fired:
+      yield j.done
+    polls = max(0, math.ceil((j.done.time - t0) / period)) + 1
+    tally(self.stats, cost(apb_read = polls, poll = polls))
+    yield t0 + polls * period - self.sim.now
+
+  # work that starts and ends with an idle accelerator is simulated once
+  def block(self, key, body):
+    idle = self.accel.idle()
+    if idle and key in self.cache:
+      (cycles, stats) = self.cache[key]
+      tally(self.stats, stats)
+      yield cycles
+      return
+    t0 = self.sim.now
+    s0 = cost(self.stats)
+    yield from body()
+    if idle and self.accel.idle():
+      self.cache[key] = (self.sim.now - t0, self.stats + s0 * -1)
+
+  ##################################################################
+  # hash.c
+
+  # hash768 (blocks = 2) or hash1024 (blocks = 3), sha256_store_hardware()
+  # writes the second block after the start
+  def hash(self, blocks):
+    p = self.params
+    if not self.t.sha256xmss:
+      yield from self.cpu(blocks * p['sw_compression'] + p['sw_hash_call'])
+      return
+    yield from self.cpu(p['sw_hash_call'])
+    yield from self.write(16)
+    rest = signal()
+    j = job('sha256', [(p['hash_call'] + p['compression'], None),
+                       ((blocks - 1) * p['compression'], rest)])
+    yield from self.start(j)
+    yield from self.write(8 if blocks == 2 else 16)
+    self.sim.fire(rest)
+    yield from self.poll(j)
+    yield from self.read(8)
+
+  def prf(self):
+    yield from self.hash(2)
+
+  # first prf_pub() of a run, stores the pub_seed midstate
+  def prf_pub_init(self):
+    p = self.params
+    if not self.t.sha256xmss:
+      yield from self.cpu(p['sw_compression'] + p['sw_hash_call'])
+      return
+    yield from self.cpu(p['sw_hash_call'])
+    yield from self.write(16)
+    j = job('sha256', [(hw_prf(True, True).cycles(p), None)])
+    yield from self.start(j)
+    yield from self.poll(j)
+    if not self.t.hw_precomp:
+      # hash_store()
+      yield from self.read(8)
+
+  def prf_pub(self):
+    p = self.params
+    if not self.t.sha256xmss:
+      yield from self.cpu(p['sw_compression'] + p['sw_hash_call'])
+      return
+    yield from self.cpu(p['sw_hash_call'])
+    if not self.t.hw_precomp:
+      # hash_restore()
+      yield from self.write(8)
+      yield from self.start(job('load_iv', [(p['load_iv'], None)]))
+    yield from self.write(8)
+    j = job('sha256', [(hw_prf(True).cycles(p), None)])
+    yield from self.start(j)
+    yield from self.poll(j)
+    yield from self.read(8)
+
+  def thash_f(self):
+    yield from self.cpu(self.params['sw_thash_call'])
+    yield from self.prf_pub()
+    yield from self.prf_pub()
+    yield from self.hash(2)
+
+  def thash_h(self):
+    yield from self.cpu(self.params['sw_thash_call'])
+    for i in range(3):
+      yield from self.prf_pub()
+    yield from self.hash(3)
+
+  ##################################################################
+  # wots.c and xmss_commons.c
+
+  # chain_hardware(), split into issue and collect so that a driver can keep
+  # several chains in flight when the queue is deeper than one job
+  def chain_issue(self, steps):
+    p = self.params
+    yield from self.cpu(p['sw_hw_call'])
+    yield from self.write(24)
+    yield from self.write(1)   # command
+    j = job('chain', [((hw_gen_chain(self.mid, steps) + cost(op = 1)).cycles(p), None)])
+    yield from self.start(j)
+    return j
+
+  def collect(self, j, words = 8):
+    yield from self.poll(j)
+    yield from self.read(words)
+
+  # proposed batched chain command, the chains run one after the other; the
+  # data registers are shared with the sha256XMSS commands, so pub_seed and
+  # the address template are sent with every batch
+  def chain_batch(self, lengths):
+    p = self.params
+    bus = chain_batch_hardware(len(lengths))
+    yield from self.cpu(p['sw_hw_call'])
+    yield from self.write(bus.writes - 1)
+    j = job('chain_batch', [(sum((hw_gen_chain(self.mid, steps) + cost(op = 1)).cycles(p)
+                                 for steps in lengths), None)])
+    yield from self.start(j)
+    yield from self.collect(j, bus.reads - 1)
+
+  # gen_chain() of every chain with its number of steps
+  def chains(self, lengths):
+    if not self.t.chain:
+      for steps in lengths:
+        for i in range(steps):
+          yield from self.thash_f()
+      return
+    if self.batch > 1:
+      lengths = [steps for steps in lengths if steps]
+      for first in range(0, len(lengths), self.batch):
+        yield from self.chain_batch(lengths[first:first + self.batch])
+      return
+    pending = collections.deque()
+    for steps in lengths:
+      if steps == 0:
+        continue
+      if self.accel.full() and pending:
+        yield from self.collect(pending.popleft())
+      j = yield from self.chain_issue(steps)
+      pending.append(j)
+    while pending:
+      yield from self.collect(pending.popleft())
+
+  # wots_hardware(): reset, seeds and address, start
+  def leaf_issue(self):
+    p = self.params
+    yield from self.prf()   # get_seed()
+    yield from self.cpu(p['sw_hw_call'])
+    yield from self.write(1)   # reset
+    yield from self.write(24)
+    j = job('leaf', [(module_cost('gen_leaf', self.t.variant, self.t.core, self.w, self.w_len).cycles(p), None)])
+    yield from self.start(j)
+    return j
+
+  # gen_leaf_wots()
+  def leaf_sw(self):
+    yield from self.prf()   # get_seed()
+    for i in range(self.w_len):
+      yield from self.prf()   # expand_seed()
+    yield from self.chains([self.w - 1] * self.w_len)
+    for i in range(self.w_len - 1):
+      yield from self.thash_h()
+
+  def leaf(self):
+    if self.t.leaf:
+      j = yield from self.leaf_issue()
+      yield from self.collect(j)
+    else:
+      yield from self.leaf_sw()
+
+  ##################################################################
+  # xmss_core_fast.c
+
+  # treehash over 2^h leaves, the leaf driver runs up to depth leaves ahead
+  def keygen(self, h):
+    yield from self.prf_pub_init()
+    pending = collections.deque()
+    issued = 0
+    for idx in range(1 << h):
+      if self.t.leaf and self.accel.depth > 1:
+        while issued < (1 << h) and (issued == idx or not self.accel.full()):
+          j = yield from self.leaf_issue()
+          pending.append(j)
+          issued += 1
+        yield from self.collect(pending.popleft())
+      else:
+        yield from self.block('leaf', self.leaf)
+      # one node per trailing one of the leaf index
+      height = 0
+      while (idx >> height) & 1:
+        yield from self.block('thash_h', self.thash_h)
+        height += 1
+
+  # xmss_core_sign() of a signature computing the given leaves and nodes
+  def sign(self, lengths, leaves, nodes):
+    p = self.params
+    yield from self.prf()   # R
+    # hash_message(), always mbedtls in software
+    blocks = (4 * BYTE_LEN_n + 32 + 9 + 63) // 64
+    yield from self.cpu(blocks * p['sw_compression'] + p['sw_hash_call'])
+    yield from self.prf()   # get_seed()
+    for i in range(self.w_len):
+      yield from self.prf()   # expand_seed()
+    yield from self.chains(lengths)
+    for i in range(leaves):
+      yield from self.block('leaf', self.leaf)
+    for i in range(nodes):
+      yield from self.block('thash_h', self.thash_h)
+
+
+# chain lengths of wots_sign() for a message digest, see wots_checksum()
+def sign_chain_lengths(w, digest):
+  log_w = int(math.log2(w))
+  len1 = 8 * BYTE_LEN_n // log_w
+  len2 = wots_len(w, BYTE_LEN_n) - len1
+  bits = int.from_bytes(digest, 'big')
+  digits = [(bits >> (8 * BYTE_LEN_n - log_w * (i + 1))) & (w - 1) for i in range(len1)]
+  nbytes = (len2 * log_w + 7) // 8
+  csum = ((len1 * (w - 1) - sum(digits)) << (8 - (len2 * log_w) % 8)) & ((1 << (8 * nbytes)) - 1)
+  return digits + [(csum >> (8 * nbytes - log_w * (i + 1))) & (w - 1) for i in range(len2)]
+
+# key generation and the first num signatures of one target
+# returns (keygen cycles, keygen events, [sign cycles])
+def simulate(target, params, h, w, k = 0, num = 16, units = 1, depth = 1, batch = 1, seed = 0):
+  system = murax_system(target, params, w, units, depth, batch)
+  (keygen, events) = system.measure(system.keygen(h))
+  rng = random.Random(seed)
+  signs = []
+  for (leaves, nodes) in bds_schedule(h, k, num):
+    lengths = sign_chain_lengths(w, bytes(rng.getrandbits(8) for i in range(BYTE_LEN_n)))
+    signs.append(system.measure(system.sign(lengths, leaves, nodes))[0])
+  return (keygen, events, signs)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Discrete-event model of XMSS key generation and signing on the Murax targets.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--params', dest='params', type=str, required=False, default=None,
+            help='JSON file with cycles per event, e.g. written by perf_model.py --save-params')
+  parser.add_argument('--targets', dest='targets', type=str, nargs='+', default=list(TARGETS),
+            choices=list(TARGETS), help='Murax targets')
+  parser.add_argument('-w', '--wots_w', dest='wots_w', type=int, nargs='+', default=[16],
+            choices=[4, 16, 256], help='Winternitz parameters')
+  parser.add_argument('-t', '--tree_height', dest='tree_height', type=int, nargs='+', default=[10],
+            help='XMSS tree heights')
+  parser.add_argument('-k', '--bds_k', dest='bds_k', type=int, required=False, default=0,
+            help='BDS traversal parameter')
+  parser.add_argument('--sigs', dest='sigs', type=int, required=False, default=16,
+            help='number of signatures, as XMSS_SIGNATURES of test/xmss.c')
+  parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, default=0,
+            help='seed of the random message digests')
+  parser.add_argument('--units', dest='units', type=int, required=False, default=1,
+            help='accelerator units working on jobs in parallel')
+  parser.add_argument('--depth', dest='depth', type=int, required=False, default=1,
+            help='accelerator jobs the drivers keep in flight')
+  parser.add_argument('--batch', dest='batch', type=int, required=False, default=1,
+            help='chain jobs per call of the batched chain command of apb_model.py, 1: chain_hardware()')
+  parser.add_argument('--freq', dest='freq', type=float, required=False, default=100,
+            help='clock frequency in MHz')
+  parser.add_argument('-v', '--verbose', dest='verbose', action='store_true',
+            help='print where the key generation cycles go')
+
+  args = parser.parse_args()
+
+  if args.units < 1 or args.depth < 1 or args.batch < 1:
+    sys.exit("--units, --depth and --batch must be at least 1")
+
+  params = load_params(args.params)
+  for (name, value) in DES_PARAMS.items():
+    params.setdefault(name, value)
+
+  def seconds(cycles):
+    return "%12.0f %9.3f s" % (cycles, cycles / (args.freq * 1e6))
+
+  print("%-34s %4s %4s %24s %24s %24s" % ('target', 'h', 'w', 'keygen', 'sign (mean)', 'sign (max)'))
+  for name in args.targets:
+    for h in args.tree_height:
+      for w in args.wots_w:
+        (keygen, events, signs) = simulate(name, params, h, w, args.bds_k, args.sigs,
+                                           args.units, args.depth, args.batch, args.seed)
+        print("%-34s %4d %4d %24s %24s %24s" % (name, h, w, seconds(keygen),
+                                                seconds(sum(signs) / len(signs)), seconds(max(signs))))
+        if args.verbose:
+          polls = events.get('poll', 0)
+          transfers = events.get('apb_read', 0) - polls + events.get('apb_write', 0)
+          print("    cpu %5.1f%%, apb transfers %5.1f%% (%d words), busy polling %5.1f%% (%d reads), accelerator units busy %5.1f%%"
+                % (100 * events.get('cpu', 0) / keygen, 100 * transfers * params['apb_access'] / keygen, transfers,
+                   100 * polls * (params['apb_access'] + params['poll_loop']) / keygen, polls,
+                   100 * events.get('hw_busy', 0) / (keygen * args.units))
+                + ''.join(", %d %s jobs" % (num, name[5:]) for (name, num) in sorted(events.items())
+                          if name.startswith('jobs_')))
@@ -0,0 +1,513 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Analytical performance model of the WOTS accelerators and of XMSS on the
+# Murax SoC targets of xmss-reference.
+#
+# Every operation is described by a cost: the number of times it uses each
+# basic event, e.g. SHA-256 compressions, sha256XMSS calls, APB accesses. The
+# cycle estimate is the dot product of a cost with a table of cycles per event
+# (the model parameters). Compressions follow the RTL:
+#   - a PRF is 2 compressions, or 1 when it continues from the midstate stored
+#     in sha256XMSSprecomp.v (store variant in wots/ with the precomp core);
+#     the first PRF after a start stores the midstate and costs 2
+#   - thash_f = 2 PRF + 2 compressions, thash_h = 3 PRF + 3 compressions
+#   - seed_expand = wots_len PRF, gen_chain = steps * thash_f,
+#     gen_pk = seed_expand + wots_len chains of w-1 steps,
+#     l_tree = wots_len-1 thash_h, gen_leaf = gen_pk + l_tree
+# and the software paths follow the SHA256XMSS_HARDWARE, HW_PRECOMP,
+# CHAIN_HARDWARE and WOTS_HARDWARE code of xmss-reference and ref_c_riscv.
+#
+# The hardware parameters can be calibrated against the cycles measured by
+# bench.py (bench_results.jsonl), the software parameters against cycles
+# measured on the SoC (--measured), by linear least squares. The model then
+# predicts key generation and BDS signing latency for tree heights and
+# Winternitz parameters that were never synthesised or simulated; the BDS
+# schedule of xmss_core_fast.c is replayed without hashing to count the leaves
+# and nodes every signature computes.
+
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from regress import HW_CORE, VARIANTS
+from bench import CORES, MODULES, wots_len
+
+# cycles per event, the software numbers are rough until calibrated
+DEFAULT_PARAMS = {
+  # hardware
+  'compression': 65,    # sha256.v: 64 rounds and the start cycle
+  'hash_call': 3,       # sha256XMSS start/done handshake per message
+  'thash_call': 2,      # thash_f/thash_h control per call
+  'chain_call': 2,      # gen_chain start and done
+  'op': 4,              # start/done of the top-level module
+  # software on the Murax SoC
+  'sw_compression': 3000, # mbedtls_internal_sha256_process()
+  'sw_hash_call': 200,    # padding, copies and driver code per hash
+  'sw_thash_call': 400,   # addresses, bitmask xor per thash_f/thash_h
+  'sw_hw_call': 100,      # driver code per chain/leaf accelerator call
+  'apb_access': 8,        # one 32-bit load or store on the APB bus
+}
+
+HW_PARAMS = ('compression', 'hash_call', 'thash_call', 'chain_call', 'op')
+SW_PARAMS = ('sw_compression', 'sw_hash_call', 'sw_thash_call', 'sw_hw_call', 'apb_access')
+
+# Murax targets of xmss-reference (MuraxSHA256, the general-purpose sha256
+# accelerator, is not modelled)
+TARGETS = (
+  'Murax',
+  'MuraxSHA256XMSS',
+  'MuraxSHA256XMSS_precomp',
+  'MuraxSHA256XMSSChain',
+  'MuraxSHA256XMSSChain_precomp',
+  'MuraxSHA256XMSSChainLeaf',
+  'MuraxSHA256XMSSChainLeaf_precomp',
+)
+
+# only the 256-bit parameter sets are modelled
+BYTE_LEN_n = 32
+
+# number of events, cost * k and cost + cost work as for vectors
+class cost(dict):
+  def __add__(self, other):
+    res = cost(self)
+    for (name, num) in other.items():
+      res[name] = res.get(name, 0) + num
+    return res
+
+  def __mul__(self, k):
+    return cost((name, num * k) for (name, num) in self.items())
+
+  __rmul__ = __mul__
+
+  def cycles(self, params):
+    return sum(num * params[name] for (name, num) in self.items())
+
+
+####################################################################
+# hardware modules
+
+# the store variant only saves compressions together with the precomp core
+def midstate(variant, core):
+  return variant == 'wots' and core == 'sha256XMSSprecomp'
+
+# PRF keyed with pub_seed or sk_seed, store: first PRF after a start
+def hw_prf(mid, store = False):
+  return cost(compression = 2 if (store or not mid) else 1, hash_call = 1)
+
+def hw_thash_f(mid, store = False):
+  return hw_prf(mid, store) + hw_prf(mid) + cost(compression = 2, hash_call = 1, thash_call = 1)
+
+def hw_thash_h(mid, store = False):
+  return hw_prf(mid, store) + 2 * hw_prf(mid) + cost(compression = 3, hash_call = 1, thash_call = 1)
+
+def hw_seed_expand(mid, w_len):
+  return hw_prf(mid, True) + (w_len - 1) * hw_prf(mid)
+
+def hw_gen_chain(mid, steps):
+  if steps == 0:
+    return cost(chain_call = 1)
+  return hw_thash_f(mid, True) + (steps - 1) * hw_thash_f(mid) + cost(chain_call = 1)
+
+def hw_gen_pk(mid, w, w_len):
+  return hw_seed_expand(mid, w_len) + w_len * hw_gen_chain(mid, w - 1)
+
+def hw_l_tree(mid, w_len):
+  return hw_thash_h(mid, True) + (w_len - 2) * hw_thash_h(mid)
+
+def hw_gen_leaf(mid, w, w_len):
+  return hw_gen_pk(mid, w, w_len) + hw_l_tree(mid, w_len)
+
+# one operation of a benchmarked module, as simulated by bench.py
+def module_cost(module, variant, core, w, w_len = None):
+  if w_len is None:
+    w_len = wots_len(w, BYTE_LEN_n)
+  mid = midstate(variant, core)
+  if module == 'gen_chain':
+    res = hw_gen_chain(mid, w - 1)
+  elif module == 'gen_pk':
+    res = hw_gen_pk(mid, w, w_len)
+  elif module == 'l_tree':
+    res = hw_l_tree(mid, w_len)
+  elif module == 'gen_leaf':
+    res = hw_gen_leaf(mid, w, w_len)
+  else:
+    raise ValueError("unknown module %r" % module)
+  return res + cost(op = 1)
+
+
+####################################################################
+# software paths on the Murax SoC
+
+class soc_target(object):
+  def __init__(self, name):
+    if name not in TARGETS:
+      raise ValueError("unknown target %r" % name)
+    self.name = name
+    self.sha256xmss = name != 'Murax'
+    self.hw_precomp = name.endswith('_precomp')
+    self.chain = 'Chain' in name
+    self.leaf = 'Leaf' in name
+    # hardware variant and core behind the chain and leaf accelerators
+    self.variant = 'wots' if self.hw_precomp else 'wots_no_store'
+    self.core = 'sha256XMSSprecomp' if self.hw_precomp else 'sha256XMSS'
+
+# hash768 (blocks = 2) or hash1024 (blocks = 3) of hash.c
+def sw_hash(t, blocks):
+  if not t.sha256xmss:
+    return cost(sw_compression = blocks, sw_hash_call = 1)
+  # data words, control, busy poll, result words
+  words = 24 if blocks == 2 else 32
+  return cost(compression = blocks, hash_call = 1, sw_hash_call = 1, apb_access = words + 10)
+
+# prf() with sk_seed or sk_prf
+def sw_prf(t):
+  return sw_hash(t, 2)
+
+# prf_pub(), the pub_seed midstate is computed once per program run
+def sw_prf_pub(t):
+  if not t.sha256xmss:
+    return cost(sw_compression = 1, sw_hash_call = 1)
+  # second half block, control, busy poll, result words
+  res = cost(compression = 1, hash_call = 1, sw_hash_call = 1, apb_access = 18)
+  if not t.hw_precomp:
+    # hash_restore() loads the midstate: 8 words and the control word
+    res += cost(apb_access = 9)
+  return res
+
+def sw_thash_f(t):
+  return 2 * sw_prf_pub(t) + sw_hash(t, 2) + cost(sw_thash_call = 1)
+
+def sw_thash_h(t):
+  return 3 * sw_prf_pub(t) + sw_hash(t, 3) + cost(sw_thash_call = 1)
+
+# core_hash() of the message digest, always mbedtls in software
+def sw_hash_message(t, mlen):
+  blocks = (4 * BYTE_LEN_n + mlen + 9 + 63) // 64
+  return cost(sw_compression = blocks, sw_hash_call = 1)
+
+# gen_chain() of wots.c
+def sw_chain(t, steps):
+  if not t.chain:
+    return steps * sw_thash_f(t)
+  if steps == 0:
+    return cost()
+  # pub_seed, data and address words, command, control, busy poll, result
+  return (cost(sw_hw_call = 1, apb_access = 35, op = 1)
+          + hw_gen_chain(midstate(t.variant, t.core), steps))
+
+# gen_leaf_wots() of xmss_commons.c
+def sw_leaf(t, w, w_len):
+  res = sw_prf(t)   # get_seed()
+  if t.leaf:
+    # reset, seeds and address words, control, busy poll, result
+    return (res + cost(sw_hw_call = 1, apb_access = 35)
+            + module_cost('gen_leaf', t.variant, t.core, w, w_len))
+  res += w_len * sw_prf(t)   # expand_seed()
+  res += w_len * sw_chain(t, w - 1)
+  return res + (w_len - 1) * sw_thash_h(t)
+
+
+####################################################################
+# XMSS key generation and signing
+
+# expected number of chain steps and of non-empty chains of wots_sign() for a
+# uniformly random message digest
+def sign_chain_steps(w):
+  log_w = int(math.log2(w))
+  len1 = 8 * BYTE_LEN_n // log_w
+  len2 = wots_len(w, BYTE_LEN_n) - len1
+
+  steps = len1 * (w - 1) / 2
+  chains = len1 * (w - 1) / w
+
+  # distribution of the digit sum of the message part
+  digit = np.ones(w) / w
+  dist = np.ones(1)
+  for i in range(len1):
+    dist = np.convolve(dist, digit)
+
+  # checksum digits as in wots_checksum() of wots.c
+  nbytes = (len2 * log_w + 7) // 8
+  shift = 8 - (len2 * log_w) % 8
+  mask = (1 << (8 * nbytes)) - 1
+  for (s, p) in enumerate(dist):
+    csum = ((len1 * (w - 1) - s) << shift) & mask
+    for i in range(len2):
+      d = (csum >> (8 * nbytes - log_w * (i + 1))) & (w - 1)
+      steps += p * d
+      chains += p * (d != 0)
+  return (steps, chains)
+
+# replay of the BDS traversal of xmss_core_fast.c without hashing, yields the
+# number of (leaves, nodes) computed by each signature
+def bds_schedule(h, k, num):
+  th_h = list(range(h - k))
+  th_next = [0] * (h - k)
+  th_used = [0] * (h - k)
+  th_done = [1] * (h - k)
+  stacklevels = [0] * (h + 1)
+  offset = 0
+
+  for idx in range(min(num, 1 << h)):
+    leaves = 0
+    nodes = 0
+    if idx < (1 << h) - 1:
+      # bds_round()
+      tau = h
+      for i in range(h):
+        if not ((idx >> i) & 1):
+          tau = i
+          break
+      if tau == 0:
+        leaves += 1
+      else:
+        nodes += 1
+        for i in range(min(tau, h - k)):
+          startidx = idx + 1 + 3 * (1 << i)
+          if startidx < (1 << h):
+            (th_h[i], th_next[i], th_done[i], th_used[i]) = (i, startidx, 0, 0)
+
+      # bds_treehash_update()
+      for j in range((h - k) >> 1):
+        l_min = h
+        level = h - k
+        for i in range(h - k):
+          if th_done[i]:
+            low = h
+          elif th_used[i] == 0:
+            low = i
+          else:
+            low = min([stacklevels[offset - m - 1] for m in range(th_used[i])] + [h])
+          if low < l_min:
+            level = i
+            l_min = low
+        if level == h - k:
+          break
+
+        # treehash_update()
+        leaves += 1
+        height = 0
+        while th_used[level] > 0 and stacklevels[offset - 1] == height:
+          nodes += 1
+          height += 1
+          th_used[level] -= 1
+          offset -= 1
+        if height == th_h[level]:
+          th_done[level] = 1
+        else:
+          stacklevels[offset] = height
+          offset += 1
+          th_used[level] += 1
+          th_next[level] += 1
+    yield (leaves, nodes)
+
+# xmss_core_keypair() of xmss_core_fast.c: all leaves and inner nodes
+def keygen_cost(t, h, w):
+  w_len = wots_len(w, BYTE_LEN_n)
+  return (1 << h) * sw_leaf(t, w, w_len) + ((1 << h) - 1) * sw_thash_h(t)
+
+# cost of one signature computing the given number of leaves and nodes
+def sign_cost(t, w, leaves, nodes, mlen = 32):
+  w_len = wots_len(w, BYTE_LEN_n)
+  (steps, chains) = sign_chain_steps(w)
+  res = sw_prf(t) + sw_hash_message(t, mlen)   # R and the digest
+  res += sw_prf(t) + w_len * sw_prf(t)         # get_seed(), expand_seed()
+  if t.chain:
+    mid = midstate(t.variant, t.core)
+    # the first step of every chain stores the midstate
+    call = cost(sw_hw_call = 1, apb_access = 35, chain_call = 1, op = 1, compression = 1 if mid else 0)
+    res += chains * call + steps * hw_thash_f(mid)
+  else:
+    res += steps * sw_thash_f(t)
+  return res + leaves * sw_leaf(t, w, w_len) + nodes * sw_thash_h(t)
+
+# mean and worst-case signing cost over the first num signatures
+def sign_stats(t, h, w, k, num, params):
+  base = sign_cost(t, w, 0, 0).cycles(params)
+  leaf = sw_leaf(t, w, wots_len(w, BYTE_LEN_n)).cycles(params)
+  node = sw_thash_h(t).cycles(params)
+  total = 0
+  worst = 0
+  count = 0
+  for (leaves, nodes) in bds_schedule(h, k, num):
+    c = base + leaves * leaf + nodes * node
+    total += c
+    worst = max(worst, c)
+    count += 1
+  return (total / count, worst)
+
+
+####################################################################
+# calibration
+
+def load_params(path):
+  params = dict(DEFAULT_PARAMS)
+  if path is not None:
+    with open(path) as f:
+      params.update(json.load(f))
+  return params
+
+# (cost, measured cycles, label) of every passing bench.py record, the latest
+# record of a configuration wins
+def bench_samples(path):
+  latest = {}
+  with open(path) as f:
+    for line in f:
+      if not line.strip():
+        continue
+      r = json.loads(line)
+      if r['status'] != 'pass' or r['cycles_per_op'] is None or r['key_len'] != 8 * BYTE_LEN_n:
+        continue
+      latest[r['id']] = r
+  return [(module_cost(r['module'], r['variant'], r['core'], r['wots_w'], r['wots_len']),
+           r['cycles_per_op'], r['id']) for r in latest.values()]
+
+# software measurements, one JSON record per line:
+#   {"target": ..., "operation": "thash_f"|"thash_h"|"leaf"|"keygen",
+#    "wots_w": ..., "tree_height": ..., "cycles": ...}
+def measured_samples(path):
+  res = []
+  with open(path) as f:
+    for line in f:
+      if not line.strip():
+        continue
+      r = json.loads(line)
+      t = soc_target(r['target'])
+      w = r.get('wots_w', 16)
+      op = r['operation']
+      if op == 'thash_f':
+        c = sw_thash_f(t)
+      elif op == 'thash_h':
+        c = sw_thash_h(t)
+      elif op == 'leaf':
+        c = sw_leaf(t, w, wots_len(w, BYTE_LEN_n))
+      elif op == 'keygen':
+        c = keygen_cost(t, r['tree_height'], w)
+      else:
+        raise ValueError("unknown operation %r" % op)
+      res.append((c, r['cycles'], '%s %s w=%d' % (r['target'], op, w)))
+  return res
+
+# least-squares fit of the parameters in names, the others stay fixed
+# returns the new parameters and the relative error of every sample
+def calibrate(samples, params, names):
+  names = [name for name in names if any(c.get(name, 0) for (c, m, label) in samples)]
+  res = dict(params)
+  if names:
+    a = np.array([[c.get(name, 0) for name in names] for (c, m, label) in samples], dtype=float)
+    fixed = np.array([sum(num * params[name] for (name, num) in c.items() if name not in names)
+                      for (c, m, label) in samples])
+    b = np.array([m for (c, m, label) in samples], dtype=float) - fixed
+    (x, residuals, rank, sv) = np.linalg.lstsq(a, b, rcond=None)
+    if rank < len(names):
+      print("warning: the samples do not determine %s independently" % ', '.join(names), file=sys.stderr)
+    for (name, value) in zip(names, x):
+      res[name] = float(value)
+  errors = [(label, m, c.cycles(res), (c.cycles(res) - m) / m) for (c, m, label) in samples]
+  return (res, errors)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Analytical cycle and hash-count model of the WOTS accelerators and of XMSS on Murax.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--params', dest='params', type=str, required=False, default=None,
+            help='JSON file with cycles per event, overriding the built-in defaults')
+  parser.add_argument('--results', dest='results', type=str, required=False,
+            default=os.path.join(HW_CORE, 'bench_results.jsonl'),
+            help='bench.py results used by --calibrate')
+  parser.add_argument('--measured', dest='measured', type=str, required=False, default=None,
+            help='JSON-lines file with software cycles measured on the SoC, used by --calibrate')
+  parser.add_argument('--calibrate', dest='calibrate', action='store_true',
+            help='fit the parameters to the measured cycles')
+  parser.add_argument('--fit', dest='fit', type=str, nargs='+', required=False,
+            default=[p for p in HW_PARAMS + SW_PARAMS if p != 'compression'],
+            choices=list(DEFAULT_PARAMS),
+            help='parameters fitted by --calibrate')
+  parser.add_argument('--save-params', dest='save_params', type=str, required=False, default=None,
+            help='write the (calibrated) parameters to this JSON file')
+  parser.add_argument('-w', '--wots_w', dest='wots_w', type=int, nargs='+', default=[4, 16, 256],
+            choices=[4, 16, 256], help='Winternitz parameters')
+  parser.add_argument('--modules', dest='modules', type=str, nargs='*', default=list(MODULES),
+            choices=list(MODULES), help='hardware modules to estimate')
+  parser.add_argument('--targets', dest='targets', type=str, nargs='*', default=[],
+            choices=list(TARGETS), help='Murax targets to estimate XMSS key generation and signing for')
+  parser.add_argument('-t', '--tree_height', dest='tree_height', type=int, nargs='+', default=[10],
+            help='XMSS tree heights')
+  parser.add_argument('-k', '--bds_k', dest='bds_k', type=int, required=False, default=0,
+            help='BDS traversal parameter')
+  parser.add_argument('--sigs', dest='sigs', type=int, required=False, default=1024,
+            help='number of signatures the signing cost is averaged over')
+  parser.add_argument('--freq', dest='freq', type=float, required=False, default=None,
+            help='clock frequency in MHz, also print latencies in ms')
+
+  args = parser.parse_args()
+
+  params = load_params(args.params)
+
+  if args.calibrate:
+    samples = []
+    if os.path.exists(args.results):
+      samples += bench_samples(args.results)
+    if args.measured is not None:
+      samples += measured_samples(args.measured)
+    if not samples:
+      sys.exit("no measurements to calibrate against")
+    (params, errors) = calibrate(samples, params, args.fit)
+    print("calibrated against %d measurements:" % len(samples))
+    for (label, measured, predicted, err) in errors:
+      print("  %-60s %12.1f %12.1f %+7.2f%%" % (label, measured, predicted, 100 * err))
+    print("max error %.2f%%" % (100 * max(abs(e[3]) for e in errors)))
+    print()
+
+  if args.save_params is not None:
+    with open(args.save_params, 'w') as f:
+      json.dump(params, f, indent=1, sort_keys=True)
+      f.write('\n')
+
+  def latency(cycles):
+    if args.freq is None:
+      return "%14.0f" % cycles
+    return "%14.0f %10.3f ms" % (cycles, cycles / (args.freq * 1e3))
+
+  if args.modules:
+    print("%-14s %-10s %-18s %4s %5s %12s %10s" % ('variant', 'module', 'core', 'w', 'len',
+                                                   'compressions', 'hash calls') + "%15s" % 'cycles')
+    for variant in VARIANTS:
+      for module in args.modules:
+        for core in CORES:
+          for w in args.wots_w:
+            c = module_cost(module, variant, core, w)
+            print("%-14s %-10s %-18s %4d %5d %12d %10d " % (variant, module, core, w, wots_len(w, BYTE_LEN_n),
+                                                            c['compression'], c['hash_call'])
+                  + latency(c.cycles(params)))
+    print()
+
+  if args.targets:
+    print("%-34s %4s %4s %26s %26s %26s" % ('target', 'h', 'w', 'keygen', 'sign (mean)', 'sign (max)'))
+    for name in args.targets:
+      t = soc_target(name)
+      for h in args.tree_height:
+        for w in args.wots_w:
+          keygen = keygen_cost(t, h, w).cycles(params)
+          (mean, worst) = sign_stats(t, h, w, args.bds_k, args.sigs, params)
+          print("%-34s %4d %4d %26s %26s %26s" % (name, h, w, latency(keygen), latency(mean), latency(worst)))
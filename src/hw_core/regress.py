@@ -0,0 +1,369 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Regression runner for the testbenches in wots/ and wots_no_store/.
+#
+# Every <variant>/<module>/<name>_tb folder with a Makefile is a testbench.
+# The commands to generate the test vectors, to compile the simulator and to
+# run it are taken from the Makefile (make -n). Each testbench runs in its own
+# scratch tree: the testbench folder is copied, the rest of hw_core and
+# ref_python are symlinked, so any number of them can run at the same time
+# without writing into the source tree.
+#
+# Three things are cached, each keyed by a hash of the commands that produce
+# it and of the contents of every file these commands read:
+#   sim/<key>     the compiled simulator
+#   gold/<key>    the generated test vectors (data.in, data.out, ...)
+#   result/<key>  the outcome of running a simulator on a set of vectors
+# so a regression after a change only recompiles, regenerates or reruns the
+# testbenches that depend on the changed files.
+
+import argparse
+import concurrent.futures
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HW_CORE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.dirname(HW_CORE)
+REF_PYTHON = os.path.join(SRC, 'ref_python')
+
+VARIANTS = ('wots', 'wots_no_store')
+SHARED = ('util', 'hash')
+
+# files that are never mirrored into a scratch tree
+GENERATED = ('*.in', '*.out', '*.vcd', '*.bin', '__pycache__')
+
+class testbench(object):
+  def __init__(self, path):
+    self.path = path
+    self.name = os.path.relpath(path, HW_CORE)
+    self.variant = self.name.split(os.sep)[0]
+    with open(os.path.join(path, 'Makefile')) as f:
+      m = re.search(r'^test\.out:\s*(\S+)', f.read(), re.M)
+    if m is None:
+      raise ValueError("%s: Makefile has no test.out rule" % self.name)
+    # simulator executable, first prerequisite of test.out
+    self.sim = m.group(1)
+
+  def __repr__(self):
+    return 'testbench(%r)' % self.name
+
+# all testbenches, optionally only those matching one of the patterns
+# (glob or substring of the path relative to hw_core)
+def find_testbenches(patterns = None):
+  tbs = []
+  for variant in VARIANTS:
+    for makefile in sorted(glob.glob(os.path.join(HW_CORE, variant, '*', '*_tb', 'Makefile'))):
+      tb = testbench(os.path.dirname(makefile))
+      if patterns and not any(fnmatch.fnmatch(tb.name, p) or p.strip('/') in tb.name for p in patterns):
+        continue
+      tbs.append(tb)
+  return tbs
+
+def make_dry_run(path, make_vars, *args):
+  res = subprocess.run(['make', '-s', '-n'] + list(args) + make_vars, cwd=path,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                       universal_newlines=True, check=True)
+  return [line.strip() for line in res.stdout.splitlines() if line.strip()]
+
+# existing files read by a list of shell commands run in folder path
+# outputs (> file, -o file, cp destination) are left out
+def command_inputs(path, commands):
+  inputs = []
+  outputs = set()
+  for command in commands:
+    tokens = shlex.split(command)
+    for (i, tok) in enumerate(tokens[1:], 1):
+      if tokens[i-1] in ('>', '-o'):
+        outputs.add(os.path.normpath(os.path.join(path, tok)))
+    if tokens[0] == 'cp' and len(tokens) == 3:
+      dst = tokens[2]
+      if dst.endswith('/'):
+        dst += os.path.basename(tokens[1])
+      outputs.add(os.path.normpath(os.path.join(path, dst)))
+    for tok in tokens[1:]:
+      name = os.path.normpath(os.path.join(path, tok))
+      if not tok.startswith('-') and os.path.isfile(name) and name not in inputs:
+        inputs.append(name)
+  return [name for name in inputs if name not in outputs]
+
+def content_key(commands, files, extra = ()):
+  h = hashlib.sha256()
+  for line in list(extra) + commands:
+    h.update(line.encode() + b'\n')
+  for name in files:
+    with open(name, 'rb') as f:
+      h.update(hashlib.sha256(f.read()).digest())
+  return h.hexdigest()
+
+def tool_version(cmd):
+  try:
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                         universal_newlines=True)
+    return res.stdout.strip().split('\n')[0]
+  except OSError:
+    return ''
+
+# cache directory with one sub folder per kind of entry
+class regress_cache(object):
+  def __init__(self, path, enabled = True):
+    self.path = path
+    self.enabled = enabled
+
+  def entry(self, kind, key):
+    return os.path.join(self.path, kind, key)
+
+  def get(self, kind, key):
+    if not self.enabled:
+      return None
+    path = self.entry(kind, key)
+    return path if os.path.exists(path) else None
+
+  # store the files (relative to folder) under kind/key, atomically
+  def put_files(self, kind, key, folder, files):
+    if not self.enabled:
+      return
+    os.makedirs(os.path.join(self.path, kind), exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.join(self.path, kind))
+    for name in files:
+      shutil.copy2(os.path.join(folder, name), os.path.join(tmp, name))
+    try:
+      os.replace(tmp, self.entry(kind, key))
+    except OSError:
+      # stored concurrently by another worker
+      shutil.rmtree(tmp, ignore_errors=True)
+
+  def get_result(self, key):
+    path = self.get('result', key + '.json')
+    if path is None:
+      return None
+    with open(path) as f:
+      return json.load(f)
+
+  def put_result(self, key, result):
+    if not self.enabled:
+      return
+    os.makedirs(os.path.join(self.path, 'result'), exist_ok=True)
+    (fd, tmp) = tempfile.mkstemp(prefix='.tmp-', dir=os.path.join(self.path, 'result'))
+    with os.fdopen(fd, 'w') as f:
+      json.dump(result, f, indent=1)
+    os.replace(tmp, self.entry('result', key + '.json'))
+
+def restore_files(entry, folder):
+  for name in os.listdir(entry):
+    shutil.copy2(os.path.join(entry, name), os.path.join(folder, name))
+    # newer than every source, make must not rebuild it
+    os.utime(os.path.join(folder, name))
+
+class runner(object):
+  def __init__(self, cache, make_vars = None, keep = False, timeout = None):
+    self.cache = cache
+    self.make_vars = make_vars or []
+    self.keep = keep
+    self.timeout = timeout
+    self.versions = [tool_version(['iverilog', '-V']), tool_version(['python3', '--version'])]
+    self.ref_files = sorted(glob.glob(os.path.join(REF_PYTHON, '*.py')))
+
+  # the commands of one testbench and the cache keys derived from them
+  def plan(self, tb, make_vars):
+    sim_cmds = make_dry_run(tb.path, make_vars, '-B', tb.sim)
+    gold_cmds = make_dry_run(tb.path, make_vars, '-B', 'data.out')
+    run_cmds = make_dry_run(tb.path, make_vars, '-o', tb.sim, '-o', 'data.in', 'test.out')
+    sim_key = content_key(sim_cmds, command_inputs(tb.path, sim_cmds), self.versions[:1])
+    gold_key = content_key(gold_cmds, command_inputs(tb.path, gold_cmds) + self.ref_files,
+                           self.versions[1:])
+    result_key = content_key(run_cmds, [], [sim_key, gold_key])
+    return (sim_key, gold_key, result_key, run_cmds)
+
+  # scratch tree: the testbench folder copied, everything else it may read symlinked
+  def scratch(self, tb, root):
+    hw = os.path.join(root, 'hw_core')
+    for d in SHARED + (tb.variant,):
+      shutil.copytree(os.path.join(HW_CORE, d), os.path.join(hw, d),
+                      copy_function=os.symlink, ignore=self._ignore(tb))
+    os.symlink(REF_PYTHON, os.path.join(root, 'ref_python'))
+    work = os.path.join(hw, tb.name)
+    shutil.copytree(tb.path, work, ignore=shutil.ignore_patterns(tb.sim, *GENERATED))
+    return work
+
+  def _ignore(self, tb):
+    patterns = shutil.ignore_patterns(*GENERATED)
+    def ignore(folder, names):
+      # the testbench folder itself is copied separately
+      return [name for name in names if os.path.join(folder, name) == tb.path] + list(patterns(folder, names))
+    return ignore
+
+  def _shell(self, work, command, log):
+    res = subprocess.run(command, shell=True, cwd=work, stdout=subprocess.PIPE,
+                         stderr=subprocess.STDOUT, universal_newlines=True,
+                         timeout=self.timeout)
+    log.append('$ ' + command)
+    log.append(res.stdout)
+    if res.returncode != 0:
+      raise RuntimeError("'%s' failed with exit code %d" % (command, res.returncode))
+    return res.stdout
+
+  # make_vars: variable assignments for this run on top of the runner's,
+  #   e.g. ['WOTS_W=4', 'SHA256XMSS=sha256XMSS']
+  def run(self, tb, make_vars = None):
+    make_vars = self.make_vars + list(make_vars or [])
+    start = time.time()
+    result = {'name': tb.name, 'status': 'error', 'cached': [], 'cycles': [], 'log': ''}
+    log = []
+    root = None
+    try:
+      (sim_key, gold_key, result_key, run_cmds) = self.plan(tb, make_vars)
+      cached = self.cache.get_result(result_key)
+      if cached is not None:
+        cached['cached'] = ['result']
+        cached['time'] = time.time() - start
+        return cached
+
+      root = tempfile.mkdtemp(prefix='regress-')
+      work = self.scratch(tb, root)
+
+      # test vectors
+      entry = self.cache.get('gold', gold_key)
+      if entry is not None:
+        restore_files(entry, work)
+        result['cached'].append('gold')
+      else:
+        before = set(os.listdir(work))
+        self._shell(work, ' '.join(['make', '-B', 'data.out'] + make_vars), log)
+        new = sorted(set(os.listdir(work)) - before)
+        self.cache.put_files('gold', gold_key, work, new)
+
+      # simulator
+      entry = self.cache.get('sim', sim_key)
+      if entry is not None:
+        restore_files(entry, work)
+        result['cached'].append('sim')
+      else:
+        self._shell(work, ' '.join(['make', '-B', tb.sim] + make_vars), log)
+        self.cache.put_files('sim', sim_key, work, [tb.sim])
+
+      output = ''
+      for command in run_cmds:
+        output += self._shell(work, command, log)
+      result['cycles'] = [int(c) for c in re.findall(r'runtime: (\d+) cycles', output)]
+
+      expected = os.path.join(work, 'data.out')
+      got = os.path.join(work, 'test.out')
+      if not os.path.exists(got):
+        raise RuntimeError("simulation wrote no test.out")
+      with open(expected) as f_exp, open(got) as f_got:
+        passed = f_exp.read().split() == f_got.read().split()
+      result['status'] = 'pass' if passed else 'fail'
+      result['log'] = '\n'.join(log)
+      self.cache.put_result(result_key, dict(result, cached=[]))
+    except (RuntimeError, OSError, subprocess.SubprocessError, ValueError) as e:
+      result['log'] = '\n'.join(log + [str(e)])
+    finally:
+      if root is not None:
+        if self.keep or result['status'] != 'pass':
+          result['scratch'] = root
+        else:
+          shutil.rmtree(root, ignore_errors=True)
+    result['time'] = time.time() - start
+    return result
+
+def format_result(res):
+  line = "%-5s %-45s" % (res['status'].upper(), res['name'])
+  if res['cycles']:
+    line += " %6d vectors %10d cycles" % (len(res['cycles']), sum(res['cycles']))
+  line += " %7.1fs" % res['time']
+  if res['cached']:
+    line += "  (cached %s)" % ', '.join(res['cached'])
+  return line
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Run the hw_core testbenches in parallel.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('patterns', type=str, nargs='*',
+            help='only run testbenches matching these globs or substrings, e.g. wots_no_store/l_tree')
+  parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=os.cpu_count(),
+            help='number of testbenches run at the same time')
+  parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=None,
+            help='test vectors per testbench (Makefile default if not given)')
+  parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, default=None,
+            help='seed of the test vectors (Makefile default if not given)')
+  parser.add_argument('--cache', dest='cache', type=str, required=False,
+            default=os.path.join(HW_CORE, '.regress_cache'),
+            help='cache folder')
+  parser.add_argument('--no-cache', dest='no_cache', action='store_true',
+            help='neither read nor write the cache')
+  parser.add_argument('--keep', dest='keep', action='store_true',
+            help='keep the scratch trees of passing testbenches too')
+  parser.add_argument('--timeout', dest='timeout', type=float, required=False, default=None,
+            help='timeout of one command in seconds')
+  parser.add_argument('--list', dest='list', action='store_true',
+            help='only list the testbenches')
+  parser.add_argument('--json', dest='json', type=str, required=False, default=None,
+            help='write all results to this file')
+
+  args = parser.parse_args()
+
+  tbs = find_testbenches(args.patterns)
+  if args.list:
+    for tb in tbs:
+      print(tb.name)
+    sys.exit(0)
+
+  make_vars = []
+  if args.vectors is not None:
+    make_vars.append('vectors=%d' % args.vectors)
+  if args.seed is not None:
+    make_vars.append('s=%d' % args.seed)
+
+  r = runner(regress_cache(args.cache, not args.no_cache), make_vars, args.keep, args.timeout)
+
+  start = time.time()
+  results = []
+  with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+    for res in pool.map(r.run, tbs):
+      results.append(res)
+      print(format_result(res))
+      if res['status'] != 'pass':
+        print('  ' + res['log'].strip().replace('\n', '\n  ')[-2000:])
+        if 'scratch' in res:
+          print('  scratch tree kept in %s' % res['scratch'])
+      sys.stdout.flush()
+
+  count = {}
+  for res in results:
+    count[res['status']] = count.get(res['status'], 0) + 1
+  cached = sum(1 for res in results if res['cached'] == ['result'])
+  print("%d passed, %d failed, %d errors (%d from cache) in %.1fs" % (
+    count.get('pass', 0), count.get('fail', 0), count.get('error', 0), cached, time.time() - start))
+
+  if args.json:
+    with open(args.json, 'w') as f:
+      json.dump(results, f, indent=1)
+
+  sys.exit(0 if count.get('pass', 0) == len(results) else 1)
@@ -0,0 +1,388 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Simulation farm for the xmss-reference test programs on the Murax targets.
+#
+# For every target (a <target>.mk of xmss-reference) the Verilator simulator of
+# its hardware variant (VARIANTS) is built once with
+#   make -C platforms/verilator_sim TARGET=<variant> [PRECOMP=yes] compile
+# and copied out of the shared obj_dir (so the builds run one at a time). Every
+# (target, program, seed) instance then gets its own firmware, built in a
+# scratch tree like regress.py does (xmss-reference copied as symlinks, the
+# other folders of src linked), with SEED=<seed> selecting the randombytes()
+# stream. The ELF file is turned into a $readmemh image of the on-chip RAM,
+# which the simulator preloads (+ram_hex, instead of loading it through
+# openocd and gdb), and the instances run on a thread pool without the JTAG
+# server (+jtag_port=0). The UART output of an instance (the stdout of the
+# simulator) is written to its log as it comes; the simulator ends the run on
+# the last line of the program (+marker, MARKERS, the firmware only idles
+# afterwards) instead of running out its cycle budget (+max_cycles). The
+# cycle counts the programs print are collected and averaged per target.
+#
+# --sim-build and --sim replace the make and simulator commands with templates
+# with the fields {target}, {proj}, {seed}, {firmware} (path of the ELF file),
+# {max_cycles} and {src} (the src folder). The x86 target needs no simulator,
+# its test program runs natively.
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import re
+import shlex
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from regress import HW_CORE, SRC
+
+XMSS_REFERENCE = os.path.join(SRC, 'xmss-reference')
+VERILATOR_SIM = os.path.join(os.path.dirname(SRC), 'platforms', 'verilator_sim')
+
+# hardware variant of every target: TARGET of platforms/verilator_sim (the
+# DE1-SoC project) and PRECOMP
+VARIANTS = {
+  'Murax': ('Murax', False),
+  'MuraxSHA256': ('MuraxSHA256', False),
+  'MuraxSHA256XMSS': ('MuraxSHA256XMSS', False),
+  'MuraxSHA256XMSS_precomp': ('MuraxSHA256XMSS', True),
+  'MuraxSHA256XMSSChain': ('MuraxChain', False),
+  'MuraxSHA256XMSSChain_precomp': ('MuraxChain', True),
+  'MuraxSHA256XMSSChainLeaf': ('MuraxLeaf', False),
+  'MuraxSHA256XMSSChainLeaf_precomp': ('MuraxLeaf', True),
+}
+
+# on-chip RAM of Murax (platforms/Murax, linker.ld of xmss-reference)
+RAM_BASE = 0x80000000
+RAM_SIZE = 128 * 1024
+
+# last line printed by every test program, a line containing it completes
+# the instance (also passed to the simulator as +marker)
+MARKERS = {
+  'xmss': 'cycles verify:',
+  'chain': 'cycles for chain:',
+  'leaf': 'cycles for leaf:',
+  'sha256xmss': 'sha256xmss msg=1024 bits, cycles =',
+}
+
+# printed by the simulator when it runs out of its cycle budget
+BUDGET = 'timeout'
+
+# "cycles key generation: N", " sha256xmss msg=768 bits, cycles = N", "cycles: N";
+# the indented per-iteration lines of test/xmss.c are not matched
+CYCLES = re.compile(r'^(?: ?sha256xmss (.+), )?cycles(?: ([a-z ]+))?\s*[:=]\s*(\d+)\s*$')
+
+def targets():
+  return sorted(os.path.basename(f)[:-3] for f in glob.glob(os.path.join(XMSS_REFERENCE, '*.mk')))
+
+def murax_targets():
+  return [t for t in targets() if t in VARIANTS]
+
+def projects():
+  return sorted(os.path.basename(f)[:-2] for f in glob.glob(os.path.join(XMSS_REFERENCE, 'test', '*.c')))
+
+class instance(object):
+  def __init__(self, target, proj, seed):
+    self.target = target
+    self.proj = proj
+    self.seed = seed
+    self.name = '%s/%s/s%d' % (target, proj, seed)
+
+# $readmemh image of the on-chip RAM, one 32-bit little-endian word per
+# line, from the PT_LOAD segments of a 32-bit ELF file
+def ram_image(elf, path):
+  with open(elf, 'rb') as f:
+    data = f.read()
+  if data[:4] != b'\x7fELF' or data[4] != 1 or data[5] != 1:
+    raise ValueError("%s is no 32-bit little-endian ELF file" % elf)
+  (phoff,) = struct.unpack_from('<I', data, 28)
+  (phentsize, phnum) = struct.unpack_from('<HH', data, 42)
+  ram = bytearray(RAM_SIZE)
+  end = 0
+  for i in range(phnum):
+    (p_type, p_offset, _, p_paddr, p_filesz, p_memsz) = struct.unpack_from('<6I', data, phoff + i * phentsize)
+    if p_type != 1 or p_memsz == 0:
+      continue
+    start = p_paddr - RAM_BASE
+    if start < 0 or start + p_memsz > RAM_SIZE:
+      raise ValueError("segment at 0x%08x (%d bytes) of %s is outside the on-chip RAM" % (p_paddr, p_memsz, elf))
+    ram[start:start + p_filesz] = data[p_offset:p_offset + p_filesz]
+    end = max(end, start + p_filesz)
+  with open(path, 'w') as f:
+    for addr in range(0, end, 4):
+      f.write('%08x\n' % struct.unpack_from('<I', ram, addr))
+  return path
+
+def parse_cycles(line):
+  m = CYCLES.match(line)
+  if m is None:
+    return None
+  return (m.group(1) or m.group(2) or 'cycles', int(m.group(3)))
+
+
+class farm(object):
+  def __init__(self, out, sim_build = None, sim = None, make_vars = None, max_cycles = 100000000,
+               timeout = None, marker = None, keep = False):
+    self.out = out
+    self.sim_build = sim_build
+    self.sim = sim
+    self.make_vars = make_vars or []
+    self.max_cycles = max_cycles
+    self.timeout = timeout
+    self.marker = marker
+    self.keep = keep
+    # the variants share obj_dir and the generated SoC of platforms/verilator_sim
+    self.sim_lock = threading.Lock()
+    self.simulators = {}
+
+  def fields(self, inst = None, target = None, firmware = ''):
+    if inst is not None:
+      target = inst.target
+    return {'target': target, 'proj': inst.proj if inst else '', 'seed': inst.seed if inst else 0,
+            'firmware': firmware, 'max_cycles': self.max_cycles, 'src': SRC}
+
+  def _shell(self, command, cwd, log):
+    res = subprocess.run(command, shell=True, cwd=cwd, stdout=subprocess.PIPE,
+                         stderr=subprocess.STDOUT, universal_newlines=True)
+    log.append('$ ' + command)
+    log.append(res.stdout)
+    if res.returncode != 0:
+      raise RuntimeError("'%s' failed with exit code %d" % (command, res.returncode))
+
+  # one simulator per target, returns the build log
+  def build_simulator(self, target):
+    log = []
+    if target == 'x86' or (self.sim is not None and self.sim_build is None):
+      pass
+    elif self.sim_build is not None:
+      self._shell(self.sim_build.format(**self.fields(target = target)), SRC, log)
+    else:
+      (variant, precomp) = VARIANTS[target]
+      top = 'Murax' if variant == 'Murax' else 'MuraxHW'
+      make = ['make', '-C', VERILATOR_SIM, 'TARGET=%s' % variant, 'TARGET_HW=%s' % top]
+      if precomp:
+        make.append('PRECOMP=yes')
+      folder = os.path.join(self.out, 'sim', variant + ('_precomp' if precomp else ''))
+      os.makedirs(folder, exist_ok=True)
+      with self.sim_lock:
+        try:
+          self._shell(' '.join(make + ['compile']), SRC, log)
+        except RuntimeError as e:
+          raise RuntimeError('\n'.join([str(e)] + log[-1:]))
+        self.simulators[target] = shutil.copy(os.path.join(VERILATOR_SIM, 'obj_dir', 'V' + top), folder)
+    return '\n'.join(log)
+
+  # scratch copy of src: xmss-reference as symlinks, everything else linked
+  def scratch(self):
+    root = tempfile.mkdtemp(prefix='farm-')
+    for name in os.listdir(SRC):
+      if name == 'xmss-reference':
+        shutil.copytree(XMSS_REFERENCE, os.path.join(root, name), copy_function=os.symlink)
+      else:
+        os.symlink(os.path.join(SRC, name), os.path.join(root, name))
+    return root
+
+  def build_firmware(self, inst, log):
+    root = self.scratch()
+    try:
+      work = os.path.join(root, 'xmss-reference')
+      make = ['make', 'TARGET=%s' % inst.target, 'PROJ=%s' % inst.proj, 'SEED=%d' % inst.seed]
+      if inst.target != 'x86':
+        make.append('SIM=yes')
+      self._shell(' '.join(make + self.make_vars), work, log)
+      folder = os.path.join(self.out, inst.target)
+      os.makedirs(folder, exist_ok=True)
+      firmware = os.path.join(folder, '%s_s%d' % (inst.proj, inst.seed))
+      shutil.copy(os.path.join(work, 'test', '%s_%s' % (inst.target, inst.proj)), firmware)
+      if inst.target != 'x86' and self.sim is None:
+        ram_image(firmware, firmware + '.hex')
+      return firmware
+    finally:
+      if not self.keep:
+        shutil.rmtree(root, ignore_errors=True)
+
+  def marker_of(self, inst):
+    return self.marker or MARKERS.get(inst.proj)
+
+  def command(self, inst, firmware):
+    if inst.target == 'x86':
+      return firmware
+    if self.sim is not None:
+      return self.sim.format(**self.fields(inst, firmware = firmware))
+    command = [self.simulators[inst.target], '+ram_hex=' + firmware + '.hex', '+jtag_port=0',
+               '+max_cycles=%d' % self.max_cycles]
+    if self.marker_of(inst):
+      command.append('+marker=' + self.marker_of(inst))
+    # stdin closed, the UART of the SoC gets no input
+    return ' '.join(shlex.quote(c) for c in command) + ' < /dev/null'
+
+  # run one instance, stop it at the marker of its program
+  def run(self, inst, sim_ready):
+    start = time.time()
+    result = {'name': inst.name, 'target': inst.target, 'proj': inst.proj, 'seed': inst.seed,
+              'status': 'error', 'cycles': {}, 'log': ''}
+    log = []
+    try:
+      sim_ready.result()
+      firmware = self.build_firmware(inst, log)
+      command = self.command(inst, firmware)
+      marker = self.marker_of(inst)
+      log.append('$ ' + command)
+      uart = firmware + '.uart'
+      result['uart'] = uart
+
+      # in its own process group, so the simulator goes down with the shell
+      proc = subprocess.Popen(command, shell=True, cwd=os.path.dirname(firmware), stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, universal_newlines=True, start_new_session=True)
+      def stop():
+        try:
+          os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+          pass
+      timer = threading.Timer(self.timeout, stop) if self.timeout else None
+      if timer is not None:
+        timer.start()
+      seen = False
+      budget = False
+      with open(uart, 'w') as f:
+        for line in proc.stdout:
+          f.write(line)
+          parsed = parse_cycles(line)
+          if parsed is not None:
+            result['cycles'][parsed[0]] = parsed[1]
+          if marker is not None and marker in line:
+            seen = True
+            break
+          budget = budget or line.strip() == BUDGET
+      if seen:
+        stop()
+      code = proc.wait()
+      proc.stdout.close()
+      timed_out = timer is not None and not timer.is_alive() and not seen
+      if timer is not None:
+        timer.cancel()
+
+      if seen:
+        result['status'] = 'done'
+      elif timed_out:
+        result['status'] = 'timeout'
+      elif budget:
+        result['status'] = 'timeout'
+        log.append("cycle budget of %d cycles used up" % self.max_cycles)
+      elif code == 0 and (marker is None or inst.target == 'x86'):
+        # only the SoC programs print their cycles, and the SoC never exits
+        result['status'] = 'done'
+      else:
+        result['status'] = 'fail'
+        log.append("exit code %d without the completion marker" % code)
+    except (RuntimeError, OSError, subprocess.SubprocessError, KeyError, IndexError, ValueError) as e:
+      log.append(str(e))
+    result['log'] = '\n'.join(log)
+    result['time'] = time.time() - start
+    return result
+
+def format_result(res):
+  line = "%-7s %-50s" % (res['status'].upper(), res['name'])
+  line += ''.join(" %s=%d" % item for item in res['cycles'].items())
+  return line + " %7.1fs" % res['time']
+
+# mean, min and max of every cycle count per (target, program)
+def aggregate(results):
+  table = {}
+  for res in results:
+    if res['status'] != 'done':
+      continue
+    for (label, cycles) in res['cycles'].items():
+      table.setdefault((res['target'], res['proj'], label), []).append(cycles)
+  return [(key, len(v), sum(v) / len(v), min(v), max(v)) for (key, v) in sorted(table.items())]
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Build and run the xmss-reference test programs on many simulated Murax SoCs in parallel.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--targets', dest='targets', type=str, nargs='+', default=murax_targets(),
+            choices=targets(), help='targets of xmss-reference')
+  parser.add_argument('--projects', dest='projects', type=str, nargs='+', default=['xmss'],
+            choices=projects(), help='test programs of xmss-reference')
+  parser.add_argument('-s', '--seeds', dest='seeds', type=int, nargs='+', default=[0],
+            help='randombytes() seeds, one instance per target, program and seed')
+  parser.add_argument('--sim-build', dest='sim_build', type=str, required=False, default=None,
+            help='command building the simulator of a target instead of make -C platforms/verilator_sim, run once per target in src')
+  parser.add_argument('--sim', dest='sim', type=str, required=False, default=None,
+            help='command simulating one firmware instead of the verilator_sim simulator, its stdout is the UART output')
+  parser.add_argument('--max-cycles', dest='max_cycles', type=int, required=False, default=100000000,
+            help='cycle budget of one simulation (+max_cycles, {max_cycles}), 0 for none')
+  parser.add_argument('--marker', dest='marker', type=str, required=False, default=None,
+            help='completion marker text, overriding the one of the program')
+  parser.add_argument('--make', dest='make_vars', type=str, nargs='*', default=[],
+            help='extra variables of the firmware build, e.g. XMSS_SIGNATURES=4')
+  parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=os.cpu_count(),
+            help='number of builds and simulations run at the same time')
+  parser.add_argument('--timeout', dest='timeout', type=float, required=False, default=None,
+            help='wall-clock limit of one simulation in seconds')
+  parser.add_argument('--out', dest='out', type=str, required=False,
+            default=os.path.join(HW_CORE, 'farm_logs'),
+            help='folder for the firmware and the UART logs')
+  parser.add_argument('--keep', dest='keep', action='store_true',
+            help='keep the scratch trees of the firmware builds')
+  parser.add_argument('--json', dest='json', type=str, required=False, default=None,
+            help='write all results to this file')
+
+  args = parser.parse_args()
+
+  f = farm(os.path.abspath(args.out), args.sim_build, args.sim, args.make_vars, args.max_cycles,
+           args.timeout, args.marker, args.keep)
+  instances = [instance(t, p, s) for t in args.targets for p in args.projects for s in args.seeds]
+
+  start = time.time()
+  results = []
+  with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+    # the simulator builds are queued first, so the instances waiting for
+    # them never hold all workers
+    sims = dict((t, pool.submit(f.build_simulator, t)) for t in args.targets)
+    futures = [pool.submit(f.run, inst, sims[inst.target]) for inst in instances]
+    for future in concurrent.futures.as_completed(futures):
+      res = future.result()
+      results.append(res)
+      print(format_result(res))
+      if res['status'] != 'done':
+        print('  ' + res['log'].strip().replace('\n', '\n  ')[-2000:])
+      sys.stdout.flush()
+  wall = time.time() - start
+
+  print()
+  print("%-34s %-10s %-44s %4s %14s %14s %14s" % ('target', 'program', 'cycles', 'runs', 'mean', 'min', 'max'))
+  for ((target, proj, label), num, mean, low, high) in aggregate(results):
+    print("%-34s %-10s %-44s %4d %14.0f %14d %14d" % (target, proj, label, num, mean, low, high))
+
+  done = sum(1 for res in results if res['status'] == 'done')
+  busy = sum(res['time'] for res in results)
+  print("%d of %d instances done in %.1fs (%.1fs of instance time, %.1fx)" % (
+    done, len(results), wall, busy, busy / wall if wall else 0))
+
+  if args.json:
+    with open(args.json, 'w') as fp:
+      json.dump(results, fp, indent=1)
+
+  sys.exit(0 if done == len(results) else 1)
@@ -3,7 +3,8 @@ module mem_dual
   parameter WIDTH = 8,
   parameter DEPTH = 64,
   parameter FILE = "",
-  parameter INIT = 0
+  parameter INIT = 0,
+  parameter HEX = 0
 )
 (
   input  wire                 clock,
@@ -25,9 +26,12 @@ module mem_dual
 
   initial
     begin
-      // read file contents if FILE is given
+      // read file contents if FILE is given, HEX selects $readmemh
       if (FILE != "")
-        $readmemb(FILE, mem);
+        if (HEX)
+          $readmemh(FILE, mem);
+        else
+          $readmemb(FILE, mem);
 
       // set all data to 0 if INIT is true
       if (INIT)
@@ -16,12 +16,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+# the arbiter is only needed by main with more than one lane
+ARBITER_SRC = $(if $(filter-out 1,$(LANES)),$(SRC)/sha256XMSS_arbiter.v)
+
 gen: $(SRC)/main.v gen_cp
 
-gen_cp: $(SRC)/clog2.v $(SRC)/delay.v $(SRC)/mem_dual.v $(SRC)/gen_leaf.v $(SRC)/thash_h.v $(SRC)/gen_pk.v $(SRC)/l_tree.v $(SRC)/gen_chain.v $(SRC)/seed_expand.v $(SRC)/thash_f.v $(SRC)/sha256XMSSprecomp.v $(SRC)/sha256.v
+gen_cp: $(SRC)/clog2.v $(SRC)/delay.v $(SRC)/mem_dual.v $(SRC)/gen_leaf.v $(SRC)/thash_h.v $(SRC)/gen_pk.v $(SRC)/l_tree.v $(SRC)/gen_chain.v $(SRC)/seed_expand.v $(SRC)/thash_f.v $(SHA256XMSS_SRC) $(ARBITER_SRC) $(SRC)/sha256.v
 
 $(SRC)/main.v: ../gen_main.py
-	python ../gen_main.py -w $(WOTS_W) -l $(WOTS_LEN) -k $(KEY_LEN) > $(SRC)/main.v
+	python3 ../gen_main.py -w $(WOTS_W) -l $(WOTS_LEN) -k $(KEY_LEN) -c $(LANES) -m $(CORES) > $(SRC)/main.v
 
 $(SRC)/clog2.v: ../../../util/clog2.v
 	cp ../../../util/clog2.v $(SRC)/
@@ -56,6 +59,15 @@ $(SRC)/thash_f.v: ../../thash_f/thash_f.v
 $(SRC)/sha256XMSSprecomp.v: ../../../hash/sha256XMSSprecomp.v
 	cp ../../../hash/sha256XMSSprecomp.v $(SRC)/
 
+$(SRC)/sha256XMSS.v: ../../../hash/sha256XMSS.v
+	cp ../../../hash/sha256XMSS.v $(SRC)/
+
+$(SRC)/sha256XMSS_core.v: ../../../hash/sha256XMSS_core.v
+	cp ../../../hash/sha256XMSS_core.v $(SRC)/
+
+$(SRC)/sha256XMSS_arbiter.v: ../../../hash/sha256XMSS_arbiter.v
+	cp ../../../hash/sha256XMSS_arbiter.v $(SRC)/
+
 $(SRC)/sha256.v: ../../../hash/sha256.v
 	cp ../../../hash/sha256.v $(SRC)/
 
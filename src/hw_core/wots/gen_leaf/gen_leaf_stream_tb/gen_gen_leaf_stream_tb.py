@@ -0,0 +1,202 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu> 
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+
+import argparse
+
+parser = argparse.ArgumentParser(description='Generate the throughput testbench of main.',
+                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+ 
+parser.add_argument('-k', dest='key_len', type=int, required= False, default=256,
+          help='key_len')
+parser.add_argument('-c', '--lanes', dest='lanes', type=int, required=False, default=1,
+          help='number of lanes of main')
+parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=16,
+          help='maximum number of leaf jobs read from data.in')
+ 
+args = parser.parse_args()
+  
+KEY_LEN = args.key_len
+
+LANES = args.lanes
+
+JOBS = args.jobs
+
+# The leaf jobs of data.in are issued back to back: after a single reset, a job
+# is started on every idle lane as soon as its previous leaf is done. Inputs
+# are applied and outputs sampled on the falling clock edge. The leaves are
+# written in job order, the latency of every job and the throughput of the
+# whole stream go to STDERR.
+print('''
+
+`timescale 1ns / 1ps
+
+module gen_leaf_stream_tb;
+  
+  // inputs
+  reg clk = 1'b0;
+  reg [{LANES}-1:0] start = 0;
+  reg reset = 1'b0;
+  reg [{LANES}*{KEY_LEN}-1:0] sec_seed = 0;
+  reg [{KEY_LEN}-1:0] pub_seed = 0;
+  reg [{LANES}*256-1:0] hash_addr = 0;
+  
+  // outputs
+  wire [{LANES}*{KEY_LEN}-1:0] leaf_out;
+  wire [{LANES}-1:0] done;
+  
+  main DUT (
+    .clk(clk),
+    .start(start),
+    .reset(reset),
+    .sec_seed(sec_seed),
+    .pub_seed(pub_seed),
+    .hash_addr(hash_addr),
+    .leaf_out(leaf_out),
+    .done(done) 
+  );
+   
+  integer STDERR = 32'h8000_0002;
+  integer STDIN  = 32'h8000_0000;
+  
+  initial
+    begin
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("gen_leaf_stream_tb.vcd");
+          $dumpvars(0, gen_leaf_stream_tb);
+        end
+    end
+  
+  integer cycle = 0;
+  
+  always @(posedge clk)
+    cycle <= cycle + 1;
+  
+  integer i;
+  integer f;
+  integer have_job;
+  integer jobs_issued;
+  integer jobs_done;
+  integer first_start;
+  integer last_done;
+  integer latency;
+  integer min_latency;
+  integer max_latency;
+  integer total_latency;
+  reg [{KEY_LEN}-1:0] sec_seed_in;
+  reg [{KEY_LEN}-1:0] pub_seed_in;
+  reg [255:0] hash_addr_in;
+  reg [{LANES}-1:0] lane_busy;
+  integer lane_job [0:{LANES}-1];
+  integer job_start [0:{JOBS}-1];
+  reg [{KEY_LEN}-1:0] leaves [0:{JOBS}-1];
+  
+  // next job of data.in, if any
+  task read_job;
+    begin
+      have_job = 0;
+      if (jobs_issued < {JOBS})
+        if ($fscanf(STDIN, "%h\\n", sec_seed_in) == 1)
+          begin
+            have_job = $fscanf(STDIN, "%h\\n", pub_seed_in);
+            have_job = $fscanf(STDIN, "%h\\n", hash_addr_in);
+          end
+    end
+  endtask
+  
+  initial
+    begin
+      f = $fopen("test.out", "w");
+      jobs_issued = 0;
+      jobs_done = 0;
+      first_start = 0;
+      last_done = 0;
+      min_latency = 0;
+      max_latency = 0;
+      total_latency = 0;
+      lane_busy = 0;
+      read_job;
+      
+      # 10;
+      reset <= 1'b1;
+      # 10;
+      reset <= 1'b0;
+      # 25;
+      
+      while (have_job || (lane_busy != 0))
+        begin
+          @(negedge clk);
+          start = 0;
+          
+          // collect the finished leaves, done is one clock high
+          for (i = 0; i < {LANES}; i = i + 1)
+            if (lane_busy[i] && done[i])
+              begin
+                lane_busy[i] = 1'b0;
+                leaves[lane_job[i]] = leaf_out[i*{KEY_LEN} +: {KEY_LEN}];
+                latency = cycle - job_start[lane_job[i]];
+                $fdisplay(STDERR, "runtime: %0d cycles, job %0d on lane %0d", latency, lane_job[i], i);
+                if ((jobs_done == 0) || (latency < min_latency))
+                  min_latency = latency;
+                if ((jobs_done == 0) || (latency > max_latency))
+                  max_latency = latency;
+                total_latency = total_latency + latency;
+                jobs_done = jobs_done + 1;
+                last_done = cycle;
+              end
+          
+          // start the next jobs on the idle lanes, the lanes share pub_seed
+          for (i = 0; i < {LANES}; i = i + 1)
+            if (!lane_busy[i] && have_job)
+              begin
+                if (jobs_issued == 0)
+                  first_start = cycle;
+                start[i] = 1'b1;
+                sec_seed[i*{KEY_LEN} +: {KEY_LEN}] = sec_seed_in;
+                pub_seed = pub_seed_in;
+                hash_addr[i*256 +: 256] = hash_addr_in;
+                lane_busy[i] = 1'b1;
+                lane_job[i] = jobs_issued;
+                job_start[jobs_issued] = cycle;
+                jobs_issued = jobs_issued + 1;
+                read_job;
+              end
+        end
+      
+      // write output data in job order
+      for (i = 0; i < jobs_done; i = i + 1)
+        $fwrite(f, "%x\\n", leaves[i]);
+      
+      if (jobs_done > 0)
+        begin
+          $fdisplay(STDERR, "\\n%0d leaves on %0d lanes in %0d cycles", jobs_done, {LANES}, last_done - first_start);
+          $fdisplay(STDERR, "latency: %0d min, %0d avg, %0d max cycles", min_latency, total_latency / jobs_done, max_latency);
+          $fdisplay(STDERR, "throughput: %0.4f leaves per kilocycle\\n", 1000.0 * jobs_done / (last_done - first_start));
+        end
+      
+      $fclose(f);
+      $finish;
+    end
+  
+  always
+    #5 clk = !clk;
+  
+endmodule
+'''.format(KEY_LEN=KEY_LEN, LANES=LANES, JOBS=JOBS))
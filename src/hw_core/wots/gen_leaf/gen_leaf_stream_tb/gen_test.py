@@ -0,0 +1,80 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu> 
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import random
+
+sys.path.insert(0, "../../../..")
+
+from ref_python.xmss_leaf import iter_leaves_raw, leaf_addrs
+from ref_python.hash_function import addr_to_raw
+from ref_python.vector_io import vector_writer
+ 
+
+import argparse
+
+parser = argparse.ArgumentParser(description='Generate a stream of leaf jobs of one XMSS tree.',
+                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('-w', '--wots_w', dest='wots_w', type=int, required=True, default=0,
+          help='wots_w')
+parser.add_argument('-n', '--wots_len', dest='wots_len', type=int, required=True, default=0,
+          help='wots_len')
+parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, default=None,
+          help='seed')
+parser.add_argument('-l', '--key_len', dest='key_len', type=int, required=True, default=None,
+          help='key length')
+parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=1,
+          help='number of leaf jobs')
+parser.add_argument('-i', '--index', dest='index', type=int, required=False, default=0,
+          help='OTS address of the first job')
+parser.add_argument('-p', '--processes', dest='processes', type=int, required=False, default=None,
+          help='processes computing the leaves (default: all cpus)')
+
+args = parser.parse_args()
+
+key_len = args.key_len
+
+if args.seed:
+  random.seed(args.seed)
+
+# one secret seed, public seed and subtree (layer and tree address) for all
+# jobs, job j computes the leaf at OTS address index + j
+sk_seed = bytes(random.randint(0, 255) for i in range(key_len//8))
+pub_seed = bytes(random.randint(0, 255) for i in range(key_len//8))
+subtree_addr = [random.randint(0, 2**32-1) for i in range(3)]
+
+in_fields = [("sec_seed", key_len//8), ("pub_seed", key_len//8), ("hash_addr", 32)]
+out_fields = [("leaf_out", 32)]
+
+f_in = vector_writer("data.in", in_fields, "memh")
+f_out = vector_writer("data.out", out_fields, "memh")
+
+# the WOTS seed of every leaf is the sec_seed input of gen_leaf
+leaves = iter_leaves_raw(sk_seed, pub_seed, args.index, args.index + args.vectors, subtree_addr,
+                         processes = args.processes, w = args.wots_w, w_len = args.wots_len)
+
+for (j, (seed, leaf)) in enumerate(leaves):
+  (ltree_addr, ots_addr) = leaf_addrs(args.index + j, subtree_addr)
+
+  print(leaf.hex())
+
+  f_in.write(seed, pub_seed, addr_to_raw(ots_addr))
+  f_out.write(leaf)
+
+f_in.close()
+f_out.close()
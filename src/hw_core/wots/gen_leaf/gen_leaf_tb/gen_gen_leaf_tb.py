@@ -25,12 +25,17 @@ parser = argparse.ArgumentParser(description='Generate toplevel main module.',
  
 parser.add_argument('-k', dest='key_len', type=int, required= False, default=256,
           help='key_len')
+parser.add_argument('-c', '--lanes', dest='lanes', type=int, required=False, default=1,
+          help='number of lanes of main')
  
 args = parser.parse_args()
   
 KEY_LEN = args.key_len
 
-print '''
+LANES = args.lanes
+
+if LANES == 1:
+  print('''
 
 `timescale 1ns / 1ps
 
@@ -59,82 +64,183 @@ module gen_leaf_tb;
     .done(done) 
   );
    
+  integer STDERR = 32'h8000_0002;
+  integer STDIN  = 32'h8000_0000;
+  
   initial
     begin
-      $dumpfile("gen_leaf_tb.vcd");
-      $dumpvars(0, gen_leaf_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("gen_leaf_tb.vcd");
+          $dumpvars(0, gen_leaf_tb);
+        end
     end
   
+  integer scan_file;
+  integer start_time;
+  integer end_time;
+  integer i;
+  integer f;
+  integer num_vectors;
+  integer total_cycles;
+  
+  // run the vectors of data.in one after the other until the file is exhausted
+  initial
+    begin
+      f = $fopen("test.out", "w");
+      num_vectors = 0;
+      total_cycles = 0;
+      while ($fscanf(STDIN, "%h\\n", sec_seed) == 1)
+        begin
+          scan_file = $fscanf(STDIN, "%h\\n", pub_seed);
+          scan_file = $fscanf(STDIN, "%h\\n", hash_addr);
+          # 10;
+          reset <= 1'b1;
+          # 10;
+          reset <= 1'b0;
+          # 25;
+          start <= 1'b1;
+          start_time <= $time;
+          # 10;
+          start <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\\nruntime: %0d cycles\\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          $fwrite(f, "%x\\n", leaf_out);
+          # 1000;
+        end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\\n", num_vectors, total_cycles);
+      
+      $fclose(f);
+      $finish;
+    end
+  
+  always
+    #5 clk = !clk;
+  
+endmodule
+'''.format(KEY_LEN=KEY_LEN))
+
+else:
+  # data.in holds LANES records per group, one for each lane, all with the same
+  # public seed; the lanes of a group are started together and the leaves are
+  # written in lane order
+  print('''
+
+`timescale 1ns / 1ps
+
+module gen_leaf_tb;
+  
+  // inputs
+  reg clk = 1'b0;
+  reg [{LANES}-1:0] start = 0;
+  reg reset = 1'b0;
+  reg [{LANES}*{KEY_LEN}-1:0] sec_seed = 0;
+  reg [{KEY_LEN}-1:0] pub_seed = 0;
+  reg [{LANES}*256-1:0] hash_addr = 0;
+  
+  // outputs
+  wire [{LANES}*{KEY_LEN}-1:0] leaf_out;
+  wire [{LANES}-1:0] done;
+  
+  main DUT (
+    .clk(clk),
+    .start(start),
+    .reset(reset),
+    .sec_seed(sec_seed),
+    .pub_seed(pub_seed),
+    .hash_addr(hash_addr),
+    .leaf_out(leaf_out),
+    .done(done) 
+  );
+   
+  integer STDERR = 32'h8000_0002;
+  integer STDIN  = 32'h8000_0000;
   
   initial
     begin
-	  sec_seed  <= 256'h1c349f208e70b458958c754e2adc32f1828f5c7379e39b8239f972a0d05eeb5f;
-	  pub_seed  <= 256'h2072a1a266f236c93b46dfa9ce868e792981d0d0a047817446cb7c58698fd233;
-	  hash_addr <= 256'h0000000000000000000000000000000000000001000000000000000000000000;
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("gen_leaf_tb.vcd");
+          $dumpvars(0, gen_leaf_tb);
+        end
     end
   
+  integer scan_file;
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
+  reg [{KEY_LEN}-1:0] sec_seed_in;
+  reg [255:0] hash_addr_in;
+  reg [{LANES}-1:0] done_seen;
+  reg [{LANES}*{KEY_LEN}-1:0] leaves;
   
+  // run the groups of data.in one after the other until the file is exhausted
   initial
     begin
-      # 10;
-      reset <= 1'b1;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      $display("\\nruntime: %0d cycles\\n", (end_time-start_time)/10);
-      
-      // write output data
       f = $fopen("test.out", "w");
-       
-      $fwrite(f, "%x\\n", leaf_out);
-       
-      # 1000;
+      num_vectors = 0;
+      total_cycles = 0;
+      while ($fscanf(STDIN, "%h\\n", sec_seed_in) == 1)
+        begin
+          for (i = 0; i < {LANES}; i = i + 1)
+            begin
+              if (i > 0)
+                scan_file = $fscanf(STDIN, "%h\\n", sec_seed_in);
+              scan_file = $fscanf(STDIN, "%h\\n", pub_seed);
+              scan_file = $fscanf(STDIN, "%h\\n", hash_addr_in);
+              sec_seed[i*{KEY_LEN} +: {KEY_LEN}] = sec_seed_in;
+              hash_addr[i*256 +: 256] = hash_addr_in;
+            end
+          # 10;
+          reset <= 1'b1;
+          # 10;
+          reset <= 1'b0;
+          # 25;
+          start <= {{{LANES}{{1'b1}}}};
+          start_time <= $time;
+          # 10;
+          start <= 0;
+          
+          // done of every lane is one clock high, the leaf is taken with it
+          done_seen = 0;
+          while (done_seen != {{{LANES}{{1'b1}}}})
+            begin
+              @(posedge clk);
+              for (i = 0; i < {LANES}; i = i + 1)
+                if (done[i] && !done_seen[i])
+                  begin
+                    done_seen[i] = 1'b1;
+                    leaves[i*{KEY_LEN} +: {KEY_LEN}] = leaf_out[i*{KEY_LEN} +: {KEY_LEN}];
+                  end
+            end
+          end_time = $time;
+          $fdisplay(STDERR, "\\nruntime: %0d cycles for %0d leaves\\n", (end_time-start_time)/10, {LANES});
+          num_vectors = num_vectors + {LANES};
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          for (i = 0; i < {LANES}; i = i + 1)
+            $fwrite(f, "%x\\n", leaves[i*{KEY_LEN} +: {KEY_LEN}]);
+          # 1000;
+        end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\\n", num_vectors, total_cycles);
       
       $fclose(f);
-      
-      // start over!
-      
-      # 10;
-      reset <= 1'b1;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      $display("\\nruntime: %0d cycles\\n", (end_time-start_time)/10);
-      
-      // write output data
-      f = $fopen("test_2.out", "w");
-       
-      $fwrite(f, "%x\\n", leaf_out);
-       
-      # 1000;
-      
-      $fclose(f);
-       
       $finish;
-      
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-'''.format(KEY_LEN=KEY_LEN)
+'''.format(KEY_LEN=KEY_LEN, LANES=LANES))
  
@@ -19,12 +19,12 @@
 import sys
 import random
 
-sys.path.insert(0, "../../../../ref_python")
+sys.path.insert(0, "../../../..")
 
-from hash import *
-from utils import *
-from hash_address import *
-from wots_function import *
+from ref_python.wots_batch import wots_pkgen_many_raw
+from ref_python.ltree_buffer import ltree_engine, l_tree_buffered
+from ref_python.hash_function import addr_to_raw
+from ref_python.vector_io import vector_writer
  
 
 import argparse
@@ -39,6 +39,12 @@ parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, defau
           help='seed')
 parser.add_argument('-l', '--key_len', dest='key_len', type=int, required=True, default=None,
           help='key length')
+parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=1,
+          help='number of test vectors')
+parser.add_argument('-c', '--lanes', dest='lanes', type=int, required=False, default=1,
+          help='number of lanes of main, each vector is a group of this many leaves with the same public seed')
+parser.add_argument('-b', '--bin', dest='bin', type=str, required=False, default=None,
+          help='also write inputs and expected outputs to this binary vector file')
 
 args = parser.parse_args()
 
@@ -48,51 +54,70 @@ key_len = args.key_len
 
 if args.seed:
   random.seed(args.seed)
-  
-f = open("data.in", "w")
- 
-sec_key = "1c349f208e70b458958c754e2adc32f1828f5c7379e39b8239f972a0d05eeb5f"
-pub_key = "2072a1a266f236c93b46dfa9ce868e792981d0d0a047817446cb7c58698fd233"
-pk_addr = []
-l_tree_addr = []
-
-for i in range(8):
-	pk_addr.append(0)
-	l_tree_addr.append(0) 
-pk_addr[4] = 1
-l_tree_addr[4] = 1
-
-f.write("\n")
-f.close()
- 
-# computation  
-# compute public keys
-pk_addr[3] = 0
-(pk, addr_pk) = wots_pkgen(wots_w, wots_len, sec_key, pub_key, pk_addr)
-
-f = open("pk_data.out", "w")
-for i in range(wots_len):
-  f.write("{0:0256b}".format(int(pk[i], 16)))
-  f.write('\n')
-f.close()
-
- 
-# compute l_tree  
-pk_l_tree = []
-
-for i in range(wots_len):
-  pk_l_tree.append(pk[i])
-
-l_tree_addr[3] = 1
-leaf = l_tree(pk_l_tree, pub_key, l_tree_addr)
-
-print "{0:064x}".format(int(leaf, 16))
- 
-# write results back
-f = open("data.out", "w")
-f.write("{0:064x}".format(int(leaf, 16)))
-f.write('\n')
-f.close()
-
 
-  
+in_fields = [("sec_seed", key_len//8), ("pub_seed", key_len//8), ("hash_addr", 32)]
+pk_fields = [("pk", 32, wots_len)]
+out_fields = [("leaf_out", 32)]
+
+f_in = vector_writer("data.in", in_fields, "memh")
+f_pk = vector_writer("pk_data.out", pk_fields, "memh")
+f_out = vector_writer("data.out", out_fields, "memh")
+f_bin = vector_writer(args.bin, in_fields + pk_fields + out_fields, "bin") if args.bin else None
+
+engine = ltree_engine(wots_len)
+
+vectors = []
+for v in range(args.vectors * args.lanes):
+  # generate random input secret key
+  sec_key = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    sec_key += ("{0:02x}".format(randbyte))
+
+  # generate random input public key, the lanes of a group share it
+  if v % args.lanes == 0:
+    pub_key = ""
+    for i in range(key_len//8):
+      randbyte = random.randint(0, 255)
+      pub_key += ("{0:02x}".format(randbyte))
+
+  # generate random addr array
+  # addr hex str = addr[0] + addr[1] + ... + addr[7]
+  addr = []
+  for i in range(8):
+    randint = random.randint(0, 2**32-1)
+    addr.append(randint)
+
+  # layer, tree and OTS address are random, the remaining words start at 0;
+  # gen_leaf only switches the type word between gen_pk and l_tree
+  pk_addr = addr[0:3] + [0, addr[4], 0, 0, 0]
+  l_tree_addr = addr[0:3] + [1, addr[4], 0, 0, 0]
+
+  vectors.append((sec_key, pub_key, pk_addr, l_tree_addr))
+
+# computation
+# compute public keys, the chains of all vectors in one batch
+pks = wots_pkgen_many_raw(wots_w, wots_len, [bytes.fromhex(x[0]) for x in vectors],
+                          [bytes.fromhex(x[1]) for x in vectors], [x[2] for x in vectors])
+
+for ((sec_key, pub_key, pk_addr, l_tree_addr), pk) in zip(vectors, pks):
+  inputs = [sec_key, pub_key, addr_to_raw(pk_addr)]
+  pk = [x.hex() for x in pk]
+
+  # compute l_tree
+  leaf = l_tree_buffered(pk, pub_key, l_tree_addr, engine)
+
+  print("{0:064x}".format(int(leaf, 16)))
+
+  # write results back
+  f_in.write(*inputs)
+  f_pk.write(pk)
+  f_out.write(leaf)
+  if f_bin:
+    f_bin.write(*(inputs + [pk, leaf]))
+
+f_in.close()
+f_pk.close()
+f_out.close()
+if f_bin:
+  f_bin.close()
@@ -28,17 +28,29 @@ parser.add_argument('-l', '--wots_len', dest='wots_len', type=int, default=40, r
           help='wots length')
 parser.add_argument('-k', dest='key_len', type=int, required= False, default=256,
           help='key_len')
+parser.add_argument('-c', '--lanes', dest='lanes', type=int, required=False, default=1,
+          help='number of gen_leaf/gen_chain lanes computing leaves in parallel')
+parser.add_argument('-m', '--cores', dest='cores', type=int, required=False, default=1,
+          help='number of sha256XMSS cores shared by the lanes')
  
 args = parser.parse_args()
 
+if args.lanes < 1 or args.cores < 1 or args.cores > args.lanes:
+  parser.error("need 1 <= cores <= lanes, a lane has at most one hash in flight")
+
 WOTS_W = args.wots_w
 
 WOTS_LEN = args.wots_len
 
 KEY_LEN = args.key_len
 
+LANES = args.lanes
+
+CORES = args.cores
+
  
-print """module main
+if LANES == 1:
+  print("""module main
 #(
   parameter WOTS_W = {WOTS_W},
   parameter WOTS_LEN = {WOTS_LEN},
@@ -197,5 +209,212 @@ gen_leaf #(.WOTS_W(WOTS_W), .WOTS_LEN(WOTS_LEN), .XMSS_HASH_PADDING_H(XMSS_HASH_
   );
 
 endmodule
-""".format(WOTS_W=WOTS_W, WOTS_LEN=WOTS_LEN, KEY_LEN=KEY_LEN)
+""".format(WOTS_W=WOTS_W, WOTS_LEN=WOTS_LEN, KEY_LEN=KEY_LEN))
+
+else:
+  # LANES copies of gen_leaf and gen_chain, each computing its own leaf, share
+  # CORES sha256XMSS cores through sha256XMSS_arbiter
+  print("""module main
+#(
+  parameter WOTS_W = {WOTS_W},
+  parameter WOTS_LEN = {WOTS_LEN},
+  parameter XMSS_HASH_PADDING_F = 0,
+  parameter XMSS_HASH_PADDING_H = 1,
+  parameter XMSS_HASH_PADDING_PRF = 3,
+  parameter KEY_LEN = {KEY_LEN},
+  parameter LANES = {LANES},
+  parameter CORES = {CORES},
+  parameter WOTS_LOG_W = `CLOG2(WOTS_W)
+)
+(
+    input wire clk, // clock
+    input wire [LANES-1:0] start, // start signal of each lane, one clock high signal
+    input wire reset, // reset signal, comes before start signal
+    input wire [LANES*KEY_LEN-1:0] sec_seed, // secret initial seed of each lane, lane i in [i*KEY_LEN +: KEY_LEN]
+    input wire [KEY_LEN-1:0] pub_seed, // public seed, shared by all lanes, stay unchanged
+    input wire [LANES*256-1:0] hash_addr, // initial hash address of each lane
+    
+    output wire [LANES-1:0] busy,
+    output wire [LANES-1:0] done, // one clock high signal of each lane
+    output wire [LANES*KEY_LEN-1:0] leaf_out, // hashing root value of each lane
+    output wire [LANES*256-1:0] hash_addr_out // updated hash address of each lane
+);
+
+  // interface of the lanes to the arbiter
+  wire [LANES-1:0] hash_done;
+  wire [LANES*KEY_LEN-1:0] hash_data_out; 
+  wire [LANES-1:0] hash_start;
+  wire [LANES*1024-1:0] hash_data_in;
+  wire [LANES-1:0] message_length;
+  wire [LANES-1:0] store_intermediate;
+  wire [LANES-1:0] continue_intermediate;
+
+  // interface of the arbiter to the sha cores
+  wire [CORES-1:0] core_done;
+  wire [CORES*256-1:0] core_data_out; 
+  wire [CORES-1:0] core_start;
+  wire [CORES*1024-1:0] core_data_in;
+  wire [CORES-1:0] core_message_length;
+  wire [CORES-1:0] core_store_intermediate;
+  wire [CORES-1:0] core_continue_intermediate;
+
+  genvar i;
+
+generate
+  for (i = 0; i < LANES; i = i + 1)
+    begin : lane
+      // interface to Chain
+      wire gen_chain_start;
+      wire [KEY_LEN-1:0] gen_chain_input_key;
+      wire [KEY_LEN-1:0] gen_chain_input_data;
+      wire [WOTS_LOG_W-1:0] gen_chain_start_step;
+      wire [WOTS_LOG_W-1:0] gen_chain_end_step;
+      wire [255:0] gen_chain_hash_addr;
+
+      wire [KEY_LEN-1:0] gen_chain_data_out;
+      wire gen_chain_done;
+      wire gen_chain_busy;
+      wire [255:0] gen_chain_hash_addr_updated;
+
+      wire gen_chain_hash_start;
+      wire [1023:0] gen_chain_hash_data_in;
+      wire gen_chain_message_length;
+      wire gen_chain_continue_intermediate;
+      wire gen_chain_store_intermediate;
+
+      gen_leaf #(.WOTS_W(WOTS_W), .WOTS_LEN(WOTS_LEN), .XMSS_HASH_PADDING_H(XMSS_HASH_PADDING_H), .XMSS_HASH_PADDING_F(XMSS_HASH_PADDING_F), .XMSS_HASH_PADDING_PRF(XMSS_HASH_PADDING_PRF), .KEY_LEN(KEY_LEN)) gen_leaf_inst (
+        .clk(clk),
+        .start(start[i]),
+        .reset(reset),
+        .sec_seed(sec_seed[i*KEY_LEN +: KEY_LEN]),
+        .pub_seed(pub_seed),
+        .hash_addr(hash_addr[i*256 +: 256]),
+        .leaf_out(leaf_out[i*KEY_LEN +: KEY_LEN]),
+        .done(done[i]),
+        .hash_addr_out(hash_addr_out[i*256 +: 256]),
+        .busy(busy[i]),
+        .gen_chain_start(gen_chain_start),
+        .gen_chain_input_key(gen_chain_input_key),
+        .gen_chain_input_data(gen_chain_input_data),
+        .gen_chain_start_step(gen_chain_start_step),
+        .gen_chain_end_step(gen_chain_end_step),
+        .gen_chain_hash_addr(gen_chain_hash_addr),
+        .gen_chain_data_out(gen_chain_data_out),
+        .gen_chain_done(gen_chain_done),
+        .gen_chain_busy(gen_chain_busy),
+        .gen_chain_hash_addr_updated(gen_chain_hash_addr_updated),
+        .gen_chain_hash_start(gen_chain_hash_start),
+        .gen_chain_hash_data_in(gen_chain_hash_data_in),
+        .gen_chain_message_length(gen_chain_message_length),
+        .gen_chain_continue_intermediate(gen_chain_continue_intermediate),
+        .gen_chain_store_intermediate(gen_chain_store_intermediate),
+        .hash_done(hash_done[i]),
+        .hash_data_out(hash_data_out[i*KEY_LEN +: KEY_LEN]),
+        .hash_start(hash_start[i]),
+        .hash_data_in(hash_data_in[i*1024 +: 1024]),
+        .message_length(message_length[i]),
+        .store_intermediate(store_intermediate[i]),
+        .continue_intermediate(continue_intermediate[i]) 
+      );
+
+      gen_chain #(.WOTS_W(WOTS_W), .XMSS_HASH_PADDING_F(XMSS_HASH_PADDING_F), .XMSS_HASH_PADDING_PRF(XMSS_HASH_PADDING_PRF), .KEY_LEN(KEY_LEN)) gen_chain_inst (
+        .clk(clk),
+        .start(gen_chain_start),
+        .reset(reset),
+        .input_key(gen_chain_input_key),
+        .input_data(gen_chain_input_data),
+        .start_step(gen_chain_start_step),
+        .end_step(gen_chain_end_step),
+        .hash_addr(gen_chain_hash_addr),
+        .data_out(gen_chain_data_out),
+        .busy(gen_chain_busy),
+        .done(gen_chain_done), 
+        .hash_addr_updated(gen_chain_hash_addr_updated),
+        .hash_done(hash_done[i]),
+        .hash_data_out(hash_data_out[i*KEY_LEN +: KEY_LEN]),
+        .hash_start(gen_chain_hash_start),
+        .hash_data_in(gen_chain_hash_data_in),
+        .message_length(gen_chain_message_length),
+        .continue_intermediate(gen_chain_continue_intermediate),
+        .store_intermediate(gen_chain_store_intermediate)
+      );
+    end
+endgenerate
+
+  sha256XMSS_arbiter #(.LANES(LANES), .CORES(CORES)) arbiter_inst (
+    .clk(clk),
+    .reset(reset),
+    .start(hash_start),
+    .data_in(hash_data_in),
+    .message_length(message_length),
+    .store_intermediate(store_intermediate),
+    .continue_intermediate(continue_intermediate),
+    .done(hash_done),
+    .data_out(hash_data_out),
+    .core_start(core_start),
+    .core_data_in(core_data_in),
+    .core_message_length(core_message_length),
+    .core_store_intermediate(core_store_intermediate),
+    .core_continue_intermediate(core_continue_intermediate),
+    .core_done(core_done),
+    .core_data_out(core_data_out)
+  );
+
+generate
+  for (i = 0; i < CORES; i = i + 1)
+    begin : core
+      // interface to sha256_plain module
+      // inputs
+      wire sha256_plain_start;
+      wire sha256_plain_init_message;
+      wire [511:0] sha256_plain_data_in;
+      wire sha256_plain_init_iv;
+        // outputs
+      wire [255:0] sha256_plain_data_out;
+      wire sha256_plain_data_out_valid;
+      wire sha256_plain_done;
+      wire sha256_plain_busy;
+
+      sha256XMSS sha256_inst (
+        .clk(clk),
+        .reset(reset),
+        .start(core_start[i]),
+        .data_in(core_data_in[i*1024 +: 1024]),
+        .message_length(core_message_length[i]),
+        .store_intermediate(core_store_intermediate[i]),
+        .continue_intermediate(core_continue_intermediate[i]), 
+        .data_out(core_data_out[i*256 +: 256]),
+        .data_out_valid(),
+        .done(core_done[i]),
+        .second_block_data_available(1'b1),
+        .init_iv(1'b0),
+        .busy(),
+        .sha256_start(sha256_plain_start),
+        .sha256_init_message(sha256_plain_init_message),
+        .sha256_data_in(sha256_plain_data_in),
+        .sha256_init_iv(sha256_plain_init_iv),
+        .sha256_data_out(sha256_plain_data_out),
+        .sha256_data_out_valid(sha256_plain_data_out_valid),
+        .sha256_done(sha256_plain_done),
+        .sha256_busy(sha256_plain_busy)
+      );
+
+      sha256 sha256_plain_inst (
+        .clk(clk),
+        .reset(reset),
+        .start(sha256_plain_start),
+        .init_message(sha256_plain_init_message),
+        .data_in(sha256_plain_data_in),
+        .init_iv(sha256_plain_init_iv),
+        .data_out(sha256_plain_data_out),
+        .data_out_valid(sha256_plain_data_out_valid),
+        .done(sha256_plain_done),
+        .busy(sha256_plain_busy)
+      );
+    end
+endgenerate
+
+endmodule
+""".format(WOTS_W=WOTS_W, WOTS_LEN=WOTS_LEN, KEY_LEN=KEY_LEN, LANES=LANES, CORES=CORES))
+
 
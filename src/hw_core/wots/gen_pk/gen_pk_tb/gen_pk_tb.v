@@ -204,96 +204,65 @@ module gen_pk_tb;
   
   initial
     begin
-      $dumpfile("gen_pk_tb.vcd");
-      $dumpvars(0, gen_pk_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("gen_pk_tb.vcd");
+          $dumpvars(0, gen_pk_tb);
+        end
     end
   
   integer scan_file;
-  
-  initial
-    begin
-      scan_file = $fscanf(STDIN, "%b\n", sec_seed);
-      scan_file = $fscanf(STDIN, "%b\n", pub_seed);
-      scan_file = $fscanf(STDIN, "%b\n", hash_addr);
-    end
-  
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
   
+  // run the vectors of data.in one after the other until the file is exhausted
   initial
     begin
-      # 10;
-      reset <= 1'b1;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-      
-      // write data
       f = $fopen("test.out", "w");
-      // write data
-      @(posedge clk);
-      
-      for (i = 0; i < `WOTS_LEN; i = i + 1)
-        begin
-          pk_mem_addr_0 = i;
-          # 10;
-          $fwrite(f, "%x\n", pk_mem_dout_0);
-        end
-       
-      pk_mem_addr_0 = 0;
-      
-      # 1000;
-      $fclose(f);
-      
-      // start over.
-      
+      num_vectors = 0;
+      total_cycles = 0;
       # 10;
-      // reset <= 1'b1;
+      reset <= 1'b1;
       # 10;
       reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-      
-      // write data
-      f = $fopen("test.out", "w");
-      // write data
-      @(posedge clk);
-       
-      for (i = 0; i < `WOTS_LEN; i = i + 1)
+      while ($fscanf(STDIN, "%h\n", sec_seed) == 1)
         begin
-          pk_mem_addr_0 = i;
+          scan_file = $fscanf(STDIN, "%h\n", pub_seed);
+          scan_file = $fscanf(STDIN, "%h\n", hash_addr);
+          # 25;
+          start <= 1'b1;
+          start_time <= $time;
           # 10;
-          $fwrite(f, "%x\n", pk_mem_dout_0);
+          start <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          @(posedge clk);
+          for (i = 0; i < `WOTS_LEN; i = i + 1)
+            begin
+              pk_mem_addr_0 = i;
+              # 10;
+              $fwrite(f, "%x\n", pk_mem_dout_0);
+            end
+          pk_mem_addr_0 = 0;
+          # 1000;
         end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\n", num_vectors, total_cycles);
       
-      
-      # 1000;
       $fclose(f);
-      
       $finish;
-      
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-
- 
\ No newline at end of file
@@ -175,7 +175,10 @@ module l_tree
           
           pk_wr_en_0_buf <= thash_h_done;
           
-          pk_rd_addr_0_buf <= (thash_h_done_reg & (pk_rd_addr_0_buf == ((pk_len >> 1) << 1) - 2 )) ? 0 :  
+          // back to the first two nodes after the last round, the next start
+          // reads them without a reset in between
+          pk_rd_addr_0_buf <= (round_done & (pk_len == 2)) ? 0 :
+                              (thash_h_done_reg & (pk_rd_addr_0_buf == ((pk_len >> 1) << 1) - 2 )) ? 0 :  
                               (start | thash_h_done_reg) ? pk_rd_addr_0_buf + 2 :
                               pk_rd_addr_0_buf;
           
@@ -187,7 +190,8 @@ module l_tree
           
           pk_wr_en_1_buf <= (pk_len[0] & round_done);
           
-          pk_rd_addr_1_buf <= (thash_h_done_reg & (pk_rd_addr_1_buf == ((pk_len >> 1) << 1) - 1 )) ? 1 :  
+          pk_rd_addr_1_buf <= (round_done & (pk_len == 2)) ? 1 :
+                              (thash_h_done_reg & (pk_rd_addr_1_buf == ((pk_len >> 1) << 1) - 1 )) ? 1 :  
                               ((pk_len == 3) && round_done_buf) ? 2 :
                               (start | thash_h_done_reg) ? pk_rd_addr_1_buf + 2 :
                               pk_rd_addr_1_buf;
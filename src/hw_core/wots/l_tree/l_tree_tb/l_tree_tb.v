@@ -89,7 +89,7 @@ module l_tree_tb;
   );
   
   // dual_port memory for storing pks
-  mem_dual #(.WIDTH(`KEY_LEN), .DEPTH(`WOTS_LEN), .FILE("pk.in")) mem_pk (
+  mem_dual #(.WIDTH(`KEY_LEN), .DEPTH(`WOTS_LEN)) mem_pk (
     .clock(clk),
     .data_0(pk_wr_din_0),
     .data_1(pk_wr_din_1),
@@ -143,69 +143,64 @@ module l_tree_tb;
   
   initial
     begin
-      $dumpfile("l_tree_tb.vcd");
-      $dumpvars(0, l_tree_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("l_tree_tb.vcd");
+          $dumpvars(0, l_tree_tb);
+        end
     end
   
   integer scan_file;
-  
-  initial
-    begin
-      scan_file = $fscanf(STDIN, "%b\n", input_key);
-      scan_file = $fscanf(STDIN, "%b\n", hash_addr);
-    end
-  
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
+  reg [`KEY_LEN-1:0] pk_word;
   
+  // run the vectors of data.in one after the other until the file is exhausted
   initial
     begin
+      f = $fopen("test.out", "w");
+      num_vectors = 0;
+      total_cycles = 0;
       # 20;
       reset <= 1'b1;
       # 10;
       reset <= 1'b0;
-      # 200;
-      start <= 1'b1;
-       
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
+      while ($fscanf(STDIN, "%h\n", input_key) == 1)
+        begin
+          scan_file = $fscanf(STDIN, "%h\n", hash_addr);
+          // the public key is written straight into the pk memory
+          for (i = 0; i < `WOTS_LEN; i = i + 1)
+            begin
+              scan_file = $fscanf(STDIN, "%h\n", pk_word);
+              mem_pk.mem[i] = pk_word;
+            end
+          # 200;
+          start <= 1'b1;
+          start_time <= $time;
+          # 10;
+          start <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          $fwrite(f, "%x\n", leaf_out);
+        end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\n", num_vectors, total_cycles);
       
-      // write output data
-      f = $fopen("test.out", "w");
-      $fwrite(f, "%x\n", leaf_out);
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-
-      # 200;
-      start <= 1'b1;
-       
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      
-      // write output data
-      f = $fopen("test.out", "w");
-      $fwrite(f, "%x\n", leaf_out);
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-       
       # 2000;
       $fclose(f);
-      
       $finish;
-      
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-
- 
\ No newline at end of file
@@ -19,12 +19,10 @@
 import sys
 import random
 
-sys.path.insert(0, "../../../../ref_python")
+sys.path.insert(0, "../../../..")
 
-from hash import *
-from utils import *
-from hash_address import *
-from wots_function import *
+from ref_python.wots_function import expand_seed
+from ref_python.vector_io import vector_writer
 
 import argparse
 
@@ -36,6 +34,10 @@ parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, defau
           help='seed')
 parser.add_argument('-l', '--key_len', dest='key_len', type=int, required=True, default=None,
           help='key length')
+parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=1,
+          help='number of test vectors')
+parser.add_argument('-b', '--bin', dest='bin', type=str, required=False, default=None,
+          help='also write inputs and expected outputs to this binary vector file')
 
 args = parser.parse_args()
 
@@ -44,35 +46,36 @@ key_len = args.key_len
 
 if args.seed:
   random.seed(args.seed)
-  
-f = open("data.in", "w")
-
-# generate random input key
-input_key = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  input_key += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-f.close()
-
-# added for testing purpose
-f = open("key.out", "w")
-f.write(input_key)
-f.close()
-#
-hex_seed = expand_seed(input_key, seed_num)
 
-#print hex_seed # an array
+in_fields = [("input_key", key_len//8)]
+out_fields = [("seed_out", 32, seed_num)]
+
+f_in = vector_writer("data.in", in_fields, "memh")
+f_out = vector_writer("data.out", out_fields, "memh")
+f_bin = vector_writer(args.bin, in_fields + out_fields, "bin") if args.bin else None
+
+# added for testing purpose, keys of all vectors
+f_key = open("key.out", "w")
+
+for v in range(args.vectors):
+  # generate random input key
+  input_key = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    input_key += ("{0:02x}".format(randbyte))
 
-f = open("data.out", "w")
-for i in range(seed_num):
-  f.write("{0:064x}".format(int(hex_seed[i], 16)))
-  f.write('\n')
-   
-f.close()
+  f_key.write(input_key + "\n")
 
+  hex_seed = expand_seed(input_key, seed_num)
+  #print hex_seed # an array
 
+  f_in.write(input_key)
+  f_out.write(hex_seed)
+  if f_bin:
+    f_bin.write(input_key, hex_seed)
 
-  
\ No newline at end of file
+f_key.close()
+f_in.close()
+f_out.close()
+if f_bin:
+  f_bin.close()
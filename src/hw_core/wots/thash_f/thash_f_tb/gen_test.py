@@ -19,12 +19,10 @@
 import sys
 import random
 
-sys.path.insert(0, "../../../../ref_python")
+sys.path.insert(0, "../../../..")
 
-from hash import *
-from utils import *
-from hash_address import *
-from wots_function import *
+from ref_python.hash_function import thash_f, addr_to_raw
+from ref_python.vector_io import vector_writer
 
 import argparse
 
@@ -35,6 +33,10 @@ parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, defau
           help='seed')
 parser.add_argument('-l', '--key_len', dest='key_len', type=int, required=True, default=None,
           help='key length')
+parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=1,
+          help='number of test vectors')
+parser.add_argument('-b', '--bin', dest='bin', type=str, required=False, default=None,
+          help='also write inputs and expected output to this binary vector file')
 
 args = parser.parse_args()
 
@@ -42,47 +44,46 @@ key_len = args.key_len
 
 if args.seed:
   random.seed(args.seed)
-  
-f = open("data.in", "w")
 
-# generate random input key
-input_key = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  input_key += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-
-# generate random input data
-input_data = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  input_data += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-
-# generate random addr array
-# addr hex str = addr[0] + addr[1] + ... + addr[7]
-addr = []
-for i in range(8):
-  randint = random.randint(0, 2**32-1)
-  f.write("{0:032b}".format(randint))
-  addr.append(randint)
-
-f.write("\n")
-f.close()
-
-# computation thash_f
-res = thash_f(input_data, input_key, addr)
-
-# write results back
-f = open("data.out", "w")
-f.write("{0:064x}".format(int(res, 16)))
-f.write('\n')
-f.close()
-
-
-
-  
\ No newline at end of file
+in_fields = [("input_key", key_len//8), ("input_data", key_len//8), ("hash_addr", 32)]
+out_fields = [("data_out", 32)]
+
+f_in = vector_writer("data.in", in_fields, "memh")
+f_out = vector_writer("data.out", out_fields, "memh")
+f_bin = vector_writer(args.bin, in_fields + out_fields, "bin") if args.bin else None
+
+for v in range(args.vectors):
+  # generate random input key
+  input_key = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    input_key += ("{0:02x}".format(randbyte))
+
+  # generate random input data
+  input_data = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    input_data += ("{0:02x}".format(randbyte))
+
+  # generate random addr array
+  # addr hex str = addr[0] + addr[1] + ... + addr[7]
+  addr = []
+  for i in range(8):
+    randint = random.randint(0, 2**32-1)
+    addr.append(randint)
+
+  inputs = [input_key, input_data, addr_to_raw(addr)]
+
+  # computation thash_f
+  res = thash_f(input_data, input_key, addr)
+
+  # write results back
+  f_in.write(*inputs)
+  f_out.write(res)
+  if f_bin:
+    f_bin.write(*(inputs + [res]))
+
+f_in.close()
+f_out.close()
+if f_bin:
+  f_bin.close()
@@ -116,57 +116,61 @@ module thash_f_tb;
   
   initial
     begin
-      $dumpfile("thash_f_tb.vcd");
-      $dumpvars(0, thash_f_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("thash_f_tb.vcd");
+          $dumpvars(0, thash_f_tb);
+        end
     end
   
   integer scan_file;
-  
-  initial
-    begin
-      scan_file = $fscanf(STDIN, "%b\n", input_key);
-      scan_file = $fscanf(STDIN, "%b\n", input_data);
-      scan_file = $fscanf(STDIN, "%b\n", hash_addr);
-    end
-  
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
   
+  // run the vectors of data.in one after the other until the file is exhausted
   initial
     begin
-      # 10;
-      reset <= 1'b1;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;
-       
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-      start_buf <= 1'b1;
-      # 10;
-      start_buf <= 1'b0;
-
-      @(posedge done);
-      end_time = $time;
-      // write output data
       f = $fopen("test.out", "w");
-      $fwrite(f, "%x\n", data_out);
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-       
-      # 2000;
-      $fclose(f); 
+      num_vectors = 0;
+      total_cycles = 0;
+      while ($fscanf(STDIN, "%h\n", input_key) == 1)
+        begin
+          scan_file = $fscanf(STDIN, "%h\n", input_data);
+          scan_file = $fscanf(STDIN, "%h\n", hash_addr);
+          # 10;
+          reset <= 1'b1;
+          # 10;
+          reset <= 1'b0;
+          # 25;
+          start <= 1'b1;
+          start_time <= $time;
+          # 10;
+          start <= 1'b0;
+          start_buf <= 1'b1;
+          # 10;
+          start_buf <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          $fwrite(f, "%x\n", data_out);
+        end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\n", num_vectors, total_cycles);
       
+      # 2000;
+      $fclose(f);
       $finish;
-      
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-
- 
\ No newline at end of file
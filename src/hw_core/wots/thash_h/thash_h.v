@@ -115,7 +115,9 @@ module thash_h
                         (hash_done & running) ? hash_count + 1 :
                         hash_count;
           
-          message_length <= start ? 1'b0 : // prf input = 3*256 bits
+          // the hash core reads message_length while it runs, back to 0 after the
+          // last hash so that the next user of the core does not inherit it
+          message_length <= (start | (running & hash_done & (hash_count == 3))) ? 1'b0 : // prf input = 3*256 bits
 			                      (running & hash_done & (hash_count == 2)) ? 1'b1 :
                             message_length;
            
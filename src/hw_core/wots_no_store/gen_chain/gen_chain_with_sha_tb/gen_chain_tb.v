@@ -60,67 +60,59 @@ module gen_chain_tb;
   
   initial
     begin
-      $dumpfile("gen_chain_tb.vcd");
-      $dumpvars(0, gen_chain_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("gen_chain_tb.vcd");
+          $dumpvars(0, gen_chain_tb);
+        end
     end
   
   integer scan_file;
-  
-  initial
-    begin
-      input_key = 256'h2072a1a266f236c93b46dfa9ce868e792981d0d0a047817446cb7c58698fd233;
-      input_data = 256'h66d0132b7513d81c2b76d87d21eb57b661bd28d0887cebac2072342ff461d6af;
-      hash_addr = 256'd0;
-    end
-  
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
   
+  // run the vectors of data.in one after the other until the file is exhausted
   initial
     begin
-      # 10;
-      reset <= 1'b1;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time; 
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-
-      # 100;
-      reset <= 1'b1;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      // write output data
       f = $fopen("test.out", "w");
-      $fwrite(f, "%x\n", data_out);
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-       
+      num_vectors = 0;
+      total_cycles = 0;
+      while ($fscanf(STDIN, "%h\n", input_key) == 1)
+        begin
+          scan_file = $fscanf(STDIN, "%h\n", input_data);
+          scan_file = $fscanf(STDIN, "%h\n", hash_addr);
+          # 10;
+          reset <= 1'b1;
+          # 10;
+          reset <= 1'b0;
+          # 25;
+          start <= 1'b1;
+          start_time <= $time;
+          # 10;
+          start <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          $fwrite(f, "%x\n", data_out);
+          # 100;
+        end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\n", num_vectors, total_cycles);
+      
       # 1000;
       $fclose(f);
-        
       $finish;
-      
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-
- 
\ No newline at end of file
@@ -20,18 +20,19 @@
 import sys
 import random
 
-sys.path.insert(0, "../../../../ref_python")
+sys.path.insert(0, "../../../..")
 
-from hash import *
-from utils import *
-from hash_address import *
-from wots_function import *
- 
+from ref_python.hash_function import addr_to_raw
+from ref_python.wots_batch import gen_chains_raw
+from ref_python.vector_io import vector_writer
 
 import argparse
 
 parser = argparse.ArgumentParser(description='Generate random inputs.',
                 formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+ 
+parser.add_argument('-w', '--wots_w', dest='wots_w', type=int, required=False, default=16,
+          help='wots_w')
 parser.add_argument('-i', '--init', dest='init', type=int, required=True, default=0,
           help='init index')
 parser.add_argument('-e', '--end', dest='end', type=int, required=True, default=0,
@@ -40,9 +41,14 @@ parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, defau
           help='seed')
 parser.add_argument('-l', '--key_len', dest='key_len', type=int, required=True, default=None,
           help='key length')
+parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=1,
+          help='number of test vectors')
+parser.add_argument('-b', '--bin', dest='bin', type=str, required=False, default=None,
+          help='also write inputs and expected output to this binary vector file')
 
 args = parser.parse_args()
 
+wots_w = args.wots_w
 start_index = args.init
 end_index = args.end
 key_len = args.key_len
@@ -50,50 +56,53 @@ steps = end_index - start_index + 1
 
 if args.seed:
   random.seed(args.seed)
-  
-f = open("data.in", "w")
-
-# generate random input key
-input_key = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  input_key += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-
-# generate random input data
-input_data = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  input_data += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-
-# generate random addr array
-# addr hex str = addr[0] + addr[1] + ... + addr[7]
-addr = []
-for i in range(8):
-  randint = random.randint(0, 2**32-1)
-  f.write("{0:032b}".format(randint))
-  #addr.append(randint)
-  addr.append(0)
-	
-f.write("\n")
-f.close()
-
-input_key  = "2072a1a266f236c93b46dfa9ce868e792981d0d0a047817446cb7c58698fd233"
-input_data = "66d0132b7513d81c2b76d87d21eb57b661bd28d0887cebac2072342ff461d6af"
-# computation gen_chain
-res = gen_chain(16, input_data, start_index, steps, input_key, addr)
-
-# write results back
-f = open("data.out", "w")
-f.write("{0:064x}".format(int(res, 16)))
-f.write('\n')
-f.close()
-
-
-
-  
\ No newline at end of file
+
+in_fields = [("input_key", key_len//8), ("input_data", key_len//8), ("hash_addr", 32)]
+out_fields = [("data_out", 32)]
+
+f_in = vector_writer("data.in", in_fields, "memh")
+f_out = vector_writer("data.out", out_fields, "memh")
+f_bin = vector_writer(args.bin, in_fields + out_fields, "bin") if args.bin else None
+
+vectors = []
+for v in range(args.vectors):
+  # generate random input key
+  input_key = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    input_key += ("{0:02x}".format(randbyte))
+
+  # generate random input data
+  input_data = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    input_data += ("{0:02x}".format(randbyte))
+
+  # generate random addr array
+  # addr hex str = addr[0] + addr[1] + ... + addr[7]
+  addr = []
+  for i in range(8):
+    randint = random.randint(0, 2**32-1)
+    #addr.append(randint)
+    addr.append(0)
+
+  vectors.append((input_key, input_data, addr))
+
+# computation gen_chain, all vectors in one batch
+results = gen_chains_raw(wots_w, [bytes.fromhex(x[1]) for x in vectors], [start_index] * len(vectors),
+                         [steps] * len(vectors), [bytes.fromhex(x[0]) for x in vectors], [x[2] for x in vectors])
+
+for ((input_key, input_data, addr), res) in zip(vectors, results):
+  inputs = [input_key, input_data, addr_to_raw(addr)]
+  res = res.hex()
+
+  # write results back
+  f_in.write(*inputs)
+  f_out.write(res)
+  if f_bin:
+    f_bin.write(*(inputs + [res]))
+
+f_in.close()
+f_out.close()
+if f_bin:
+  f_bin.close()
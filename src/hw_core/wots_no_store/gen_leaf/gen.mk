@@ -19,7 +19,7 @@
 gen: main.v
 
 main.v: ../gen_main.py
-	python ../gen_main.py -w $(WOTS_W) -l $(WOTS_LEN) -k $(KEY_LEN) > main.v
+	python3 ../gen_main.py -w $(WOTS_W) -l $(WOTS_LEN) -k $(KEY_LEN) > main.v
 
 gen_clean:
 	rm -f main.v
\ No newline at end of file
@@ -179,75 +179,58 @@ module gen_leaf_tb;
   
   initial
     begin
-      $dumpfile("gen_leaf_tb.vcd");
-      $dumpvars(0, gen_leaf_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("gen_leaf_tb.vcd");
+          $dumpvars(0, gen_leaf_tb);
+        end
     end
   
   integer scan_file;
-  
-  initial
-    begin 
-      pub_seed = 256'h2072a1a266f236c93b46dfa9ce868e792981d0d0a047817446cb7c58698fd233; 
-                      
-    end
-  
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
   
+  // run the vectors of data.in one after the other until the file is exhausted
   initial
     begin
-      # 10; 
-      reset <= 1'b1;
-      sec_seed <=  256'hd09f530a831bbb357b9ce09ff7473fa7454beeec58703615d81e6323e1dbf4b4;
-      hash_addr <= 256'h0000000000000000000000000000000000000000000000000000000000000000;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
-       
-      // write  data
-      f = $fopen("test.out", "w"); 
-      $fwrite(f, "%x\n", leaf_out);
-      
-      # 1000; 
-      $fclose(f);  
-      // start over! 
-      # 10;
-      reset <= 1'b1;
-      sec_seed <=  256'h1c349f208e70b458958c754e2adc32f1828f5c7379e39b8239f972a0d05eeb5f;
-      hash_addr <= 256'h0000000000000000000000000000000000000001000000000000000000000000; 
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;   
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-       
-      @(posedge done);
-      end_time = $time;
-      $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+      f = $fopen("test.out", "w");
+      num_vectors = 0;
+      total_cycles = 0;
+      while ($fscanf(STDIN, "%h\n", sec_seed) == 1)
+        begin
+          scan_file = $fscanf(STDIN, "%h\n", pub_seed);
+          scan_file = $fscanf(STDIN, "%h\n", hash_addr);
+          # 10;
+          reset <= 1'b1;
+          # 10;
+          reset <= 1'b0;
+          # 25;
+          start <= 1'b1;
+          start_time <= $time;
+          # 10;
+          start <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          $fwrite(f, "%x\n", leaf_out);
+          # 1000;
+        end
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\n", num_vectors, total_cycles);
       
-      // write  data
-      f = $fopen("test_2.out", "w"); 
-      $fwrite(f, "%x\n", leaf_out); 
-      # 1000;  
-      $fclose(f); 
-      $finish; 
+      $fclose(f);
+      $finish;
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-
- 
\ No newline at end of file
@@ -38,7 +38,7 @@ WOTS_LEN = args.wots_len
 KEY_LEN = args.key_len
 
  
-print """module main
+print("""module main
 #(
   parameter WOTS_W = {WOTS_W},
   parameter WOTS_LEN = {WOTS_LEN},
@@ -73,5 +73,5 @@ gen_leaf #(.WOTS_W(WOTS_W), .WOTS_LEN(WOTS_LEN), .XMSS_HASH_PADDING_H(XMSS_HASH_
   );
 
 endmodule
-""".format(WOTS_W=WOTS_W, WOTS_LEN=WOTS_LEN, KEY_LEN=KEY_LEN)
+""".format(WOTS_W=WOTS_W, WOTS_LEN=WOTS_LEN, KEY_LEN=KEY_LEN))
 
@@ -19,13 +19,11 @@
 import sys
 import random
 
-sys.path.insert(0, "../../../../ref_python")
+sys.path.insert(0, "../../../..")
 
-from hash import *
-from utils import *
-from hash_address import *
-from wots_function import *
- 
+from ref_python.hash_function import addr_to_raw
+from ref_python.wots_batch import wots_pkgen_many_raw
+from ref_python.vector_io import vector_writer
 
 import argparse
 
@@ -39,6 +37,10 @@ parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, defau
           help='seed')
 parser.add_argument('-l', '--key_len', dest='key_len', type=int, required=True, default=None,
           help='key length')
+parser.add_argument('-v', '--vectors', dest='vectors', type=int, required=False, default=1,
+          help='number of test vectors')
+parser.add_argument('-b', '--bin', dest='bin', type=str, required=False, default=None,
+          help='also write inputs and expected outputs to this binary vector file')
 
 args = parser.parse_args()
 
@@ -48,48 +50,52 @@ key_len = args.key_len
 
 if args.seed:
   random.seed(args.seed)
-  
-f = open("data.in", "w")
 
-# generate random input secret key
-sec_key = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  sec_key += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-
-# generate random input public key
-pub_key = ""
-for i in range(key_len/8):
-  randbyte = random.randint(0, 255)
-  f.write("{0:08b}".format(randbyte))
-  pub_key += ("{0:02x}".format(randbyte))
-
-f.write("\n")
-
-# generate random addr array
-# addr hex str = addr[0] + addr[1] + ... + addr[7]
-addr = []
-for i in range(8):
-  randint = random.randint(0, 2**32-1)
-  f.write("{0:032b}".format(randint))
-  addr.append(randint)
-
-f.write("\n")
-f.close()
-
-# computation gen_chain
-(pk, addr) = wots_pkgen(wots_w, wots_len, sec_key, pub_key, addr)
-
-# write results back
-f = open("data.out", "w")
-for i in range(wots_len):
-  f.write("{0:064x}".format(int(pk[i], 16)))
-  f.write('\n')
-f.close()
-
-
-
-  
\ No newline at end of file
+in_fields = [("sec_seed", key_len//8), ("pub_seed", key_len//8), ("hash_addr", 32)]
+out_fields = [("pk", 32, wots_len)]
+
+f_in = vector_writer("data.in", in_fields, "memh")
+f_out = vector_writer("data.out", out_fields, "memh")
+f_bin = vector_writer(args.bin, in_fields + out_fields, "bin") if args.bin else None
+
+vectors = []
+for v in range(args.vectors):
+  # generate random input secret key
+  sec_key = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    sec_key += ("{0:02x}".format(randbyte))
+
+  # generate random input public key
+  pub_key = ""
+  for i in range(key_len//8):
+    randbyte = random.randint(0, 255)
+    pub_key += ("{0:02x}".format(randbyte))
+
+  # generate random addr array
+  # addr hex str = addr[0] + addr[1] + ... + addr[7]
+  addr = []
+  for i in range(8):
+    randint = random.randint(0, 2**32-1)
+    addr.append(randint)
+
+  vectors.append((sec_key, pub_key, addr))
+
+# computation gen_pk, the chains of all vectors in one batch
+pks = wots_pkgen_many_raw(wots_w, wots_len, [bytes.fromhex(x[0]) for x in vectors],
+                          [bytes.fromhex(x[1]) for x in vectors], [x[2] for x in vectors])
+
+for ((sec_key, pub_key, addr), pk) in zip(vectors, pks):
+  inputs = [sec_key, pub_key, addr_to_raw(addr)]
+  pk = [x.hex() for x in pk]
+
+  # write results back
+  f_in.write(*inputs)
+  f_out.write(pk)
+  if f_bin:
+    f_bin.write(*(inputs + [pk]))
+
+f_in.close()
+f_out.close()
+if f_bin:
+  f_bin.close()
@@ -130,90 +130,66 @@ module seed_expand_tb;
   
   initial
     begin
-      $dumpfile("seed_expand_tb.vcd");
-      $dumpvars(0, seed_expand_tb);
+      if (!$test$plusargs("novcd"))
+        begin
+          $dumpfile("seed_expand_tb.vcd");
+          $dumpvars(0, seed_expand_tb);
+        end
     end
   
   integer scan_file;
-  
-  initial
-    begin
-      scan_file = $fscanf(STDIN, "%b\n", input_key);
-    end
-  
   integer start_time;
   integer end_time;
   integer i;
   integer f;
+  integer num_vectors;
+  integer total_cycles;
   
+  // run the vectors of data.in one after the other until the file is exhausted
   initial
     begin
+      f = $fopen("test.out", "w");
+      num_vectors = 0;
+      total_cycles = 0;
       # 10;
       reset <= 1'b1;
       seed_mem_rd_addr <= 0;
       # 10;
       reset <= 1'b0;
-      # 25;
-      start <= 1'b1;
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-      
-      @(posedge done);
-      end_time = $time;
-      $fdisplay(STDERR, "runtime: %0d cycles\n", (end_time-start_time)/10);
-      
-      //f = $fopen("test.out", "w");
-      // write output data
-      @(posedge clk);
-      seed_mem_rd_en = 1'b1;
-      for (i = 0; i < `SEED_NUM; i = i + 1)
+      while ($fscanf(STDIN, "%h\n", input_key) == 1)
         begin
-          seed_mem_rd_addr = i;
+          # 25;
+          start <= 1'b1;
+          start_time <= $time;
           # 10;
-          //$fwrite(f, "%x\n", seed_out);
+          start <= 1'b0;
+          
+          @(posedge done);
+          end_time = $time;
+          $fdisplay(STDERR, "\nruntime: %0d cycles\n", (end_time-start_time)/10);
+          num_vectors = num_vectors + 1;
+          total_cycles = total_cycles + (end_time-start_time)/10;
+          
+          // write output data
+          @(posedge clk);
+          seed_mem_rd_en = 1'b1;
+          for (i = 0; i < `SEED_NUM; i = i + 1)
+            begin
+              seed_mem_rd_addr = i;
+              # 10;
+              $fwrite(f, "%x\n", seed_out);
+            end
+          seed_mem_rd_en = 1'b0;
+          seed_mem_rd_addr = 0;
+          # 200;
         end
-      //$fclose(f);
-      seed_mem_rd_en = 1'b0;
-      
-      # 200;
-      
-      // start over.
+      $fdisplay(STDERR, "%0d vectors, %0d cycles in total\n", num_vectors, total_cycles);
       
-      # 10;
-      // reset <= 1'b1;
-      seed_mem_rd_addr <= 0;
-      # 10;
-      reset <= 1'b0;
-      # 25;
-      start <= 1'b1;
-      start_time <= $time;
-      # 10;
-      start <= 1'b0;
-      
-      @(posedge done);
-      end_time = $time;
-      $fdisplay(STDERR, "runtime: %0d cycles\n", (end_time-start_time)/10);
-      
-      f = $fopen("test.out", "w");
-      // write output data
-      @(posedge clk);
-      seed_mem_rd_en = 1'b1;
-      for (i = 0; i < `SEED_NUM; i = i + 1)
-        begin
-          seed_mem_rd_addr = i;
-          # 10;
-          $fwrite(f, "%x\n", seed_out);
-        end
       $fclose(f);
-      seed_mem_rd_en = 1'b0;
       $finish;
-      
     end
   
   always
     #5 clk = !clk;
   
 endmodule
-
- 
\ No newline at end of file
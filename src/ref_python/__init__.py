@@ -0,0 +1,54 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Python reference implementation of XMSS.
+# Submodules are only imported on first attribute access, e.g.
+#   import ref_python
+#   ref_python.wots_function.wots_pkgen(...)
+# so that a testbench generator pays for exactly the modules it uses.
+
+import importlib
+
+_submodules = (
+  'utils',
+  'hash_address',
+  'hash_function',
+  'params',
+  'wots_function',
+  'wots_batch',
+  'ltree_buffer',
+  'xmss_leaf',
+  'xmss_tree',
+  'xmss_core_fast',
+  'vector_io',
+  'hash_trace',
+  'sha256_state',
+  'native',
+)
+
+__all__ = list(_submodules)
+
+def __getattr__(name):
+  if name in _submodules:
+    module = importlib.import_module('.' + name, __name__)
+    globals()[name] = module
+    return module
+  raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def __dir__():
+  return sorted(set(globals()) | set(_submodules))
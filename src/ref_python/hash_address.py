@@ -17,6 +17,100 @@
 #
 
 
+import struct
+
+XMSS_ADDR_TYPE_OTS = 0
+XMSS_ADDR_TYPE_LTREE = 1
+XMSS_ADDR_TYPE_HASHTREE = 2
+
+_ADDR = struct.Struct('>8I')
+_WORD = struct.Struct('>I')
+
+# compact address: the 32-byte big-endian encoding is the only storage, words
+# are updated in place and serialising is a plain copy of the buffer
+# it can be used wherever an address list is accepted, the setters below work
+# on both
+class xmss_addr(object):
+  __slots__ = ('buf',)
+
+  def __init__(self, words = None):
+    if isinstance(words, xmss_addr):
+      self.buf = bytearray(words.buf)
+    else:
+      self.buf = bytearray(32)
+      if words is not None:
+        _ADDR.pack_into(self.buf, 0, *words)
+
+  def __len__(self):
+    return 8
+
+  def __getitem__(self, i):
+    if isinstance(i, slice):
+      return list(_ADDR.unpack(self.buf))[i]
+    if i < 0:
+      i += 8
+    return _WORD.unpack_from(self.buf, 4*i)[0]
+
+  def __setitem__(self, i, value):
+    if isinstance(i, slice):
+      words = list(_ADDR.unpack(self.buf))
+      words[i] = value
+      _ADDR.pack_into(self.buf, 0, *words)
+      return
+    if i < 0:
+      i += 8
+    _WORD.pack_into(self.buf, 4*i, value)
+
+  def __iter__(self):
+    return iter(_ADDR.unpack(self.buf))
+
+  def __eq__(self, other):
+    return list(self) == list(other)
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __repr__(self):
+    return 'xmss_addr(%r)' % list(self)
+
+  def to_bytes(self):
+    return bytes(self.buf)
+
+  def copy(self):
+    return xmss_addr(self)
+
+# compact working copy of addr, see store_addr
+def as_xmss_addr(addr):
+  if isinstance(addr, xmss_addr):
+    return addr
+  return xmss_addr(addr)
+
+# write the words of a working copy back into the caller's address
+def store_addr(work, addr):
+  if work is not addr:
+    addr[:] = list(work)
+  return addr
+
+def set_layer_addr(layer, addr = []):
+  addr[0] = layer
+  return addr
+
+def set_tree_addr(tree, addr = []):
+  addr[1] = (tree >> 32) & 0xffffffff
+  addr[2] = tree & 0xffffffff
+  return addr
+
+def set_type(addr_type, addr = []):
+  addr[3] = addr_type
+  return addr
+
+# copy layer and tree address parts
+def copy_subtree_addr(addr_in, addr = []):
+  addr[0] = addr_in[0]
+  addr[1] = addr_in[1]
+  addr[2] = addr_in[2]
+  return addr
+
 def set_key_and_mask(key_and_mask, addr = []):
 	addr[7] = key_and_mask
 	return addr
@@ -25,11 +119,20 @@ def set_hash_addr(hash_in, addr = []):
   addr[6] = hash_in
   return addr
 
+# set addresses of a WOTS key pair
+def set_ots_addr(ots_in, addr = []):
+  addr[4] = ots_in
+  return addr
+
 def set_chain_addr(chain_in, addr = []):
   addr[5] = chain_in
   return addr
 
 # set addresses inside a L_tree
+def set_ltree_addr(ltree_in, addr = []):
+  addr[4] = ltree_in
+  return addr
+
 def set_tree_height(tree_height, addr = []):
   addr[5] = tree_height
   return addr
@@ -0,0 +1,154 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu> 
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import hashlib
+import struct
+from collections import OrderedDict
+from hashlib import sha256 # use sha-256 as basic hash function
+from .hash_address import set_key_and_mask, xmss_addr
+
+# parameters/hardcode
+XMSS_HASH_PADDING_F = 0
+XMSS_HASH_PADDING_H = 1
+XMSS_HASH_PADDING_HASH = 2
+XMSS_HASH_PADDING_PRF = 3
+
+BYTE_LEN_n = 32 # n in the c code
+
+# domain separation paddings as raw n-byte strings
+PADDING_F = XMSS_HASH_PADDING_F.to_bytes(BYTE_LEN_n, 'big')
+PADDING_H = XMSS_HASH_PADDING_H.to_bytes(BYTE_LEN_n, 'big')
+PADDING_HASH = XMSS_HASH_PADDING_HASH.to_bytes(BYTE_LEN_n, 'big')
+PADDING_PRF = XMSS_HASH_PADDING_PRF.to_bytes(BYTE_LEN_n, 'big')
+
+# encoded key_and_mask words, appended to the first 28 address bytes
+KEY_AND_MASK = [i.to_bytes(4, 'big') for i in range(3)]
+
+# number of precomputed PRF midstates kept (least recently used are dropped),
+# set to 0 to disable the precomputation and hash both blocks on every call
+PRF_CACHE_SIZE = 16
+
+# set by hash_trace while a tracer is enabled: the engines that inline thash_f
+# and thash_h (ltree_buffer, wots_batch) then call the traced functions instead
+tracing = False
+
+
+####################################################################
+# bytes-native engine
+# inputs are bytes-like objects (bytes or bytearray), outputs are bytes
+
+# convert an address (list of ints or xmss_addr) into its 32-byte big-endian encoding
+def addr_to_raw(addr = []):
+  if isinstance(addr, xmss_addr):
+    return bytes(addr.buf)
+  return struct.pack('>8I', *addr)
+
+# xor two equally long byte strings
+def xor_raw(a, b):
+  return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+def core_hash_raw(message):
+  return sha256(message).digest()
+
+# sha256 midstate after the first block (padding || key) of the PRF input,
+# same precomputation as sha256XMSSprecomp.v and hash_store() in hash.c
+_prf_midstates = OrderedDict()
+# most recently used (key, midstate), checked before touching the LRU order
+_prf_last = (None, None)
+
+def prf_midstate(keyRaw):
+  global _prf_last
+  keyRaw = bytes(keyRaw)
+  if _prf_last[0] == keyRaw:
+    return _prf_last[1]
+  ctx = _prf_midstates.pop(keyRaw, None)
+  if ctx is None:
+    ctx = sha256(PADDING_PRF + keyRaw)
+    while len(_prf_midstates) >= PRF_CACHE_SIZE:
+      _prf_midstates.popitem(last=False)
+  _prf_midstates[keyRaw] = ctx
+  _prf_last = (keyRaw, ctx)
+  return ctx
+
+def prf_midstate_clear():
+  global _prf_last
+  _prf_midstates.clear()
+  _prf_last = (None, None)
+
+def prf_raw(inRaw, keyRaw):
+  if PRF_CACHE_SIZE <= 0:
+    return core_hash_raw(PADDING_PRF + bytes(keyRaw) + bytes(inRaw))
+  # hash_restore(): continue from the stored midstate with the second block
+  ctx = prf_midstate(keyRaw).copy()
+  ctx.update(bytes(inRaw))
+  return ctx.digest()
+
+# message hash H_msg(R || root || index, M)
+def hash_message_raw(R, root, idx, msg):
+  return core_hash_raw(PADDING_HASH + bytes(R) + bytes(root) + struct.pack('>24xQ', idx) + bytes(msg))
+
+# the address is encoded once, the PRF inputs only differ in key_and_mask;
+# addr is left with the last key_and_mask like in hash.c
+def thash_f_raw(inRaw, pub_seedRaw, addr):
+  prefix = addr_to_raw(addr)[:28]
+  f_key = prf_raw(prefix + KEY_AND_MASK[0], pub_seedRaw)
+  f_mask = prf_raw(prefix + KEY_AND_MASK[1], pub_seedRaw)
+  addr = set_key_and_mask(1, addr)
+  return core_hash_raw(PADDING_F + f_key + xor_raw(inRaw, f_mask))
+
+def thash_h_raw(inRaw, pub_seedRaw, addr):
+  prefix = addr_to_raw(addr)[:28]
+  h_key = prf_raw(prefix + KEY_AND_MASK[0], pub_seedRaw)
+  h_mask_1 = prf_raw(prefix + KEY_AND_MASK[1], pub_seedRaw)
+  h_mask_2 = prf_raw(prefix + KEY_AND_MASK[2], pub_seedRaw)
+  addr = set_key_and_mask(2, addr)
+  return core_hash_raw(PADDING_H + h_key + xor_raw(inRaw, h_mask_1 + h_mask_2))
+
+
+####################################################################
+# hex-string API, thin wrappers around the bytes-native engine
+
+# convert an address array(int) into a hex string
+def addr_to_bytes(addr = []):
+  return addr_to_raw(addr).hex()
+
+# input and output are all hex strings 
+def core_hash(message): 
+  return core_hash_raw(bytes.fromhex(message)).hex()
+
+# pseudorandom function, based on hash function, input and output are all hex strings 
+def prf(inHex, keyHex):
+  return prf_raw(bytes.fromhex(inHex), bytes.fromhex(keyHex)).hex()
+
+# F function, input and output are all hex strings
+def thash_f(inHex, pub_seedHex, addr):
+  return thash_f_raw(bytes.fromhex(inHex), bytes.fromhex(pub_seedHex), addr).hex()
+
+def thash_h(inHex, pub_seedHex, addr):
+  return thash_h_raw(bytes.fromhex(inHex), bytes.fromhex(pub_seedHex), addr).hex()
+
+####################################################################
+#testing
+
+#addr = [0, 0, 0, 0, 0, 0, 0, 0]
+#inHex = 'ff'*32
+#pub_seedHex = '35'*32
+#print 'Computation for F in hex:' 
+#print thash_f(inHex, pub_seedHex, addr)
+
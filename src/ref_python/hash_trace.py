@@ -0,0 +1,271 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Opt-in tracing of the prf, thash_f and thash_h calls of the reference model.
+#
+# While a tracer is enabled, prf_raw, thash_f_raw and thash_h_raw are replaced
+# by traced wrappers in hash_function and in every loaded ref_python module that
+# imported them, and restored when it is disabled, so tracing costs nothing
+# when it is off. The hex wrappers are covered through the raw functions; the
+# engines that inline thash_f and thash_h (ltree_buffer, wots_batch) see
+# hash_function.tracing and call the traced functions instead. Calls made in
+# worker processes (processes > 1) are not traced.
+#
+# Every call is recorded when it returns, i.e. the PRFs of a thash come before
+# the thash itself, in the order the hardware produces them. The trace is a
+# binary vector_io file with one record per call:
+#   func   (1 byte)   0 = prf, 1 = thash_f, 2 = thash_h
+#   depth  (1 byte)   nesting level, 0 for calls made outside a traced call
+#   start  (8 bytes)  ns since the tracer was enabled
+#   time   (8 bytes)  ns spent in the call, including nested calls
+#   addr   (8 words)  address, for prf its 32-byte input
+#   key    (32 bytes) pub_seed, for prf the key
+#   input  (64 bytes) input, zero padded; zero for prf
+#   output (32 bytes)
+# so it can be exported to hex lines with vector_io and diffed against a
+# simulator dump. Call counts and log2 time histograms per function are kept
+# in memory and can be recomputed from a trace file.
+#
+# Example:
+#   with hash_tracer('trace.bin') as t:
+#     wots_pkgen(...)
+#   print(t.report())
+
+import sys
+import time
+
+from . import hash_function
+from .hash_function import addr_to_raw
+from .vector_io import vector_writer, vector_file
+
+FUNCS = ('prf', 'thash_f', 'thash_h')
+FUNC_PRF = 0
+FUNC_THASH_F = 1
+FUNC_THASH_H = 2
+
+TRACE_FIELDS = [
+  ('func', 1, 1),
+  ('depth', 1, 1),
+  ('start', 8, 1),
+  ('time', 8, 1),
+  ('addr', 4, 8),
+  ('key', 32, 1),
+  ('input', 32, 2),
+  ('output', 32, 1),
+]
+
+_ZERO_INPUT = bytes(64)
+
+# per-function call count, total time and histogram, bucket i counts the calls
+# that took [2^(i-1), 2^i) ns
+class call_stats(object):
+  def __init__(self):
+    self.count = 0
+    self.total = 0
+    self.hist = [0] * 64
+
+  def add(self, ns):
+    self.count += 1
+    self.total += ns
+    self.hist[min(ns.bit_length(), 63)] += 1
+
+  def format(self, name):
+    if self.count == 0:
+      return "%-8s %10d calls" % (name, 0)
+    lines = ["%-8s %10d calls %12.3f ms %10.0f ns/call" % (name, self.count, self.total / 1e6,
+                                                            self.total / self.count)]
+    top = max(self.hist)
+    for (i, num) in enumerate(self.hist):
+      if num:
+        low = (1 << (i - 1)) if i > 0 else 0
+        lines.append("  %9d ns - %9d ns %10d %s" % (low, (1 << i) - 1, num, '#' * max(1, 40 * num // top)))
+    return '\n'.join(lines)
+
+def format_stats(stats):
+  return '\n'.join(stats[i].format(FUNCS[i]) for i in range(len(FUNCS)))
+
+
+class hash_tracer(object):
+  # path: trace file, None only collects the statistics
+  def __init__(self, path = None):
+    self.path = path
+    self.writer = None
+    self.stats = [call_stats() for f in FUNCS]
+    self.depth = 0
+    self.t0 = 0
+    self._traced = []
+
+  def _record(self, func, start, ns, addr, key, data, out):
+    self.stats[func].add(ns)
+    if self.writer is not None:
+      self.writer.write(func, self.depth, start - self.t0, ns, addr, bytes(key),
+                        bytes(data).ljust(64, b'\x00'), out)
+
+  def _wrappers(self, originals):
+    clock = time.perf_counter_ns
+    (prf_raw, thash_f_raw, thash_h_raw) = originals
+
+    def traced_prf_raw(inRaw, keyRaw):
+      self.depth += 1
+      start = clock()
+      out = prf_raw(inRaw, keyRaw)
+      ns = clock() - start
+      self.depth -= 1
+      self._record(FUNC_PRF, start, ns, bytes(inRaw), keyRaw, _ZERO_INPUT, out)
+      return out
+
+    def traced_thash_f_raw(inRaw, pub_seedRaw, addr):
+      addrRaw = addr_to_raw(addr)
+      self.depth += 1
+      start = clock()
+      out = thash_f_raw(inRaw, pub_seedRaw, addr)
+      ns = clock() - start
+      self.depth -= 1
+      self._record(FUNC_THASH_F, start, ns, addrRaw, pub_seedRaw, inRaw, out)
+      return out
+
+    def traced_thash_h_raw(inRaw, pub_seedRaw, addr):
+      addrRaw = addr_to_raw(addr)
+      self.depth += 1
+      start = clock()
+      out = thash_h_raw(inRaw, pub_seedRaw, addr)
+      ns = clock() - start
+      self.depth -= 1
+      self._record(FUNC_THASH_H, start, ns, addrRaw, pub_seedRaw, inRaw, out)
+      return out
+
+    return (traced_prf_raw, traced_thash_f_raw, traced_thash_h_raw)
+
+  # replace every reference to old by new in the loaded package modules
+  @staticmethod
+  def _swap(name, old, new):
+    package = hash_function.__name__.rpartition('.')[0]
+    for (modname, module) in list(sys.modules.items()):
+      if module is None or not (modname == package or modname.startswith(package + '.')):
+        continue
+      if getattr(module, name, None) is old:
+        setattr(module, name, new)
+
+  def enable(self):
+    if self._traced:
+      return self
+    names = ('prf_raw', 'thash_f_raw', 'thash_h_raw')
+    originals = [getattr(hash_function, name) for name in names]
+    if self.path is not None:
+      self.writer = vector_writer(self.path, TRACE_FIELDS, 'bin')
+    self.t0 = time.perf_counter_ns()
+
+    # modules imported while tracing pick the wrappers up from hash_function
+    self._traced = list(zip(names, originals, self._wrappers(originals)))
+    for (name, orig, traced) in self._traced:
+      self._swap(name, orig, traced)
+    hash_function.tracing = True
+    return self
+
+  def disable(self):
+    if self._traced:
+      hash_function.tracing = False
+    for (name, orig, traced) in self._traced:
+      self._swap(name, traced, orig)
+    self._traced = []
+    if self.writer is not None:
+      self.writer.close()
+      self.writer = None
+
+  def report(self):
+    return format_stats(self.stats)
+
+  def __enter__(self):
+    return self.enable()
+
+  def __exit__(self, *exc):
+    self.disable()
+
+# statistics of a trace file
+def trace_stats(path):
+  stats = [call_stats() for f in FUNCS]
+  with vector_file(path) as trace:
+    for i in range(len(trace)):
+      stats[trace.field(i, 'func')[0]].add(int.from_bytes(trace.field(i, 'time'), 'big'))
+  return stats
+
+# one text line per call, without the timing so that traces of different runs
+# (or a simulator dump in the same format) can be diffed
+def dump_trace(path, out, funcs = None):
+  with vector_file(path) as trace:
+    for i in range(len(trace)):
+      func = trace.field(i, 'func')[0]
+      if funcs is not None and FUNCS[func] not in funcs:
+        continue
+      addr = ' '.join(w.hex() for w in trace.field(i, 'addr'))
+      data = b''.join(trace.field(i, 'input'))
+      if func == FUNC_THASH_F:
+        data = data[:32]
+      line = "%-7s %s %s %s" % (FUNCS[func], addr, trace.field(i, 'key').hex(), trace.field(i, 'output').hex())
+      if func != FUNC_PRF:
+        line += ' ' + data.hex()
+      out.write(line + '\n')
+
+
+if __name__ == '__main__':
+  import argparse
+  import runpy
+
+  parser = argparse.ArgumentParser(description='Trace the hash calls of a reference model run, or inspect a trace.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False, default='hash_trace.bin',
+            help='trace file written when running a script or module')
+  parser.add_argument('-m', '--module', dest='module', type=str, required=False, default=None,
+            help='run this module as a script, e.g. ref_python.xmss_core_fast')
+  parser.add_argument('-s', '--script', dest='script', type=str, required=False, default=None,
+            help='run this script, e.g. gen_test.py of a testbench')
+  parser.add_argument('-i', '--input', dest='input', type=str, required=False, default=None,
+            help='existing trace file to print the statistics of')
+  parser.add_argument('-d', '--dump', dest='dump', type=str, required=False, default=None,
+            help='also write the calls as text lines to this file (- for stdout)')
+  parser.add_argument('-f', '--funcs', dest='funcs', type=str, nargs='*', default=None,
+            choices=list(FUNCS), help='functions to dump (default: all)')
+  parser.add_argument('args', nargs=argparse.REMAINDER,
+            help='arguments of the script or module, after --')
+
+  args = parser.parse_args()
+
+  if args.module is not None or args.script is not None:
+    argv = args.args[1:] if args.args[:1] == ['--'] else args.args
+    path = args.out
+    tracer = hash_tracer(path)
+    with tracer:
+      if args.module is not None:
+        sys.argv = [args.module] + argv
+        runpy.run_module(args.module, run_name='__main__', alter_sys=True)
+      else:
+        sys.argv = [args.script] + argv
+        runpy.run_path(args.script, run_name='__main__')
+    print(tracer.report(), file=sys.stderr)
+  elif args.input is not None:
+    path = args.input
+    print(format_stats(trace_stats(path)))
+  else:
+    parser.error("give a module (-m), a script (-s) or a trace file (-i)")
+
+  if args.dump is not None:
+    if args.dump == '-':
+      dump_trace(path, sys.stdout, args.funcs)
+    else:
+      with open(args.dump, 'w') as f:
+        dump_trace(path, f, args.funcs)
@@ -0,0 +1,124 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# L-tree engine on one preallocated node buffer of wots_len*n bytes.
+# Parent nodes overwrite their children in place like l_tree() in
+# xmss_commons.c, so no per-node lists or strings are built. The address
+# encoding of every height is packed once per call, and the PRF outputs
+# (key and bitmasks) of thash_h can optionally be memoised per
+# (pub_seed, node address) across calls.
+
+import struct
+from collections import OrderedDict
+
+from . import hash_function
+from .hash_function import prf_raw, core_hash_raw, addr_to_raw, PADDING_H, KEY_AND_MASK, BYTE_LEN_n
+from .hash_address import set_tree_height, set_tree_index, set_key_and_mask
+from .wots_function import wots_len, l_tree_raw
+
+class ltree_engine(object):
+  # cache_size: number of (pub_seed, node address) entries whose PRF outputs
+  #   are kept, 0 disables the cache
+  def __init__(self, w_len = wots_len, n = BYTE_LEN_n, cache_size = 0):
+    self.w_len = w_len
+    self.n = n
+    self.buf = bytearray(w_len * n)
+    self.cache_size = cache_size
+    self._prf_cache = OrderedDict()
+
+  def clear_cache(self):
+    self._prf_cache.clear()
+
+  # h_key and both bitmasks (as one integer) of the node at node_addr, where
+  # node_addr is the 28-byte address encoding without key_and_mask
+  def _key_and_masks(self, pub_seedRaw, node_addr):
+    if self.cache_size > 0:
+      res = self._prf_cache.get((pub_seedRaw, node_addr))
+      if res is not None:
+        return res
+    h_key = prf_raw(node_addr + KEY_AND_MASK[0], pub_seedRaw)
+    h_mask = (prf_raw(node_addr + KEY_AND_MASK[1], pub_seedRaw)
+              + prf_raw(node_addr + KEY_AND_MASK[2], pub_seedRaw))
+    res = (PADDING_H + h_key, int.from_bytes(h_mask, 'big'))
+    if self.cache_size > 0:
+      while len(self._prf_cache) >= self.cache_size:
+        self._prf_cache.popitem(last=False)
+      self._prf_cache[(pub_seedRaw, node_addr)] = res
+    return res
+
+  # load the WOTS public key into the node buffer
+  # input: list of w_len n-byte nodes or one byte string of w_len*n bytes
+  def load(self, pk):
+    n = self.n
+    if isinstance(pk, (list, tuple)):
+      if len(pk) != self.w_len:
+        raise ValueError("expected %d nodes, got %d" % (self.w_len, len(pk)))
+      for i in range(len(pk)):
+        if len(pk[i]) != n:
+          raise ValueError("node %d has %d bytes, expected %d" % (i, len(pk[i]), n))
+        self.buf[n*i:n*(i+1)] = pk[i]
+    else:
+      if len(pk) != self.w_len * n:
+        raise ValueError("expected %d bytes, got %d" % (self.w_len * n, len(pk)))
+      self.buf[:] = pk
+
+  # compute the leaf of the public key held in the node buffer
+  # addr is left in the state l_tree_raw() leaves it in
+  def compute(self, pub_seedRaw, addr):
+    n = self.n
+    buf = self.buf
+    pub_seedRaw = bytes(pub_seedRaw)
+    if hash_function.tracing:
+      # every node through thash_h_raw, so hash_trace records it
+      pk = [bytes(buf[n*i:n*(i+1)]) for i in range(self.w_len)]
+      leaf = l_tree_raw(pk, pub_seedRaw, addr)
+      buf[:] = b''.join(pk)
+      return leaf
+    prefix = addr_to_raw(addr)[:20]
+
+    l = self.w_len
+    height = 0
+    while l > 1:
+      height_addr = prefix + struct.pack('>I', height)
+      for i in range(l >> 1):
+        (head, h_mask) = self._key_and_masks(pub_seedRaw, height_addr + struct.pack('>I', i))
+        masked = int.from_bytes(buf[2*n*i:2*n*(i+1)], 'big') ^ h_mask
+        buf[n*i:n*(i+1)] = core_hash_raw(head + masked.to_bytes(2*n, 'big'))
+      if l & 1:
+        buf[n*(l >> 1):n*((l >> 1)+1)] = buf[n*(l-1):n*l]
+        l = (l >> 1) + 1
+      else:
+        l = l >> 1
+      height += 1
+
+    addr = set_tree_height(height, addr)
+    if height > 0:
+      addr = set_tree_index(0, addr)
+      addr = set_key_and_mask(2, addr)
+    return bytes(buf[:n])
+
+  def l_tree_raw(self, pk, pub_seedRaw, addr):
+    self.load(pk)
+    return self.compute(pub_seedRaw, addr)
+
+# hex-string version, same interface as l_tree() in wots_function.py except that
+# the pk list is left untouched
+def l_tree_buffered(pk, pub_seedHex, addr, engine = None):
+  if engine is None:
+    engine = ltree_engine(len(pk))
+  return engine.l_tree_raw([bytes.fromhex(x) for x in pk], bytes.fromhex(pub_seedHex), addr).hex()
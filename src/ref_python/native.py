@@ -0,0 +1,389 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Optional native backend: the x86 build of xmss-reference loaded with ctypes.
+#
+# xmss_native.c and the xmss-reference sources of x86.mk are compiled into a
+# shared library on first use (gcc and the OpenSSL headers are needed, see
+# build()) and rebuilt when a source changes. The functions below have the call
+# signatures of their pure-Python counterparts in hash_function, wots_function,
+# xmss_leaf and xmss_tree, so a generator can switch with an import; the
+# pure-Python modules remain the reference the native results are checked
+# against. Inputs are handed to C without copying, outputs are written by C
+# into bytearrays, and ctypes releases the GIL during the calls, so leaf ranges
+# are computed on a thread pool.
+#
+# Example:
+#   from ref_python import native
+#   if native.available():
+#     (pk, addr) = native.wots_pkgen_raw(16, 67, seed, pub_seed, addr)
+
+import ctypes
+import multiprocessing
+import multiprocessing.pool
+import os
+import subprocess
+
+from .hash_address import store_addr
+from .wots_function import wots_w, wots_len, wots_lengths
+from . import xmss_tree
+
+BYTE_LEN_n = 32
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+C_FOLDER = os.path.join(_HERE, '..', 'xmss-reference')
+
+# the x86.mk sources; xmss_commons.c and xmss_core.c are included by xmss_native.c
+C_SOURCES = ['params.c', 'hash.c', 'fips202.c', 'hash_address.c', 'randombytes.c', 'wots.c', 'utils.c']
+C_HEADERS = ['params.h', 'hash.h', 'fips202.h', 'hash_address.h', 'randombytes.h', 'wots.h',
+             'xmss_commons.h', 'xmss_commons.c', 'xmss_core.h', 'xmss_core.c', 'utils.h']
+
+SHIM = os.path.join(_HERE, 'xmss_native.c')
+
+# library path, can be moved e.g. out of a read-only checkout
+LIB = os.environ.get('XMSS_NATIVE_LIB', os.path.join(_HERE, 'libxmss_native.so'))
+
+CC = os.environ.get('CC', 'gcc')
+CFLAGS = ['-O3', '-fPIC', '-shared', '-Wall']
+LDFLAGS = ['-lcrypto']
+
+_lib = None
+_error = None
+
+def _sources():
+  return [SHIM] + [os.path.join(C_FOLDER, f) for f in C_SOURCES]
+
+def _out_of_date(lib):
+  if not os.path.exists(lib):
+    return True
+  mtime = os.path.getmtime(lib)
+  deps = _sources() + [os.path.join(C_FOLDER, f) for f in C_HEADERS]
+  return any(os.path.getmtime(f) > mtime for f in deps)
+
+# compile the shared library if it is missing or older than its sources
+def build(lib = LIB, force = False):
+  if not force and not _out_of_date(lib):
+    return lib
+  tmp = '%s.%d.tmp' % (lib, os.getpid())
+  cmd = [CC] + CFLAGS + ['-o', tmp] + _sources() + LDFLAGS
+  try:
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+  except OSError as e:
+    raise RuntimeError("cannot run %s: %s" % (CC, e))
+  if res.returncode != 0:
+    if os.path.exists(tmp):
+      os.remove(tmp)
+    raise RuntimeError("building %s failed:\n%s" % (lib, res.stdout))
+  # concurrent builds (pool workers) each rename a complete library into place
+  os.replace(tmp, lib)
+  return lib
+
+def _declare(lib):
+  p = ctypes.c_void_p
+  u = ctypes.c_uint32
+  signatures = {
+    'native_prf':              [p, p, p],
+    'native_thash_f':          [p, p, p, p],
+    'native_thash_h':          [p, p, p, p],
+    'native_gen_chain':        [u, p, p, u, u, p, p],
+    'native_wots_pkgen':       [u, u, p, p, p, p],
+    'native_wots_sign':        [u, p, p, p, p, p],
+    'native_wots_pk_from_sig': [u, p, p, p, p, p],
+    'native_l_tree':           [u, p, p, p, p],
+    'native_gen_leaves':       [u, u, p, p, p, p, u, u, p],
+    'native_treehash':         [u, u, p, p, p, p, u, p],
+  }
+  for (name, argtypes) in signatures.items():
+    func = getattr(lib, name)
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+
+# the loaded library, built if needed; raises RuntimeError if that fails
+def load():
+  global _lib, _error
+  if _lib is None:
+    if _error is not None:
+      raise RuntimeError(_error)
+    try:
+      lib = ctypes.CDLL(build())
+      _declare(lib)
+    except (RuntimeError, OSError) as e:
+      _error = str(e)
+      raise RuntimeError(_error)
+    _lib = lib
+  return _lib
+
+# whether the native backend can be used
+def available():
+  try:
+    load()
+    return True
+  except RuntimeError:
+    return False
+
+
+####################################################################
+# buffers
+
+# pointer to the data of a bytes object (not copied) or of a writable buffer
+def _in(data):
+  if isinstance(data, bytes):
+    return ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p)
+  return ctypes.addressof((ctypes.c_char * len(data)).from_buffer(data))
+
+def _out(buf):
+  return ctypes.addressof((ctypes.c_char * len(buf)).from_buffer(buf))
+
+def _addr(addr):
+  return (ctypes.c_uint32 * 8)(*list(addr)[:8] + [0] * (8 - len(addr)))
+
+def _split(buf, num):
+  view = memoryview(buf)
+  return [view[i*BYTE_LEN_n:(i+1)*BYTE_LEN_n].tobytes() for i in range(num)]
+
+def _check(ret, what):
+  if ret != 0:
+    raise ValueError("%s: unsupported parameters" % what)
+
+
+####################################################################
+# hash_function
+
+def prf_raw(inRaw, keyRaw):
+  out = bytearray(BYTE_LEN_n)
+  load().native_prf(_out(out), _in(inRaw), _in(keyRaw))
+  return bytes(out)
+
+def thash_f_raw(inRaw, pub_seedRaw, addr):
+  out = bytearray(BYTE_LEN_n)
+  a = _addr(addr)
+  load().native_thash_f(_out(out), _in(inRaw), _in(pub_seedRaw), a)
+  store_addr(a, addr)
+  return bytes(out)
+
+def thash_h_raw(inRaw, pub_seedRaw, addr):
+  out = bytearray(BYTE_LEN_n)
+  a = _addr(addr)
+  load().native_thash_h(_out(out), _in(inRaw), _in(pub_seedRaw), a)
+  store_addr(a, addr)
+  return bytes(out)
+
+
+####################################################################
+# wots_function
+
+def gen_chain_raw(w, inRaw, start, steps, pub_seedRaw, addr = []):
+  out = bytearray(BYTE_LEN_n)
+  a = _addr(addr)
+  _check(load().native_gen_chain(w, _out(out), _in(inRaw), start, steps, _in(pub_seedRaw), a), 'gen_chain')
+  store_addr(a, addr)
+  return bytes(out)
+
+def gen_chain(w, inHex, start, steps, pub_seed, addr = []):
+  return gen_chain_raw(w, bytes.fromhex(inHex), start, steps, bytes.fromhex(pub_seed), addr).hex()
+
+# public key as one buffer of w_len nodes
+def wots_pkgen_buf(w, w_len, seedRaw, pub_seedRaw, addr, out = None):
+  if out is None:
+    out = bytearray(w_len * BYTE_LEN_n)
+  a = _addr(addr)
+  _check(load().native_wots_pkgen(w, w_len, _out(out), _in(seedRaw), _in(pub_seedRaw), a), 'wots_pkgen')
+  store_addr(a, addr)
+  return out
+
+def wots_pkgen_raw(w, w_len, seedRaw, pub_seedRaw, addr):
+  pk = wots_pkgen_buf(w, w_len, seedRaw, pub_seedRaw, addr)
+  return _split(pk, w_len), addr
+
+def wots_pkgen(w, w_len, seedHex, pub_seedHex, addr):
+  (pk, addr) = wots_pkgen_raw(w, w_len, bytes.fromhex(seedHex), bytes.fromhex(pub_seedHex), addr)
+  return [x.hex() for x in pk], addr
+
+# len1 + len2 chains of params.c for w, like wots_function.wots_sign_raw()
+def wots_sign_raw(w, msgRaw, seedRaw, pub_seedRaw, addr):
+  (log_w, len1, len2) = wots_lengths(w)
+  sig = bytearray((len1 + len2) * BYTE_LEN_n)
+  a = _addr(addr)
+  _check(load().native_wots_sign(w, _out(sig), _in(msgRaw), _in(seedRaw), _in(pub_seedRaw), a), 'wots_sign')
+  store_addr(a, addr)
+  return _split(sig, len1 + len2)
+
+def wots_sign(w, msg, seedHex, pub_seedHex, addr):
+  sig = wots_sign_raw(w, bytes.fromhex(msg), bytes.fromhex(seedHex), bytes.fromhex(pub_seedHex), addr)
+  return [x.hex() for x in sig]
+
+def wots_pk_from_sig_raw(w, msgRaw, pub_seedRaw, addr = [], signature = []):
+  (log_w, len1, len2) = wots_lengths(w)
+  pk = bytearray((len1 + len2) * BYTE_LEN_n)
+  a = _addr(addr)
+  _check(load().native_wots_pk_from_sig(w, _out(pk), _in(b''.join(signature)), _in(msgRaw),
+                                        _in(pub_seedRaw), a), 'wots_pk_from_sig')
+  store_addr(a, addr)
+  return _split(pk, len1 + len2)
+
+def wots_pk_from_sig(w, msg, pub_seed, addr = [], signature = []):
+  pk = wots_pk_from_sig_raw(w, bytes.fromhex(msg), bytes.fromhex(pub_seed), addr,
+                            [bytes.fromhex(x) for x in signature])
+  return [x.hex() for x in pk]
+
+# L-tree, overwrites the pk list like l_tree() in xmss_commons.c
+def l_tree_raw(pk, pub_seedRaw, addr):
+  nodes = bytearray(b''.join(pk))
+  leaf = bytearray(BYTE_LEN_n)
+  a = _addr(addr)
+  _check(load().native_l_tree(len(pk), _out(leaf), _out(nodes), _in(pub_seedRaw), a), 'l_tree')
+  store_addr(a, addr)
+  pk[:] = _split(nodes, len(pk))
+  return bytes(leaf)
+
+def l_tree(pk, pub_seedHex, addr):
+  nodes = [bytes.fromhex(x) for x in pk]
+  leaf = l_tree_raw(nodes, bytes.fromhex(pub_seedHex), addr)
+  pk[:] = [x.hex() for x in nodes]
+  return leaf.hex()
+
+
+####################################################################
+# xmss_leaf and xmss_tree
+
+# wots seeds and leaves of start, ..., end-1 as two buffers of n-byte entries
+def gen_leaves_buf(sk_seedRaw, pub_seedRaw, start, end, subtree_addr = [0, 0, 0],
+                   w = wots_w, w_len = wots_len, seeds = True):
+  num = end - start
+  leaves = bytearray(num * BYTE_LEN_n)
+  seed_buf = bytearray(num * BYTE_LEN_n) if seeds else None
+  _check(load().native_gen_leaves(w, w_len, _out(seed_buf) if seeds else None, _out(leaves),
+                                  _in(sk_seedRaw), _in(pub_seedRaw), start, end,
+                                  _addr(subtree_addr)), 'gen_leaves')
+  return seed_buf, leaves
+
+def _leaf_range(job):
+  (sk_seedRaw, pub_seedRaw, subtree_addr, start, end, w, w_len) = job
+  (seeds, leaves) = gen_leaves_buf(sk_seedRaw, pub_seedRaw, start, end, subtree_addr, w, w_len)
+  return list(zip(_split(seeds, end - start), _split(leaves, end - start)))
+
+# see xmss_leaf.iter_leaves_raw; the chunks run on threads instead of processes
+def iter_leaves_raw(sk_seedRaw, pub_seedRaw, start, end, subtree_addr = [0, 0, 0],
+                    processes = None, chunk_size = None, w = wots_w, w_len = wots_len):
+  if processes is None:
+    processes = multiprocessing.cpu_count()
+  if chunk_size is None:
+    chunk_size = max(1, min(1024, (end - start + 4*processes - 1) // (4*processes)))
+  load()
+
+  jobs = ((bytes(sk_seedRaw), bytes(pub_seedRaw), list(subtree_addr[:3]),
+           i, min(i + chunk_size, end), w, w_len) for i in range(start, end, chunk_size))
+
+  if processes <= 1 or end - start <= chunk_size:
+    for job in jobs:
+      for res in _leaf_range(job):
+        yield res
+    return
+
+  pool = multiprocessing.pool.ThreadPool(processes)
+  try:
+    for chunk in pool.imap(_leaf_range, jobs):
+      for res in chunk:
+        yield res
+  finally:
+    pool.terminate()
+    pool.join()
+
+def gen_leaves_raw(sk_seedRaw, pub_seedRaw, start, end, subtree_addr = [0, 0, 0],
+                   processes = None, chunk_size = None, w = wots_w, w_len = wots_len):
+  return list(iter_leaves_raw(sk_seedRaw, pub_seedRaw, start, end, subtree_addr,
+                              processes, chunk_size, w, w_len))
+
+def gen_leaves(sk_seedHex, pub_seedHex, start, end, subtree_addr = [0, 0, 0],
+               processes = None, chunk_size = None, w = wots_w, w_len = wots_len):
+  res = iter_leaves_raw(bytes.fromhex(sk_seedHex), bytes.fromhex(pub_seedHex), start, end,
+                        subtree_addr, processes, chunk_size, w, w_len)
+  return [leaf.hex() for (seed, leaf) in res]
+
+# see xmss_tree.treehash_raw: one authentication path runs treehash() of
+# xmss_core.c, several share one pass over native leaves
+def treehash_raw(sk_seedRaw, pub_seedRaw, tree_height, leaf_idxs = 0,
+                 subtree_addr = [0, 0, 0], processes = 1, leaves = None):
+  if leaves is None and not isinstance(leaf_idxs, (list, tuple)):
+    root = bytearray(BYTE_LEN_n)
+    auth = bytearray(tree_height * BYTE_LEN_n)
+    _check(load().native_treehash(wots_w, tree_height, _out(root), _out(auth), _in(sk_seedRaw),
+                                  _in(pub_seedRaw), leaf_idxs, _addr(subtree_addr)), 'treehash')
+    return bytes(root), [_split(auth, tree_height)]
+  if leaves is None:
+    leaves = iter_leaves_raw(sk_seedRaw, pub_seedRaw, 0, 1 << tree_height, subtree_addr, processes)
+  return xmss_tree.treehash_raw(sk_seedRaw, pub_seedRaw, tree_height, leaf_idxs,
+                                subtree_addr, processes, leaves)
+
+def treehash(sk_seedHex, pub_seedHex, tree_height, leaf_idxs = 0,
+             subtree_addr = [0, 0, 0], processes = 1):
+  (root, auth_paths) = treehash_raw(bytes.fromhex(sk_seedHex), bytes.fromhex(pub_seedHex), tree_height,
+                                    leaf_idxs, subtree_addr, processes)
+  return root.hex(), [[node.hex() for node in auth] for auth in auth_paths]
+
+
+if __name__ == '__main__':
+  import argparse
+  import sys
+  import time
+
+  from . import wots_function, xmss_leaf
+
+  parser = argparse.ArgumentParser(description='Build the native xmss-reference backend and check it against the Python reference.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-f', '--force', dest='force', action='store_true',
+            help='rebuild the library even if it is up to date')
+  parser.add_argument('-n', '--num', dest='num', type=int, required=False, default=4,
+            help='number of leaves compared')
+  parser.add_argument('-s', '--seed', dest='seed', type=int, required=False, default=123,
+            help='seed of the random inputs')
+
+  args = parser.parse_args()
+
+  try:
+    print("library %s" % build(force=args.force))
+    load()
+  except RuntimeError as e:
+    print(e)
+    sys.exit(1)
+
+  import random
+  rnd = random.Random(args.seed)
+  sk_seed = bytes(rnd.getrandbits(8) for i in range(32))
+  pub_seed = bytes(rnd.getrandbits(8) for i in range(32))
+
+  t = time.perf_counter()
+  ref = xmss_leaf.gen_leaves_raw(sk_seed, pub_seed, 0, args.num, processes=1)
+  t_py = time.perf_counter() - t
+  t = time.perf_counter()
+  res = gen_leaves_raw(sk_seed, pub_seed, 0, args.num, processes=1)
+  t_c = time.perf_counter() - t
+
+  msg = bytes(rnd.getrandbits(8) for i in range(32))
+  addr = [0, 0, 0, 0, 5, 0, 0, 0]
+  seed = ref[0][0]
+  sig = wots_sign_raw(wots_w, msg, seed, pub_seed, list(addr))
+  ok = (res == ref and
+        sig == wots_function.wots_sign_raw(wots_w, msg, seed, pub_seed, list(addr)) and
+        wots_pk_from_sig_raw(wots_w, msg, pub_seed, list(addr), sig) ==
+          wots_pkgen_raw(wots_w, wots_len, seed, pub_seed, list(addr))[0])
+
+  print("%d leaves: Python %.3f s, native %.3f s (%.0fx)" % (args.num, t_py, t_c, t_py / max(t_c, 1e-9)))
+  print("native results match the Python reference" if ok else "MISMATCH between native and Python results")
+  sys.exit(0 if ok else 1)
@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# XMSS parameter sets, following params.c of xmss-reference
+# only SHA-256 with n = 32 is implemented by the Python reference
+
+BYTE_LEN_n = 32
+
+class xmss_params(object):
+  def __init__(self, full_height = 10, d = 1, wots_w = 16, bds_k = 0):
+    self.n = BYTE_LEN_n
+    self.wots_w = wots_w
+    if wots_w == 4:
+      self.wots_log_w = 2
+      self.wots_len2 = 5
+    elif wots_w == 16:
+      self.wots_log_w = 4
+      self.wots_len2 = 3
+    elif wots_w == 256:
+      self.wots_log_w = 8
+      self.wots_len2 = 2
+    else:
+      raise ValueError("unsupported Winternitz parameter %d" % wots_w)
+    self.wots_len1 = 8 * self.n // self.wots_log_w
+    self.wots_len = self.wots_len1 + self.wots_len2
+    self.wots_sig_bytes = self.wots_len * self.n
+
+    self.full_height = full_height
+    self.d = d
+    self.tree_height = full_height // d
+    self.bds_k = bds_k
+
+    if d == 1:
+      # in XMSS, always use fixed 4 bytes for index_bytes
+      self.index_bytes = 4
+    else:
+      # in XMSS^MT, round index_bytes up to nearest byte
+      self.index_bytes = (full_height + 7) // 8
+
+    self.sig_bytes = (self.index_bytes + self.n + d * self.wots_sig_bytes
+                      + full_height * self.n)
+    self.pk_bytes = 2 * self.n
+
+  # secret key size of the BDS implementation (xmss_core_fast.c)
+  def sk_bytes_fast(self):
+    h = self.tree_height
+    n = self.n
+    k = self.bds_k
+    return (self.index_bytes + 4 * n
+            + (2 * self.d - 1) * (
+                (h + 1) * n
+                + 4
+                + h + 1
+                + (4 - ((h + 1) & 0x3))
+                + h * n
+                + (h >> 1) * n
+                + (h - k) * (8 + n)
+                + ((1 << k) - k - 1) * n
+                + 4)
+            + (self.d - 1) * self.wots_sig_bytes)
+
+# OIDs of the XMSS-SHA2_*_256 parameter sets
+XMSS_OIDS = {
+  0x00000001: 10,
+  0x00000002: 16,
+  0x00000003: 20,
+}
+
+def xmss_parse_oid(oid, bds_k = 0):
+  if oid not in XMSS_OIDS:
+    raise ValueError("unsupported XMSS OID 0x%08x" % oid)
+  return xmss_params(XMSS_OIDS[oid], 1, 16, bds_k)
@@ -0,0 +1,231 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# SHA-256 with access to the chaining value.
+#
+# hashlib cannot export or import the 8-word state between two compressions,
+# which is what sha256XMSSprecomp.v keeps in sha256_internal_state (store
+# path) and loads back on continue_intermediate, and what hash_store() and
+# hash_restore() of hash.c move over the bus. sha256_state is a pure-Python
+# SHA-256 context whose state can be exported and imported as 32 bytes (the
+# words big-endian, H0 first, the order of the hardware data_out bus) and
+# which can record the chaining value after every block. It counts the
+# compressions it performs, so the savings of the precomputation can be
+# counted exactly. A context started from the initial value that does not ask
+# for its midstate up front (export, trace) hashes through hashlib.
+
+import hashlib
+import struct
+
+from .hash_function import PADDING_PRF, BYTE_LEN_n
+
+_K = (
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+)
+
+SHA256_IV = (0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19)
+
+_M32 = 0xffffffff
+
+# one compression of a 64-byte block, state: tuple of 8 words
+def sha256_compress(state, block):
+  w = list(struct.unpack('>16I', block))
+  for i in range(16, 64):
+    x = w[i-15]
+    y = w[i-2]
+    s0 = ((x >> 7) | (x << 25)) ^ ((x >> 18) | (x << 14)) ^ (x >> 3)
+    s1 = ((y >> 17) | (y << 15)) ^ ((y >> 19) | (y << 13)) ^ (y >> 10)
+    w.append((w[i-16] + s0 + w[i-7] + s1) & _M32)
+
+  (a, b, c, d, e, f, g, h) = state
+  for i in range(64):
+    s1 = (((e >> 6) | (e << 26)) ^ ((e >> 11) | (e << 21)) ^ ((e >> 25) | (e << 7))) & _M32
+    t1 = h + s1 + ((e & f) ^ (~e & g)) + _K[i] + w[i]
+    s0 = (((a >> 2) | (a << 30)) ^ ((a >> 13) | (a << 19)) ^ ((a >> 22) | (a << 10))) & _M32
+    t2 = s0 + ((a & b) ^ (a & c) ^ (b & c))
+    h = g
+    g = f
+    f = e
+    e = (d + t1) & _M32
+    d = c
+    c = b
+    b = a
+    a = (t1 + t2) & _M32
+
+  return ((state[0] + a) & _M32, (state[1] + b) & _M32, (state[2] + c) & _M32, (state[3] + d) & _M32,
+          (state[4] + e) & _M32, (state[5] + f) & _M32, (state[6] + g) & _M32, (state[7] + h) & _M32)
+
+def state_to_raw(state):
+  return struct.pack('>8I', *state)
+
+def state_from_raw(raw):
+  return struct.unpack('>8I', bytes(raw))
+
+# padding of a message of length bytes
+def sha256_padding(length):
+  return b'\x80' + b'\x00' * ((55 - length) % 64) + struct.pack('>Q', 8 * length)
+
+# number of compressions of a length-byte message
+def sha256_blocks(length):
+  return (length + 8) // 64 + 1
+
+
+class sha256_state(object):
+  # state: chaining value to start from (8 words or 32 bytes), default the IV
+  # length: number of message bytes already absorbed into it, a multiple of 64
+  # trace: keep the chaining value after every block in self.states
+  # export: compress in Python so midstate() can be called; a context started
+  #   from the IV without export or trace hashes with hashlib and has no
+  #   midstate
+  def __init__(self, data = b'', state = None, length = 0, trace = False, export = False):
+    if length % 64:
+      raise ValueError("a midstate covers whole blocks, got %d bytes" % length)
+    self.length = length
+    self.buf = b''
+    self.compressions = 0
+    self.states = [] if trace else None
+    if state is None and not trace and not export:
+      self.state = None
+      self._fast = hashlib.sha256()
+    else:
+      if state is None:
+        state = SHA256_IV
+      elif isinstance(state, (bytes, bytearray)):
+        state = state_from_raw(state)
+      self.state = tuple(state)
+      self._fast = None
+    self.update(data)
+
+  def _compress(self, block):
+    self.state = sha256_compress(self.state, block)
+    self.compressions += 1
+    if self.states is not None:
+      self.states.append(self.state)
+
+  def update(self, data):
+    data = bytes(data)
+    if self._fast is not None:
+      # hashlib keeps the message, only the partial last block is tracked
+      self._fast.update(data)
+      total = len(self.buf) + len(data)
+      rest = total % 64
+      if len(data) >= rest:
+        self.buf = data[len(data)-rest:]
+      else:
+        self.buf = self.buf[len(self.buf)-(rest-len(data)):] + data
+      self.compressions += (total - rest) // 64
+      self.length += total - rest
+      return
+    data = self.buf + data
+    full = len(data) - len(data) % 64
+    for i in range(0, full, 64):
+      self._compress(data[i:i+64])
+    self.buf = data[full:]
+    self.length += full
+
+  # chaining value after the last full block, 32 bytes
+  def midstate(self):
+    if self._fast is not None:
+      raise ValueError("no midstate on the hashlib path, create the context with export = True")
+    return state_to_raw(self.state)
+
+  def copy(self):
+    res = sha256_state.__new__(sha256_state)
+    res.__dict__.update(self.__dict__)
+    if self._fast is not None:
+      res._fast = self._fast.copy()
+    if self.states is not None:
+      res.states = list(self.states)
+    return res
+
+  # pad and hash the last blocks in place, returns the digest
+  def final(self):
+    res = self._fast.digest() if self._fast is not None else None
+    self.update(sha256_padding(self.length + len(self.buf)))
+    return res if res is not None else self.midstate()
+
+  # the digest, self is left unchanged
+  def digest(self):
+    return self.copy().final()
+
+  def hexdigest(self):
+    return self.digest().hex()
+
+# plain SHA-256 from the IV, fast path through hashlib
+def sha256_digest(data):
+  return hashlib.sha256(data).digest()
+
+
+####################################################################
+# the PRF precomputation of sha256XMSSprecomp.v and hash.c
+
+# chaining value after the first PRF block (padding || key), the value stored
+# by the store_intermediate path and by hash_store()
+def prf_midstate_raw(keyRaw):
+  return sha256_state(PADDING_PRF + bytes(keyRaw), export = True).midstate()
+
+# PRF continued from a stored chaining value, the continue_intermediate path:
+# one compression of input || padding
+def prf_continue_raw(midstate, inRaw):
+  return sha256_state(inRaw, midstate, 2 * BYTE_LEN_n).final()
+
+# chaining values after every block of a message
+def sha256_block_states(message):
+  ctx = sha256_state(message, trace = True)
+  ctx.final()
+  return [state_to_raw(s) for s in ctx.states]
+
+
+if __name__ == '__main__':
+  import argparse
+
+  parser = argparse.ArgumentParser(description='Print the SHA-256 chaining values after every block.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-m', '--message', dest='message', type=str, required=False, default=None,
+            help='message (hex)')
+  parser.add_argument('-k', '--prf_key', dest='prf_key', type=str, required=False, default=None,
+            help='PRF key (hex): print the PRF midstate, and with -m the PRF of the message from it')
+  parser.add_argument('-s', '--state', dest='state', type=str, required=False, default=None,
+            help='chaining value (hex) to continue from, covering --length bytes')
+  parser.add_argument('-l', '--length', dest='length', type=int, required=False, default=64,
+            help='number of message bytes covered by --state')
+
+  args = parser.parse_args()
+
+  message = bytes.fromhex(args.message) if args.message is not None else b''
+  if args.prf_key is not None:
+    mid = prf_midstate_raw(bytes.fromhex(args.prf_key))
+    print("midstate %s" % mid.hex())
+    if args.message is not None:
+      print("prf      %s" % prf_continue_raw(mid, message).hex())
+  else:
+    ctx = sha256_state(state = bytes.fromhex(args.state) if args.state else None,
+                       length = args.length if args.state else 0, trace = True)
+    ctx.update(message)
+    digest = ctx.final()
+    for (i, s) in enumerate(ctx.states):
+      print("block %3d %s" % (i, state_to_raw(s).hex()))
+    print("digest    %s" % digest.hex())
+    print("%d compressions" % ctx.compressions)
@@ -0,0 +1,55 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# hash call counts of traced leaves and batched chains, run with: make unit_test
+
+from . import hash_function, xmss_leaf
+from .hash_trace import hash_tracer, trace_stats, FUNC_PRF, FUNC_THASH_F, FUNC_THASH_H
+from .vector_io import vector_file
+from .wots_batch import wots_pkgen_batch
+from .wots_function import wots_len
+
+SK_SEED = bytes(range(32))
+PUB_SEED = bytes(range(32, 64))
+
+def test_leaf_trace(tmp_path):
+  path = str(tmp_path / 'leaf.bin')
+  with hash_tracer(path) as t:
+    xmss_leaf.gen_leaves_raw(SK_SEED, PUB_SEED, 0, 1, processes=1)
+  assert not hash_function.tracing
+
+  # w = 16: 67 chains of 15 thash_f, an L-tree of 66 thash_h, every thash_f
+  # with 2 and every thash_h with 3 PRFs, plus get_seed and expand_seed
+  chains = wots_len * 15
+  counts = [s.count for s in t.stats]
+  assert counts[FUNC_THASH_F] == chains
+  assert counts[FUNC_THASH_H] == wots_len - 1
+  assert counts[FUNC_PRF] == 1 + wots_len + 2 * chains + 3 * (wots_len - 1)
+  assert [s.count for s in trace_stats(path)] == counts
+
+  # the key and mask PRFs of the thash calls are nested in them
+  with vector_file(path) as trace:
+    nested = sum(1 for i in range(len(trace))
+                 if trace.field(i, 'func')[0] == FUNC_PRF and trace.field(i, 'depth')[0] > 0)
+  assert nested == 2 * chains + 3 * (wots_len - 1)
+
+def test_batched_chains_trace():
+  with hash_tracer() as t:
+    wots_pkgen_batch(16, wots_len, SK_SEED.hex(), PUB_SEED.hex(), [0] * 8)
+  assert t.stats[FUNC_THASH_F].count == wots_len * 15
+  assert t.stats[FUNC_PRF].count == wots_len + 2 * wots_len * 15
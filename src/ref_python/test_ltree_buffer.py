@@ -0,0 +1,61 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# buffered L-tree against l_tree_raw() of wots_function.py,
+# run with: make unit_test
+
+import pytest
+
+from . import wots_function
+from .ltree_buffer import ltree_engine
+from .wots_function import wots_len
+
+PUB_SEED = bytes(range(32, 64))
+
+def nodes(seed, w_len = wots_len):
+  return [bytes((seed + 7 * i + j) & 0xff for j in range(32)) for i in range(w_len)]
+
+def addr():
+  return [0, 0, 0, 1, 5, 0, 0, 0]
+
+@pytest.mark.parametrize('cache_size', [0, 1024])
+def test_matches_l_tree_raw(cache_size):
+  engine = ltree_engine(cache_size = cache_size)
+  for seed in range(3):
+    pk = nodes(seed)
+    ref_addr = addr()
+    ref = wots_function.l_tree_raw(list(pk), PUB_SEED, ref_addr)
+    assert engine.l_tree_raw(pk, PUB_SEED, addr()) == ref
+    assert engine.l_tree_raw(b''.join(pk), PUB_SEED, addr()) == ref
+
+  # an odd number of nodes on several heights
+  pk = nodes(9, 5)
+  assert ltree_engine(5).l_tree_raw(pk, PUB_SEED, addr()) == wots_function.l_tree_raw(list(pk), PUB_SEED, addr())
+
+def test_rejects_bad_lengths():
+  engine = ltree_engine()
+  pk = nodes(1)
+  with pytest.raises(ValueError):
+    engine.l_tree_raw(pk[:-1], PUB_SEED, addr())
+  with pytest.raises(ValueError):
+    engine.l_tree_raw(pk[:-1] + [pk[-1][:2]], PUB_SEED, addr())
+  with pytest.raises(ValueError):
+    engine.l_tree_raw(b'\x00\x00', PUB_SEED, addr())
+  # the buffer is unchanged in size, later calls still work
+  assert len(engine.buf) == wots_len * 32
+  assert engine.l_tree_raw(pk, PUB_SEED, addr()) == wots_function.l_tree_raw(list(pk), PUB_SEED, addr())
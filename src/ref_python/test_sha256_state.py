@@ -0,0 +1,49 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# SHA-256 contexts against hashlib, run with: make unit_test
+
+import hashlib
+
+import pytest
+
+from .sha256_state import sha256_state, sha256_block_states, state_to_raw
+
+MESSAGE = bytes(range(256)) * 3
+
+@pytest.mark.parametrize('export', [False, True])
+def test_digest(export):
+  for step in (1, 7, 63, 64, 65, 200):
+    ctx = sha256_state(export = export)
+    for i in range(0, len(MESSAGE), step):
+      ctx.update(MESSAGE[i:i+step])
+      assert len(ctx.buf) < 64
+    assert ctx.length + len(ctx.buf) == len(MESSAGE)
+    assert ctx.compressions == len(MESSAGE) // 64
+    assert ctx.digest() == hashlib.sha256(MESSAGE).digest()
+
+def test_midstate():
+  with pytest.raises(ValueError):
+    sha256_state(MESSAGE).midstate()
+  ctx = sha256_state(MESSAGE[:130], export = True)
+  assert ctx.midstate() == sha256_block_states(MESSAGE[:130])[1]
+
+  # continued from the exported midstate
+  rest = sha256_state(MESSAGE[128:], ctx.midstate(), 128)
+  assert rest.final() == hashlib.sha256(MESSAGE).digest()
+  assert state_to_raw(rest.state) == rest.midstate()
@@ -0,0 +1,63 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# binary vector files, run with: make unit_test
+
+import os
+
+import pytest
+
+from .vector_io import vector_writer, vector_file
+
+FIELDS = [('key', 32), ('pk', 32, 3)]
+
+def write(path, num):
+  with vector_writer(path, FIELDS) as f:
+    for v in range(num):
+      f.write(bytes([v]) * 32, [bytes([v, j]) * 16 for j in range(3)])
+
+def open_fds():
+  return len(os.listdir('/proc/self/fd'))
+
+def test_round_trip(tmp_path):
+  path = str(tmp_path / 'v.bin')
+  write(path, 3)
+  with vector_file(path) as vec:
+    assert len(vec) == 3
+    assert vec[2] == (bytes([2]) * 32, [bytes([2, j]) * 16 for j in range(3)])
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc')
+def test_bad_files_are_closed(tmp_path):
+  path = str(tmp_path / 'v.bin')
+  write(path, 3)
+  data = open(path, 'rb').read()
+  bad = {
+    'empty': b'',
+    'short': data[:10],
+    'magic': b'Y' + data[1:],
+    'fields': data[:40],
+    'records': data[:-1],
+  }
+  before = open_fds()
+  for (name, content) in bad.items():
+    bad_path = str(tmp_path / name)
+    with open(bad_path, 'wb') as f:
+      f.write(content)
+    with pytest.raises(ValueError):
+      vector_file(bad_path)
+  assert open_fds() == before
@@ -0,0 +1,83 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# batched chain engine against the chain-by-chain functions of
+# wots_function.py, run with: make unit_test
+
+import pytest
+
+from . import wots_function
+from .wots_batch import gen_chains_raw, wots_pkgen_batch, wots_sign_batch, wots_pk_from_sig_batch, wots_pkgen_many_raw
+from .hash_address import set_chain_addr
+from .wots_function import wots_lengths
+
+SEED = bytes(range(32)).hex()
+PUB_SEED = bytes(range(32, 64)).hex()
+MSG = bytes(range(100, 132)).hex()
+
+def addr():
+  return [1, 0, 7, 0, 3, 0, 0, 0]
+
+@pytest.mark.parametrize('w', [4, 16, 256])
+def test_wots_functions(w):
+  (_, len1, len2) = wots_lengths(w)
+  w_len = len1 + len2
+
+  (a, b) = (addr(), addr())
+  (pk, a_ret) = wots_function.wots_pkgen(w, w_len, SEED, PUB_SEED, a)
+  (pk_batch, b_ret) = wots_pkgen_batch(w, w_len, SEED, PUB_SEED, b)
+  assert pk_batch == pk
+  assert list(b_ret) == list(a_ret)
+
+  (a, b) = (addr(), addr())
+  sig = wots_function.wots_sign(w, MSG, SEED, PUB_SEED, a)
+  assert wots_sign_batch(w, MSG, SEED, PUB_SEED, b) == sig
+  assert b == a
+
+  (a, b) = (addr(), addr())
+  assert wots_pk_from_sig_batch(w, MSG, PUB_SEED, b, sig) == pk
+  assert wots_function.wots_pk_from_sig(w, MSG, PUB_SEED, a, sig) == pk
+  assert b == a
+
+def test_uneven_chains():
+  w = 16
+  inputs = [bytes([k]) * 32 for k in range(6)]
+  starts = [0, 3, 15, 7, 14, 1]
+  steps = [15, 2, 1, 0, 5, 9]
+  seeds = [bytes([k]) * 32 for k in range(10, 16)]
+  addrs = [[k, 0, 2, 0, 1, k, 0, 0] for k in range(6)]
+  ends = gen_chains_raw(w, inputs, starts, steps, seeds, addrs)
+  for k in range(6):
+    assert ends[k] == wots_function.gen_chain_raw(w, inputs[k], starts[k], steps[k], seeds[k], list(addrs[k]))
+
+  # one shared pub_seed and address, chain k at chain address k
+  ends = gen_chains_raw(w, inputs, starts, steps, seeds[0], addr())
+  for k in range(6):
+    chain_addr = set_chain_addr(k, addr())
+    assert ends[k] == wots_function.gen_chain_raw(w, inputs[k], starts[k], steps[k], seeds[0], chain_addr)
+
+def test_pkgen_many():
+  w = 16
+  w_len = sum(wots_lengths(w)[1:])
+  seeds = [bytes([k]) * 32 for k in range(3)]
+  pub_seeds = [bytes([k]) * 32 for k in range(3, 6)]
+  addrs = [[k, 1, 2, 3, 4, 0, 0, 0] for k in range(3)]
+  pks = wots_pkgen_many_raw(w, w_len, seeds, pub_seeds, addrs)
+  assert len(pks) == 3
+  for k in range(3):
+    assert pks[k] == wots_function.wots_pkgen_raw(w, w_len, seeds[k], pub_seeds[k], list(addrs[k]))[0]
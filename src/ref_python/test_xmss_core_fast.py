@@ -0,0 +1,44 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# sign and verify with the BDS signer for every Winternitz parameter,
+# run with: make unit_test
+
+import pytest
+
+from .params import xmss_params
+from .xmss_core_fast import xmss_core_keypair, xmss_core_sign, xmss_core_sign_open
+
+SK_SEED = bytes(range(32))
+SK_PRF = bytes(range(32, 64))
+PUB_SEED = bytes(range(64, 96))
+
+@pytest.mark.parametrize('w', [4, 16, 256])
+def test_sign_open(w):
+  params = xmss_params(full_height = 2, wots_w = w)
+  (pk, sk) = xmss_core_keypair(params, SK_SEED, SK_PRF, PUB_SEED)
+  msg = b'message %d' % w
+  for i in range(1 << params.tree_height):
+    (sm, sk) = xmss_core_sign(params, sk, msg)
+    assert len(sm) == params.sig_bytes + len(msg)
+    assert int.from_bytes(sm[:params.index_bytes], 'big') == i
+    assert xmss_core_sign_open(params, sm, pk) == msg
+
+    forged = bytearray(sm)
+    forged[-1] ^= 1
+    assert xmss_core_sign_open(params, forged, pk) is None
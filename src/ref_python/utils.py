@@ -17,12 +17,14 @@
 #
 
 
+#input: integer, byte length
+#output: outlen big-endian bytes of input, higher bytes are dropped
+
+def ull_to_bytes_raw(inInt, outlen):
+  return (inInt & ((1 << (8*outlen)) - 1)).to_bytes(outlen, 'big')
+
 #input: integer, byte length
 #output: hex format of input
 
 def ull_to_bytes(inInt, outlen):
-  out = ''
-  for i in range(outlen):
-    out=('{:02x}'.format(inInt & 0xff)) + out;
-    inInt = inInt >> 8;
-  return out
\ No newline at end of file
+  return ull_to_bytes_raw(inInt, outlen).hex()
\ No newline at end of file
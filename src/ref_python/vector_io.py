@@ -0,0 +1,281 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Test vector files for the testbenches.
+#
+# A vector is a fixed list of fields, a field is an array of `count` words of
+# `width` bytes (e.g. a WOTS public key is 67 words of 32 bytes). One streaming
+# writer produces three formats:
+#   'bin'  - binary container: fixed header, then the vectors as fixed-size
+#            records of raw big-endian words, memory-mappable by vector_file
+#   'memh' - one hex word per line, for $fscanf("%h") and $readmemh
+#   'memb' - one binary word per line, the old ASCII-bit format for
+#            $fscanf("%b") and $readmemb
+#
+# Container layout (all header integers little-endian):
+#   magic 'XMSSVEC1' | header size (4) | record size (4) | number of vectors (8)
+#   | number of fields (4) | per field: name (16, NUL padded), width (4), count (4)
+#   | zero padding up to header size (a multiple of 64) | records
+
+import mmap
+import os
+import struct
+import sys
+
+VECTOR_MAGIC = b'XMSSVEC1'
+
+_HEADER = struct.Struct('<8sIIQI')
+_FIELD = struct.Struct('<16sII')
+_FIELD_NAME = 16
+_NUM_OFFSET = 16
+
+# field description: name, word width in bytes, number of words
+class vector_field(object):
+  __slots__ = ('name', 'width', 'count')
+
+  def __init__(self, name, width = 32, count = 1):
+    self.name = name
+    self.width = width
+    self.count = count
+
+  def size(self):
+    return self.width * self.count
+
+  def __repr__(self):
+    return 'vector_field(%r, %d, %d)' % (self.name, self.width, self.count)
+
+def _fields(fields):
+  return [f if isinstance(f, vector_field) else vector_field(*f) for f in fields]
+
+# value of a field as one byte string of width*count bytes
+# accepts bytes-like objects, lists of words, integers and hex strings
+def _field_bytes(field, value):
+  if isinstance(value, (list, tuple)):
+    if len(value) != field.count:
+      raise ValueError("field %s has %d words, got %d" % (field.name, field.count, len(value)))
+    return b''.join(_word_bytes(field, x) for x in value)
+  if field.count == 1:
+    return _word_bytes(field, value)
+  value = bytes(value)
+  if len(value) != field.size():
+    raise ValueError("field %s has %d bytes, got %d" % (field.name, field.size(), len(value)))
+  return value
+
+def _word_bytes(field, word):
+  if isinstance(word, int):
+    return word.to_bytes(field.width, 'big')
+  if isinstance(word, str):
+    word = bytes.fromhex(word)
+  word = bytes(word)
+  if len(word) != field.width:
+    raise ValueError("field %s has %d-byte words, got %d" % (field.name, field.width, len(word)))
+  return word
+
+
+class vector_writer(object):
+  # path: output file name, '-' writes a text format to stdout
+  # fields: list of vector_field or (name, width, count) tuples
+  def __init__(self, path, fields, fmt = 'bin'):
+    if fmt not in ('bin', 'memh', 'memb'):
+      raise ValueError("unknown vector format %r" % fmt)
+    self.fields = _fields(fields)
+    self.fmt = fmt
+    self.num = 0
+    self.record_size = sum(f.size() for f in self.fields)
+    if fmt == 'bin':
+      header = vector_header(self.fields, 0)
+    if path == '-':
+      if fmt == 'bin':
+        raise ValueError("the binary format needs a seekable file")
+      self.f = sys.stdout
+      self._close = False
+    else:
+      self.f = open(path, 'wb' if fmt == 'bin' else 'w')
+      self._close = True
+
+    if fmt == 'bin':
+      self.f.write(header)
+    else:
+      # one format string per field, e.g. '%064x\n'
+      digits = 2 if fmt == 'memh' else 8
+      conv = 'x' if fmt == 'memh' else 'b'
+      self._line = ['%0' + str(digits * f.width) + conv + '\n' for f in self.fields]
+
+  def write(self, *values):
+    if len(values) != len(self.fields):
+      raise ValueError("vector has %d fields, got %d values" % (len(self.fields), len(values)))
+    if self.fmt == 'bin':
+      self.f.write(b''.join(_field_bytes(f, v) for f, v in zip(self.fields, values)))
+    else:
+      out = []
+      for (k, (field, value)) in enumerate(zip(self.fields, values)):
+        raw = _field_bytes(field, value)
+        w = field.width
+        for i in range(field.count):
+          out.append(self._line[k] % int.from_bytes(raw[w*i:w*(i+1)], 'big'))
+      self.f.write(''.join(out))
+    self.num += 1
+
+  def close(self):
+    if self.f is None:
+      return
+    if self.fmt == 'bin':
+      self.f.seek(_NUM_OFFSET)
+      self.f.write(struct.pack('<Q', self.num))
+    if self._close:
+      self.f.close()
+    else:
+      self.f.flush()
+    self.f = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+# raises ValueError on field names that do not fit the 16-byte name slot
+# (they would read back truncated) or that are not unique
+def vector_header(fields, num):
+  fields = _fields(fields)
+  names = set()
+  for f in fields:
+    name = f.name.encode()
+    if len(name) > _FIELD_NAME:
+      raise ValueError("field name %r is longer than %d bytes" % (f.name, _FIELD_NAME))
+    if name in names:
+      raise ValueError("duplicate field name %r" % f.name)
+    names.add(name)
+  size = _HEADER.size + _FIELD.size * len(fields)
+  size = (size + 63) & ~63
+  record_size = sum(f.size() for f in fields)
+  header = _HEADER.pack(VECTOR_MAGIC, size, record_size, num, len(fields))
+  header += b''.join(_FIELD.pack(f.name.encode(), f.width, f.count) for f in fields)
+  return header + b'\x00' * (size - len(header))
+
+
+# read-only, memory-mapped view of a binary vector file
+# vec[i] returns the fields of vector i, a field with count > 1 as list of words
+class vector_file(object):
+  def __init__(self, path):
+    self.f = open(path, 'rb')
+    self.map = None
+    try:
+      self._parse(path)
+    except Exception:
+      self.close()
+      raise
+
+  def _parse(self, path):
+    if os.fstat(self.f.fileno()).st_size < _HEADER.size:
+      raise ValueError("%s is too short for a vector file" % path)
+    self.map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+    (magic, self.header_size, self.record_size, self.num, num_fields) = _HEADER.unpack_from(self.map, 0)
+    if magic != VECTOR_MAGIC:
+      raise ValueError("%s is not a vector file" % path)
+    if _HEADER.size + num_fields * _FIELD.size > min(self.header_size, len(self.map)):
+      raise ValueError("%s is truncated" % path)
+    self.fields = []
+    for k in range(num_fields):
+      (name, width, count) = _FIELD.unpack_from(self.map, _HEADER.size + k * _FIELD.size)
+      self.fields.append(vector_field(name.rstrip(b'\x00').decode(), width, count))
+    if self.header_size + self.num * self.record_size > len(self.map):
+      raise ValueError("%s is truncated" % path)
+    self._offsets = {}
+    offset = 0
+    for field in self.fields:
+      self._offsets[field.name] = (offset, field)
+      offset += field.size()
+
+  def __len__(self):
+    return self.num
+
+  def _start(self, i):
+    if not 0 <= i < self.num:
+      raise IndexError("vector index out of range")
+    return self.header_size + i * self.record_size
+
+  # raw record i as bytes; slices of the map are copies, so no exported
+  # buffer keeps close() from unmapping the file
+  def record(self, i):
+    start = self._start(i)
+    return self.map[start:start + self.record_size]
+
+  # field of vector i
+  def field(self, i, name):
+    (offset, field) = self._offsets[name]
+    start = self._start(i) + offset
+    raw = self.map[start:start + field.size()]
+    if field.count == 1:
+      return raw
+    w = field.width
+    return [raw[w*j:w*(j+1)] for j in range(field.count)]
+
+  def __getitem__(self, i):
+    return tuple(self.field(i, f.name) for f in self.fields)
+
+  def __iter__(self):
+    for i in range(self.num):
+      yield self[i]
+
+  def close(self):
+    if self.map is not None:
+      self.map.close()
+    self.f.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+# convert (a subset of the fields of) a binary vector file into a text format
+def export_vectors(bin_path, out_path, names = None, fmt = 'memh'):
+  with vector_file(bin_path) as vec:
+    if names is None:
+      names = [f.name for f in vec.fields]
+    fields = [vec._offsets[name][1] for name in names]
+    with vector_writer(out_path, fields, fmt) as out:
+      for i in range(len(vec)):
+        out.write(*[vec.field(i, name) for name in names])
+
+
+if __name__ == '__main__':
+  import argparse
+
+  parser = argparse.ArgumentParser(description='Inspect or export a binary test vector file.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('file', type=str,
+            help='binary vector file')
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False, default=None,
+            help='export to this file (- for stdout) instead of printing the header')
+  parser.add_argument('-f', '--fields', dest='fields', type=str, nargs='*', default=None,
+            help='fields to export (default: all)')
+  parser.add_argument('--format', dest='fmt', type=str, required=False, default='memh',
+            choices=['memh', 'memb'],
+            help='export format')
+
+  args = parser.parse_args()
+
+  if args.out is None:
+    with vector_file(args.file) as vec:
+      print("%d vectors of %d bytes" % (len(vec), vec.record_size))
+      for field in vec.fields:
+        print("  %-16s %4d x %d bytes" % (field.name, field.count, field.width))
+  else:
+    export_vectors(args.file, args.out, args.fields, args.fmt)
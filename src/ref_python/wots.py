@@ -17,13 +17,8 @@
 #
 
 
-from hash import *
-from utils import *
-from hash_address import *
-from wots_function import *
+from .wots_function import get_seed, wots_pkgen, l_tree, wots_sign, wots_pk_from_sig
 import random
-from random import randint
-import math
 
 # seed for random() function
 s = 123
@@ -33,7 +28,7 @@ random.seed(s)
 BYTE_LEN_n = 32
 wots_w = 16 # Winternitz parameter
 wots_log_w = 4
-wots_len1 = (8*BYTE_LEN_n/wots_log_w)
+wots_len1 = (8*BYTE_LEN_n//wots_log_w)
 wots_len2 = 3
 wots_len = wots_len1 + wots_len2
 wots_sig_bytes = wots_len*BYTE_LEN_n
@@ -67,12 +62,12 @@ l_tree_addr[3] = 1
 
 print("Results from Python:\n")
 
-print "check wots params:"
-print "------wots_w = %d" %wots_w
-print "------n = %d" %BYTE_LEN_n
-print "------wots_len1 = %d" %wots_len1
-print "------wots_len2 = %d" %wots_len2
-print "------wots_len = %d\n" %wots_len
+print("check wots params:")
+print("------wots_w = %d" %wots_w)
+print("------n = %d" %BYTE_LEN_n)
+print("------wots_len1 = %d" %wots_len1)
+print("------wots_len2 = %d" %wots_len2)
+print("------wots_len = %d\n" %wots_len)
 
  
 wots_seed = get_seed(seed, addr)
@@ -87,21 +82,21 @@ for i in range(wots_len):
 leaf = l_tree(pk_l_tree, pub_seed, l_tree_addr)
 
 print("\n  ----------------------------------------------");
-print "  computing leaf by use of l_tree..."
-print "  leaf = {0:064x}".format(int(leaf, 16))
+print("  computing leaf by use of l_tree...")
+print("  leaf = {0:064x}".format(int(leaf, 16)))
 print("  ----------------------------------------------\n");
   
-print "signing...\n"
+print("signing...\n")
 signature = wots_sign(wots_w, msg, seed, pub_seed, addr)
  
-print "verifying...\n"
+print("verifying...\n")
 pk_from_verification = wots_pk_from_sig(wots_w, msg, pub_seed, addr, signature)
 
-print "testing result:"
+print("testing result:")
 if (pk_gen == pk_from_verification):
-  print "  python result: wots testing (key gen, sign, and verify) passed!"
+  print("  python result: wots testing (key gen, sign, and verify) passed!")
 else:
-  print "  wots testing fails."
+  print("  wots testing fails.")
   
 f = open("pk_py.out", "w")
 for i in range(wots_len):
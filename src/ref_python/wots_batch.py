@@ -0,0 +1,138 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Batched WOTS chain engine: all chains are advanced one hash step at a time
+# in lockstep. Addresses and bitmask XORs are handled as numpy arrays, only
+# the sha256 calls remain per chain.
+
+import numpy as np
+
+from . import hash_function
+from .hash_function import prf_raw, core_hash_raw, thash_f_raw, PADDING_F
+from .hash_address import set_chain_addr, set_hash_addr, set_key_and_mask
+from .wots_function import expand_seed_raw, chain_lengths
+
+
+# advance a batch of chains, chain k runs steps[k] hashes starting at starts[k]
+# input:  list of n-byte node values
+#         pub_seed as one byte string or a list with one entry per chain
+#         addr as one 8-word address (chain k gets chain address chain_addrs[k],
+#           default k) or a list with one 8-word address per chain
+# output: list of n-byte chain ends
+def gen_chains_raw(w, inputs, starts, steps, pub_seed, addr, chain_addrs = None):
+  num = len(inputs)
+  if num == 0:
+    return []
+  n = len(inputs[0])
+
+  nodes = np.frombuffer(b''.join(bytes(x) for x in inputs), dtype=np.uint8).reshape(num, n).copy()
+  starts = np.asarray(starts, dtype=np.int64)
+  ends = np.minimum(starts + np.asarray(steps, dtype=np.int64), w)
+
+  addrs = np.empty((num, 8), dtype='>u4')
+  if len(addr) == 8 and not hasattr(addr[0], '__len__'):
+    addrs[:] = addr
+    addrs[:, 5] = np.arange(num) if chain_addrs is None else chain_addrs
+  else:
+    addrs[:] = addr
+
+  if isinstance(pub_seed, (list, tuple)):
+    seeds = [bytes(x) for x in pub_seed]
+  else:
+    seeds = [bytes(pub_seed)] * num
+
+  for i in range(int(starts.min()), int(ends.max())):
+    active = np.flatnonzero((starts <= i) & (i < ends))
+    if active.size == 0:
+      continue
+
+    step_addrs = addrs[active]
+    step_addrs[:, 6] = i
+    if hash_function.tracing:
+      # one thash_f_raw call per chain, so hash_trace records it
+      out = b''.join(thash_f_raw(nodes[k].tobytes(), seeds[k], [int(x) for x in step_addrs[j]])
+                     for j, k in enumerate(active))
+      nodes[active] = np.frombuffer(out, dtype=np.uint8).reshape(-1, n)
+      continue
+    step_addrs[:, 7] = 0
+    key_addrs = step_addrs.tobytes()
+    step_addrs[:, 7] = 1
+    mask_addrs = step_addrs.tobytes()
+
+    keys = []
+    masks = []
+    for j, k in enumerate(active):
+      keys.append(prf_raw(key_addrs[32*j:32*(j+1)], seeds[k]))
+      masks.append(prf_raw(mask_addrs[32*j:32*(j+1)], seeds[k]))
+
+    masked = (nodes[active] ^ np.frombuffer(b''.join(masks), dtype=np.uint8).reshape(-1, n)).tobytes()
+
+    out = b''.join(core_hash_raw(PADDING_F + keys[j] + masked[n*j:n*(j+1)]) for j in range(active.size))
+    nodes[active] = np.frombuffer(out, dtype=np.uint8).reshape(-1, n)
+
+  return [nodes[k].tobytes() for k in range(num)]
+
+# leave a single addr list the way the chain-by-chain loop in wots_function leaves it
+def _chain_loop_addr(addr, starts, steps, w):
+  ends = [min(s + l, w) for s, l in zip(starts, steps)]
+  addr = set_chain_addr(len(starts)-1, addr)
+  ran = [k for k in range(len(starts)) if ends[k] > starts[k]]
+  if ran:
+    addr = set_hash_addr(ends[ran[-1]]-1, addr)
+    addr = set_key_and_mask(1, addr)
+  return addr
+
+# public keys of many WOTS keys in one batch, e.g. all vectors of a testbench
+# input:  lists with one seed, pub_seed and 8-word address per key
+# output: one list of w_len n-byte nodes per key
+def wots_pkgen_many_raw(w, w_len, seedsRaw, pub_seedsRaw, addrs):
+  inputs = []
+  seeds = []
+  chain_addrs = []
+  for (seedRaw, pub_seedRaw, addr) in zip(seedsRaw, pub_seedsRaw, addrs):
+    inputs += expand_seed_raw(seedRaw, w_len)
+    seeds += [pub_seedRaw] * w_len
+    chain_addrs += [set_chain_addr(i, list(addr)) for i in range(w_len)]
+  nodes = gen_chains_raw(w, inputs, [0] * len(inputs), [w-1] * len(inputs), seeds, chain_addrs)
+  return [nodes[w_len*j:w_len*(j+1)] for j in range(len(seedsRaw))]
+
+# batched counterparts of the functions in wots_function.py, same call signatures
+
+def wots_pkgen_batch(w, w_len, seedHex, pub_seedHex, addr):
+  outseed = expand_seed_raw(bytes.fromhex(seedHex), w_len)
+  starts = [0] * w_len
+  steps = [w-1] * w_len
+  pk = gen_chains_raw(w, outseed, starts, steps, bytes.fromhex(pub_seedHex), addr)
+  addr = _chain_loop_addr(addr, starts, steps, w)
+  return [x.hex() for x in pk], addr
+
+def wots_sign_batch(w, msg, seedHex, pub_seedHex, addr):
+  lengths = chain_lengths(msg, w)
+  outseed = expand_seed_raw(bytes.fromhex(seedHex), len(lengths))
+  starts = [0] * len(lengths)
+  sig = gen_chains_raw(w, outseed, starts, lengths, bytes.fromhex(pub_seedHex), addr)
+  _chain_loop_addr(addr, starts, lengths, w)
+  return [x.hex() for x in sig]
+
+def wots_pk_from_sig_batch(w, msg, pub_seed, addr = [], signature = []):
+  lengths = chain_lengths(msg, w)
+  steps = [w-1-l for l in lengths]
+  inputs = [bytes.fromhex(signature[i]) for i in range(len(lengths))]
+  pk_from_ver = gen_chains_raw(w, inputs, lengths, steps, bytes.fromhex(pub_seed), addr)
+  _chain_loop_addr(addr, lengths, steps, w)
+  return [x.hex() for x in pk_from_ver]
@@ -17,12 +17,14 @@
 #
 
 
-from hash import *
-from utils import *
-from hash_address import *
+from .hash_function import prf_raw, addr_to_raw, thash_f_raw, thash_h_raw
+from .utils import ull_to_bytes_raw
+from .hash_address import set_chain_addr, set_hash_addr, set_key_and_mask, set_tree_height, set_tree_index, \
+                           as_xmss_addr, store_addr
+import struct
 import random
+from itertools import chain
 from random import randint
-import math
 
 # seed for random() function
 s = 123
@@ -32,145 +34,192 @@ random.seed(s)
 BYTE_LEN_n = 32
 wots_w = 16 # Winternitz parameter
 wots_log_w = 4
-wots_len1 = (8*BYTE_LEN_n/wots_log_w)
+wots_len1 = (8*BYTE_LEN_n//wots_log_w)
 wots_len2 = 3
 wots_len = wots_len1 + wots_len2
 wots_sig_bytes = wots_len*BYTE_LEN_n
  
 
+def expand_seed_raw(inseedRaw, num):
+  outseed = []
+  for i in range(num):
+    outseed.append(prf_raw(struct.pack('>24xQ', i), inseedRaw))
+  return outseed
+
 def expand_seed(inseed, num):
 	outseed = []
-	for i in range(num):
-		outseed.append(prf(ull_to_bytes(i, 32), inseed))
+	for seed in expand_seed_raw(bytes.fromhex(inseed), num):
+		outseed.append(seed.hex())
 	return outseed
 
-def get_seed(sk_seed, addr = []):
+def get_seed_raw(sk_seedRaw, addr = []):
   addr = set_chain_addr(0, addr)
   addr = set_hash_addr(0, addr)
   addr = set_key_and_mask(0, addr)
-  addr_as_bytes = addr_to_bytes(addr)
-  wots_seed = prf(addr_as_bytes, sk_seed)
-  return wots_seed
+  return prf_raw(addr_to_raw(addr), sk_seedRaw)
+
+def get_seed(sk_seed, addr = []):
+  return get_seed_raw(bytes.fromhex(sk_seed), addr).hex()
 
 #inseed = '9f'*32
 
 #print expand_seed(inseed, 6)
 
+# compute the chaining function on byte strings
+# list addresses are worked on as a compact xmss_addr and updated on return
+def gen_chain_raw(w, inRaw, start, steps, pub_seedRaw, addr = []):
+  work = as_xmss_addr(addr)
+  for i in range(start, min(start+steps, w)):
+    work = set_hash_addr(i, work)
+    inRaw = thash_f_raw(inRaw, pub_seedRaw, work)
+  store_addr(work, addr)
+  return inRaw
+
 # compute the chaining function
 def gen_chain(w, inHex, start, steps, pub_seed, addr = []): 
-  for i in range(start, min(start+steps, w)):
-    addr = set_hash_addr(i, addr)
-    inHex = thash_f(inHex, pub_seed, addr)   
-  return inHex
+  return gen_chain_raw(w, bytes.fromhex(inHex), start, steps, bytes.fromhex(pub_seed), addr).hex()
+
+# base w digits of every byte value, most significant digit first,
+# for the Winternitz parameters of params.c
+def _base_w_digits(w):
+  log_w = w.bit_length() - 1
+  return [tuple((b >> s) & (w-1) for s in range(8-log_w, -1, -log_w)) for b in range(256)]
+
+BASE_W_DIGITS = {w: _base_w_digits(w) for w in (4, 16, 256)}
+
+#input: byte string
+#output: array of base w representation, one table lookup per input byte
+def base_w_raw(inRaw, outlen, w = wots_w):
+  table = BASE_W_DIGITS[w]
+  per_byte = len(table[0])
+  out = list(chain.from_iterable(map(table.__getitem__, bytes(inRaw[:(outlen + per_byte - 1)//per_byte]))))
+  del out[outlen:]
+  return out
 
 #input: hex string
 #output: array of base w representation
-def base_w(inHex, outlen):
-  bits = 0
-  incount = 0
-  outcount = 0
-  outInt = []
-  for i in range(0, outlen):
-    if (bits == 0):
-      total = int(inHex[0:2], 16)
-      inHex = inHex[2:]
-      incount += 1
-      bits += 8
-    bits -= wots_log_w
-    #print outInt
-    outInt.append((total >> bits) & (wots_w-1)) 
-    outcount += 1
-  return outInt
-   
+def base_w(inHex, outlen, w = wots_w):
+  log_w = w.bit_length() - 1
+  return base_w_raw(bytes.fromhex(inHex[:2*((outlen*log_w + 7)//8)]), outlen, w)
+
+# log_w, len1 and len2 of Winternitz parameter w, see xmss_xmssmt_initialize_params()
+def wots_lengths(w = wots_w, n = BYTE_LEN_n):
+  log_w = w.bit_length() - 1
+  len1 = 8*n//log_w
+  len2 = ((len1*(w-1)).bit_length() - 1)//log_w + 1
+  return log_w, len1, len2
+
 # compute the checksum 
 # input: message in base w
 # output: checksum in base w
-def wots_checksum(msg_base_w = []):
-  csum_bytes_len = int((wots_len2*wots_log_w + 7)/8)
+def wots_checksum(msg_base_w = [], w = wots_w):
+  (log_w, len1, len2) = wots_lengths(w)
+  csum_bytes_len = (len2*log_w + 7)//8
   # compute checksum as integer
-  csum = 0
-  for i in range(wots_len1):
-    csum += (wots_w -1 - msg_base_w[i])
-  csum = csum << (8 - (wots_len2*wots_log_w) % 8)
-  csum_bytes = ull_to_bytes(csum, csum_bytes_len)
-  csum_base_w = base_w(csum_bytes, wots_len2)
-  return csum_base_w
+  csum = len1*(w-1) - sum(msg_base_w[:len1])
+  csum = csum << (8 - (len2*log_w) % 8)
+  return base_w_raw(ull_to_bytes_raw(csum, csum_bytes_len), len2, w)
 
 # derive the chain length
+# input: message as byte string
+# output: chain lengths array, len1 + len2 entries for Winternitz parameter w
+def chain_lengths_raw(msgRaw, w = wots_w):
+  msglengths = base_w_raw(msgRaw, wots_lengths(w)[1], w)
+  return msglengths + wots_checksum(msglengths, w)
+
 # input: message in Hex
-# output: chain lengths array
-def chain_lengths(msg):
-  msglengths = base_w(msg, wots_len1)
-  csumlengths = wots_checksum(msglengths)
+def chain_lengths(msg, w = wots_w):
+  msglengths = base_w(msg, wots_lengths(w)[1], w)
+  csumlengths = wots_checksum(msglengths, w)
   lengths = msglengths + csumlengths
   return lengths
 
 # public key generation
 # input: hex format of seed(for seed expanding, sk) and pub_seed(for thash_f->prf)
 # output: pk
-def wots_pkgen(w, w_len, seedHex, pub_seedHex, addr):
-  outseed = expand_seed(seedHex, w_len)
-  #print outseed
+def wots_pkgen_raw(w, w_len, seedRaw, pub_seedRaw, addr):
+  outseed = expand_seed_raw(seedRaw, w_len)
+  work = as_xmss_addr(addr)
   pk = []
   for i in range(w_len):
-    addr = set_chain_addr(i, addr)
-    pk.append(gen_chain(w, outseed[i], 0, w-1, pub_seedHex, addr))
-  return pk, addr
+    work = set_chain_addr(i, work)
+    pk.append(gen_chain_raw(w, outseed[i], 0, w-1, pub_seedRaw, work))
+  return pk, store_addr(work, addr)
+
+def wots_pkgen(w, w_len, seedHex, pub_seedHex, addr):
+  (pk, addr) = wots_pkgen_raw(w, w_len, bytes.fromhex(seedHex), bytes.fromhex(pub_seedHex), addr)
+  return [x.hex() for x in pk], addr
   
-# L_tree
-# input: pk list, public seed, hash addr
-# output: leaf value
-def l_tree(pk, pub_seedHex, addr):
+# L_tree on byte strings, overwrites the pk list like l_tree() in xmss_commons.c
+def l_tree_raw(pk, pub_seedRaw, addr):
+  work = as_xmss_addr(addr)
   l = len(pk)
   height = 0
-  addr = set_tree_height(height, addr)
+  work = set_tree_height(height, work)
   while (l > 1):
     parent_nodes = l >> 1
     for i in range(parent_nodes):
-      addr = set_tree_index(i, addr)
-      #print 'addr = ', addr
-      #print 'inData = ', pk[2*i]+pk[2*i+1]
-      pk[i] = thash_h(pk[2*i]+pk[2*i+1], pub_seedHex, addr)
-      #print 'res = ', i, pk[i]
-      #print '\n'
+      work = set_tree_index(i, work)
+      pk[i] = thash_h_raw(pk[2*i]+pk[2*i+1], pub_seedRaw, work)
     if (l & 1):
         pk[l >> 1] = pk[l-1]
         l = (l >> 1) + 1
     else:
         l = l >> 1
     height += 1
-    addr = set_tree_height(height, addr)
+    work = set_tree_height(height, work)
+  store_addr(work, addr)
   return pk[0]
 
+# L_tree
+# input: pk list, public seed, hash addr
+# output: leaf value
+def l_tree(pk, pub_seedHex, addr):
+  nodes = [bytes.fromhex(x) for x in pk]
+  leaf = l_tree_raw(nodes, bytes.fromhex(pub_seedHex), addr)
+  pk[:] = [x.hex() for x in nodes]
+  return leaf.hex()
+
 # signing
 # input: message, seed, pub_seed, hash address
 # output: signature hex
-def wots_sign(w, msg, seedHex, pub_seedHex, addr):
-  lengths = chain_lengths(msg)
-  #print lengths
-  outseed = expand_seed(seedHex, wots_len)
+def wots_sign_raw(w, msgRaw, seedRaw, pub_seedRaw, addr):
+  lengths = chain_lengths_raw(msgRaw, w)
+  outseed = expand_seed_raw(seedRaw, len(lengths))
+  work = as_xmss_addr(addr)
   sig = []
-  for i in range(wots_len):
-    addr = set_chain_addr(i, addr)
-    sig.append(gen_chain(w, outseed[i], 0, lengths[i], pub_seedHex, addr))
+  for i in range(len(lengths)):
+    work = set_chain_addr(i, work)
+    sig.append(gen_chain_raw(w, outseed[i], 0, lengths[i], pub_seedRaw, work))
+  store_addr(work, addr)
   return sig
 
+def wots_sign(w, msg, seedHex, pub_seedHex, addr):
+  sig = wots_sign_raw(w, bytes.fromhex(msg), bytes.fromhex(seedHex), bytes.fromhex(pub_seedHex), addr)
+  return [x.hex() for x in sig]
+
 # verification
 # input: pk, signature, message
 # output: verification result
-def wots_pk_from_sig(w, msg, pub_seed, addr = [], signature = []):
-  lengths = chain_lengths(msg)
+def wots_pk_from_sig_raw(w, msgRaw, pub_seedRaw, addr = [], signature = []):
+  lengths = chain_lengths_raw(msgRaw, w)
+  work = as_xmss_addr(addr)
   pk_from_ver = []
-  for i in range(wots_len):
-    addr = set_chain_addr(i, addr)
-    pk_from_ver.append(gen_chain(w, signature[i], lengths[i], w-1-lengths[i], pub_seed, addr))
+  for i in range(len(lengths)):
+    work = set_chain_addr(i, work)
+    pk_from_ver.append(gen_chain_raw(w, signature[i], lengths[i], w-1-lengths[i], pub_seedRaw, work))
+  store_addr(work, addr)
   return pk_from_ver
 
+def wots_pk_from_sig(w, msg, pub_seed, addr = [], signature = []):
+  pk = wots_pk_from_sig_raw(w, bytes.fromhex(msg), bytes.fromhex(pub_seed), addr,
+                            [bytes.fromhex(x) for x in signature])
+  return [x.hex() for x in pk]
 
 # generate random byte strings in hex format
 def randhex(byte_len):
   hexout = ''
   for i in range(byte_len):
-    byte = randint(0, math.pow(2, 8)-1)
+    byte = randint(0, 2**8-1)
     hexout += "{:02x}".format(byte)
   return hexout
\ No newline at end of file
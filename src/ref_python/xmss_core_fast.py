@@ -0,0 +1,393 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# BDS tree traversal of xmss_core_fast.c: every signature costs a bounded
+# number of leaf and node computations instead of a full treehash.
+# The secret key uses the exact byte layout of xmss_serialize_state(), so a
+# state can be exchanged with the C implementation after every signature.
+# Only XMSS (d = 1) signing is implemented; the state (de)serialisation
+# handles the 2*d-1 states of XMSS^MT as well.
+
+import struct
+
+from .hash_function import prf_raw, thash_h_raw, hash_message_raw
+from .hash_address import copy_subtree_addr, set_type, set_ots_addr, set_tree_height, set_tree_index, \
+                          XMSS_ADDR_TYPE_OTS, XMSS_ADDR_TYPE_HASHTREE
+from .params import xmss_params
+from .wots_function import get_seed_raw, wots_sign_raw, wots_pk_from_sig_raw, l_tree_raw
+from .xmss_leaf import gen_leaf_wots_raw, leaf_addrs
+from .xmss_tree import compute_root_raw
+
+
+class treehash_inst(object):
+  __slots__ = ('h', 'next_idx', 'stackusage', 'completed', 'node')
+
+  def __init__(self, n):
+    self.h = 0
+    self.next_idx = 0
+    self.stackusage = 0
+    self.completed = 0
+    self.node = b'\x00' * n
+
+# all node buffers have fixed size, unused slots keep their stale content just
+# like the corresponding memory inside the C secret key
+class bds_state(object):
+  def __init__(self, params):
+    h = params.tree_height
+    k = params.bds_k
+    zero = b'\x00' * params.n
+    self.stack = [zero] * (h + 1)
+    self.stackoffset = 0
+    self.stacklevels = [0] * (h + 1)
+    self.auth = [zero] * h
+    self.keep = [zero] * (h >> 1)
+    self.treehash = [treehash_inst(params.n) for i in range(h - k)]
+    self.retain = [zero] * ((1 << k) - k - 1)
+    self.next_leaf = 0
+
+
+####################################################################
+# secret key layout
+
+_TREEHASH_FMT = struct.Struct('>BIBBx')
+
+def xmssmt_serialize_state(params, states):
+  h = params.tree_height
+  out = []
+  for state in states:
+    out.append(b''.join(state.stack))
+    out.append(struct.pack('>I', state.stackoffset))
+    out.append(bytes(state.stacklevels))
+    out.append(b'\x00' * (4 - ((h + 1) & 0x3)))
+    out.append(b''.join(state.auth))
+    out.append(b''.join(state.keep))
+    for th in state.treehash:
+      out.append(_TREEHASH_FMT.pack(th.h, th.next_idx, th.stackusage, th.completed))
+      out.append(th.node)
+    out.append(b''.join(state.retain))
+    out.append(struct.pack('>I', state.next_leaf))
+  return b''.join(out)
+
+# input: byte string starting at the first state (after the 'regular' sk)
+# output: list of 2*d-1 states and the d-1 cached WOTS signatures
+def xmssmt_deserialize_state(params, buf):
+  h = params.tree_height
+  n = params.n
+  buf = bytes(buf)
+  pos = [0]
+
+  def take(num):
+    res = buf[pos[0]:pos[0] + num]
+    pos[0] += num
+    return res
+
+  def nodes(num):
+    return [take(n) for i in range(num)]
+
+  states = []
+  for i in range(2 * params.d - 1):
+    state = bds_state(params)
+    state.stack = nodes(h + 1)
+    (state.stackoffset,) = struct.unpack('>I', take(4))
+    state.stacklevels = list(take(h + 1))
+    take(4 - ((h + 1) & 0x3))
+    state.auth = nodes(h)
+    state.keep = nodes(h >> 1)
+    for th in state.treehash:
+      (th.h, th.next_idx, th.stackusage, th.completed) = _TREEHASH_FMT.unpack(take(_TREEHASH_FMT.size))
+      th.node = take(n)
+    state.retain = nodes(len(state.retain))
+    (state.next_leaf,) = struct.unpack('>I', take(4))
+    states.append(state)
+
+  wots_sigs = [take(params.wots_sig_bytes) for i in range(params.d - 1)]
+  return states, wots_sigs
+
+# format sk: [idx || SK_SEED || SK_PRF || PUB_SEED || root || bds state]
+def xmss_serialize_sk(params, idx, sk_seed, sk_prf, pub_seed, root, state):
+  idx_bytes = idx.to_bytes(params.index_bytes, 'big')
+  return (idx_bytes + bytes(sk_seed) + bytes(sk_prf) + bytes(pub_seed) + bytes(root)
+          + xmssmt_serialize_state(params, [state]))
+
+# output: (idx, sk_seed, sk_prf, pub_seed, root, state)
+def xmss_deserialize_sk(params, sk):
+  sk = bytes(sk)
+  if len(sk) != params.sk_bytes_fast():
+    raise ValueError("secret key has %d bytes, expected %d" % (len(sk), params.sk_bytes_fast()))
+  n = params.n
+  i = params.index_bytes
+  idx = int.from_bytes(sk[:i], 'big')
+  (states, wots_sigs) = xmssmt_deserialize_state(params, sk[i + 4*n:])
+  return idx, sk[i:i+n], sk[i+n:i+2*n], sk[i+2*n:i+3*n], sk[i+3*n:i+4*n], states[0]
+
+
+####################################################################
+# BDS traversal
+
+def _gen_leaf(params, sk_seed, pub_seed, addr, idx):
+  (ltree_addr, ots_addr) = leaf_addrs(idx, addr)
+  (seed, leaf) = gen_leaf_wots_raw(sk_seed, pub_seed, ltree_addr, ots_addr,
+                                   params.wots_w, params.wots_len)
+  return leaf
+
+def _node_addr(addr):
+  node_addr = copy_subtree_addr(addr, [0] * 8)
+  return set_type(XMSS_ADDR_TYPE_HASHTREE, node_addr)
+
+def _retain_idx(params, nodeh, row):
+  h = params.tree_height
+  return (1 << (h - 1 - nodeh)) + nodeh - h + row
+
+def treehash_minheight_on_stack(params, state, treehash):
+  r = params.tree_height
+  for i in range(treehash.stackusage):
+    if state.stacklevels[state.stackoffset - i - 1] < r:
+      r = state.stacklevels[state.stackoffset - i - 1]
+  return r
+
+# Merkle's TreeHash for key generation, fills auth, treehash nodes and retain
+def treehash_init(params, height, index, state, sk_seed, pub_seed, addr):
+  h = params.tree_height
+  k = params.bds_k
+  node_addr = _node_addr(addr)
+
+  for i in range(h - k):
+    state.treehash[i].h = i
+    state.treehash[i].completed = 1
+    state.treehash[i].stackusage = 0
+
+  stack = []
+  stacklevels = []
+  i = 0
+  for idx in range(index, index + (1 << height)):
+    stack.append(_gen_leaf(params, sk_seed, pub_seed, addr, idx))
+    stacklevels.append(0)
+    # the C code also copies an unused stack slot to treehash[0].node at i == 3,
+    # it is overwritten by the merge below before it is ever read
+    while len(stack) > 1 and stacklevels[-1] == stacklevels[-2]:
+      nodeh = stacklevels[-1]
+      if (i >> nodeh) == 1:
+        state.auth[nodeh] = stack[-1]
+      else:
+        if nodeh < h - k and (i >> nodeh) == 3:
+          state.treehash[nodeh].node = stack[-1]
+        elif nodeh >= h - k:
+          state.retain[_retain_idx(params, nodeh, ((i >> nodeh) - 3) >> 1)] = stack[-1]
+      node_addr = set_tree_height(nodeh, node_addr)
+      node_addr = set_tree_index(idx >> (nodeh + 1), node_addr)
+      right = stack.pop()
+      stacklevels.pop()
+      stack[-1] = thash_h_raw(stack[-1] + right, pub_seed, node_addr)
+      stacklevels[-1] += 1
+    i += 1
+
+  return stack[0]
+
+def treehash_update(params, treehash, state, sk_seed, pub_seed, addr):
+  node_addr = _node_addr(addr)
+
+  nodebuffer = _gen_leaf(params, sk_seed, pub_seed, addr, treehash.next_idx)
+  nodeheight = 0
+  while treehash.stackusage > 0 and state.stacklevels[state.stackoffset - 1] == nodeheight:
+    node_addr = set_tree_height(nodeheight, node_addr)
+    node_addr = set_tree_index(treehash.next_idx >> (nodeheight + 1), node_addr)
+    nodebuffer = thash_h_raw(state.stack[state.stackoffset - 1] + nodebuffer, pub_seed, node_addr)
+    nodeheight += 1
+    treehash.stackusage -= 1
+    state.stackoffset -= 1
+  if nodeheight == treehash.h:
+    # this also implies stackusage == 0
+    treehash.node = nodebuffer
+    treehash.completed = 1
+  else:
+    state.stack[state.stackoffset] = nodebuffer
+    treehash.stackusage += 1
+    state.stacklevels[state.stackoffset] = nodeheight
+    state.stackoffset += 1
+    treehash.next_idx += 1
+
+# performs treehash updates on the instance that needs it the most
+# returns the updated number of available updates
+def bds_treehash_update(params, state, updates, sk_seed, pub_seed, addr):
+  h = params.tree_height
+  k = params.bds_k
+  used = 0
+
+  for j in range(updates):
+    l_min = h
+    level = h - k
+    for i in range(h - k):
+      if state.treehash[i].completed:
+        low = h
+      elif state.treehash[i].stackusage == 0:
+        low = i
+      else:
+        low = treehash_minheight_on_stack(params, state, state.treehash[i])
+      if low < l_min:
+        level = i
+        l_min = low
+    if level == h - k:
+      break
+    treehash_update(params, state.treehash[level], state, sk_seed, pub_seed, addr)
+    used += 1
+  return updates - used
+
+# returns the auth path for leaf_idx and computes the auth path for the next
+# leaf (Buchmann, Dahmen and Szydlo, "Post Quantum Cryptography", 2009)
+def bds_round(params, state, leaf_idx, sk_seed, pub_seed, addr):
+  h = params.tree_height
+  k = params.bds_k
+  node_addr = _node_addr(addr)
+
+  tau = h
+  for i in range(h):
+    if not ((leaf_idx >> i) & 1):
+      tau = i
+      break
+
+  if tau > 0:
+    # read before refreshing state.keep to prevent overwriting
+    buf = state.auth[tau - 1] + state.keep[(tau - 1) >> 1]
+  if not ((leaf_idx >> (tau + 1)) & 1) and (tau < h - 1):
+    state.keep[tau >> 1] = state.auth[tau]
+  if tau == 0:
+    state.auth[0] = _gen_leaf(params, sk_seed, pub_seed, addr, leaf_idx)
+  else:
+    node_addr = set_tree_height(tau - 1, node_addr)
+    node_addr = set_tree_index(leaf_idx >> tau, node_addr)
+    state.auth[tau] = thash_h_raw(buf, pub_seed, node_addr)
+    for i in range(tau):
+      if i < h - k:
+        state.auth[i] = state.treehash[i].node
+      else:
+        state.auth[i] = state.retain[_retain_idx(params, i, ((leaf_idx >> i) - 1) >> 1)]
+
+    for i in range(min(tau, h - k)):
+      startidx = leaf_idx + 1 + 3 * (1 << i)
+      if startidx < (1 << h):
+        state.treehash[i].h = i
+        state.treehash[i].next_idx = startidx
+        state.treehash[i].completed = 0
+        state.treehash[i].stackusage = 0
+
+
+####################################################################
+# key generation and signing
+
+# format pk: [root || PUB_SEED], the seeds are inputs instead of randombytes()
+def xmss_core_keypair(params, sk_seed, sk_prf, pub_seed):
+  state = bds_state(params)
+  root = treehash_init(params, params.tree_height, 0, state, sk_seed, pub_seed, [0] * 8)
+  sk = xmss_serialize_sk(params, 0, sk_seed, sk_prf, pub_seed, root, state)
+  return root + bytes(pub_seed), sk
+
+# output: (signature followed by the message, updated secret key)
+def xmss_core_sign(params, sk, m):
+  h = params.tree_height
+  (idx, sk_seed, sk_prf, pub_seed, root, state) = xmss_deserialize_sk(params, sk)
+
+  # message hashing
+  R = prf_raw(struct.pack('>24xQ', idx), sk_prf)
+  msg_h = hash_message_raw(R, root, idx, m)
+
+  ots_addr = set_type(XMSS_ADDR_TYPE_OTS, [0] * 8)
+  ots_addr = set_ots_addr(idx, ots_addr)
+  ots_seed = get_seed_raw(sk_seed, ots_addr)
+  wots_sig = wots_sign_raw(params.wots_w, msg_h, ots_seed, pub_seed, ots_addr)
+
+  # the auth path was already computed during the previous round
+  auth = b''.join(state.auth)
+
+  if idx < (1 << h) - 1:
+    bds_round(params, state, idx, sk_seed, pub_seed, ots_addr)
+    bds_treehash_update(params, state, (h - params.bds_k) >> 1, sk_seed, pub_seed, ots_addr)
+
+  sm = struct.pack('>I', idx) + R + b''.join(wots_sig) + auth + bytes(m)
+  sk = xmss_serialize_sk(params, idx + 1, sk_seed, sk_prf, pub_seed, root, state)
+  return sm, sk
+
+# see xmss_core_sign_open() in xmss_commons.c
+# output: the message if sm carries a valid signature under pk, otherwise None
+def xmss_core_sign_open(params, sm, pk):
+  n = params.n
+  h = params.tree_height
+  sm = bytes(sm)
+  if len(sm) < params.sig_bytes:
+    raise ValueError("signed message has %d bytes, the signature alone has %d" % (len(sm), params.sig_bytes))
+  (root, pub_seed) = (bytes(pk[:n]), bytes(pk[n:2*n]))
+
+  i = params.index_bytes
+  idx = int.from_bytes(sm[:i], 'big')
+  R = sm[i:i+n]
+  m = sm[params.sig_bytes:]
+  msg_h = hash_message_raw(R, root, idx, m)
+
+  (ltree_addr, ots_addr) = leaf_addrs(idx)
+  sig = sm[i+n:i+n+params.wots_sig_bytes]
+  wots_sig = [sig[j*n:(j+1)*n] for j in range(params.wots_len)]
+  wots_pk = wots_pk_from_sig_raw(params.wots_w, msg_h, pub_seed, ots_addr, wots_sig)
+  leaf = l_tree_raw(wots_pk, pub_seed, ltree_addr)
+
+  auth = sm[i+n+params.wots_sig_bytes:params.sig_bytes]
+  auth_path = [auth[j*n:(j+1)*n] for j in range(h)]
+  if compute_root_raw(leaf, idx, auth_path, pub_seed) != root:
+    return None
+  return m
+
+
+if __name__ == '__main__':
+  import argparse
+
+  parser = argparse.ArgumentParser(description='Replay BDS signatures and dump the secret key after each step.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-t', '--tree_height', dest='tree_height', type=int, required=False, default=10,
+            help='tree height')
+  parser.add_argument('-k', '--bds_k', dest='bds_k', type=int, required=False, default=0,
+            help='BDS traversal parameter')
+  parser.add_argument('-s', '--seeds', dest='seeds', type=str, required=False, default=None,
+            help='SK_SEED || SK_PRF || PUB_SEED (hex) for key generation')
+  parser.add_argument('-i', '--sk_in', dest='sk_in', type=str, required=False, default=None,
+            help='file with a secret key (hex) to continue from, e.g. written by the C code')
+  parser.add_argument('-m', '--msg', dest='msg', type=str, required=False, default='',
+            help='message to sign (hex)')
+  parser.add_argument('-n', '--num', dest='num', type=int, required=False, default=1,
+            help='number of signatures')
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False, default='sk_py.out',
+            help='output file, one secret key (hex) per line')
+
+  args = parser.parse_args()
+
+  params = xmss_params(args.tree_height, 1, 16, args.bds_k)
+
+  if args.sk_in is not None:
+    f = open(args.sk_in, "r")
+    sk = bytes.fromhex(f.readline().strip())
+    f.close()
+  else:
+    seeds = bytes.fromhex(args.seeds)
+    n = params.n
+    (pk, sk) = xmss_core_keypair(params, seeds[:n], seeds[n:2*n], seeds[2*n:3*n])
+
+  msg = bytes.fromhex(args.msg)
+
+  f = open(args.out, "w")
+  f.write(sk.hex() + "\n")
+  for i in range(args.num):
+    (sm, sk) = xmss_core_sign(params, sk, msg)
+    f.write(sk.hex() + "\n")
+  f.close()
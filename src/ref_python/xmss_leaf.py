@@ -0,0 +1,146 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# XMSS leaf computation (gen_leaf_wots in xmss_commons.c) and a process-pool
+# generator for whole leaf layers, e.g. as reference data for gen_leaf.
+
+import multiprocessing
+
+from .hash_address import copy_subtree_addr, set_type, set_ots_addr, set_ltree_addr, \
+                          XMSS_ADDR_TYPE_OTS, XMSS_ADDR_TYPE_LTREE
+from .wots_function import get_seed_raw, wots_pkgen_raw, wots_w, wots_len
+from .ltree_buffer import ltree_engine
+
+# one L-tree node buffer per process and wots_len, reused for every leaf
+_ltree_engines = {}
+
+def _ltree_engine(w_len):
+  engine = _ltree_engines.get(w_len)
+  if engine is None:
+    engine = _ltree_engines[w_len] = ltree_engine(w_len)
+  return engine
+
+# compute the leaf of the WOTS key pair at ots_addr, see gen_leaf_wots()
+# input: byte strings sk_seed, pub_seed; ltree_addr and ots_addr select the key pair
+# output: (wots seed, leaf), the wots seed is the sec_seed input of gen_leaf.v
+def gen_leaf_wots_raw(sk_seedRaw, pub_seedRaw, ltree_addr, ots_addr, w = wots_w, w_len = wots_len):
+  seed = get_seed_raw(sk_seedRaw, ots_addr)
+  (pk, ots_addr) = wots_pkgen_raw(w, w_len, seed, pub_seedRaw, ots_addr)
+  leaf = _ltree_engine(w_len).l_tree_raw(pk, pub_seedRaw, ltree_addr)
+  return seed, leaf
+
+# ots and l_tree addresses of leaf idx inside the subtree selected by subtree_addr
+def leaf_addrs(idx, subtree_addr = [0, 0, 0]):
+  ots_addr = [0] * 8
+  ltree_addr = [0] * 8
+  ots_addr = copy_subtree_addr(subtree_addr, ots_addr)
+  ltree_addr = copy_subtree_addr(subtree_addr, ltree_addr)
+  ots_addr = set_type(XMSS_ADDR_TYPE_OTS, ots_addr)
+  ltree_addr = set_type(XMSS_ADDR_TYPE_LTREE, ltree_addr)
+  ots_addr = set_ots_addr(idx, ots_addr)
+  ltree_addr = set_ltree_addr(idx, ltree_addr)
+  return ltree_addr, ots_addr
+
+# leaves of a contiguous index range, runs inside a pool worker
+def _leaf_range(job):
+  (sk_seedRaw, pub_seedRaw, subtree_addr, start, end, w, w_len) = job
+  out = []
+  for idx in range(start, end):
+    (ltree_addr, ots_addr) = leaf_addrs(idx, subtree_addr)
+    out.append(gen_leaf_wots_raw(sk_seedRaw, pub_seedRaw, ltree_addr, ots_addr, w, w_len))
+  return out
+
+# compute the leaves start, ..., end-1 on a pool of processes
+# the index range is cut into chunks of chunk_size leaves; results are yielded
+# in index order independent of the number of processes, chunk by chunk as
+# soon as they are available
+# output: iterator over (wots seed, leaf) byte strings
+def iter_leaves_raw(sk_seedRaw, pub_seedRaw, start, end, subtree_addr = [0, 0, 0],
+                    processes = None, chunk_size = None, w = wots_w, w_len = wots_len):
+  if processes is None:
+    processes = multiprocessing.cpu_count()
+  if chunk_size is None:
+    # about four chunks per process to even out the load, but bounded so
+    # that streaming consumers get leaves early
+    chunk_size = max(1, min(256, (end - start + 4*processes - 1) // (4*processes)))
+
+  jobs = ((bytes(sk_seedRaw), bytes(pub_seedRaw), list(subtree_addr[:3]),
+           i, min(i + chunk_size, end), w, w_len) for i in range(start, end, chunk_size))
+
+  if processes <= 1 or end - start <= chunk_size:
+    for job in jobs:
+      for res in _leaf_range(job):
+        yield res
+    return
+
+  pool = multiprocessing.Pool(processes)
+  try:
+    for chunk in pool.imap(_leaf_range, jobs):
+      for res in chunk:
+        yield res
+  finally:
+    pool.terminate()
+    pool.join()
+
+# list version of iter_leaves_raw
+def gen_leaves_raw(sk_seedRaw, pub_seedRaw, start, end, subtree_addr = [0, 0, 0],
+                   processes = None, chunk_size = None, w = wots_w, w_len = wots_len):
+  return list(iter_leaves_raw(sk_seedRaw, pub_seedRaw, start, end, subtree_addr,
+                              processes, chunk_size, w, w_len))
+
+# hex-string version of gen_leaves_raw, returns the list of leaves only
+def gen_leaves(sk_seedHex, pub_seedHex, start, end, subtree_addr = [0, 0, 0],
+               processes = None, chunk_size = None, w = wots_w, w_len = wots_len):
+  res = iter_leaves_raw(bytes.fromhex(sk_seedHex), bytes.fromhex(pub_seedHex), start, end,
+                        subtree_addr, processes, chunk_size, w, w_len)
+  return [leaf.hex() for (seed, leaf) in res]
+
+
+if __name__ == '__main__':
+  import argparse
+
+  parser = argparse.ArgumentParser(description='Compute a layer of XMSS leaves.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-s', '--sk_seed', dest='sk_seed', type=str, required=True,
+            help='secret seed (hex)')
+  parser.add_argument('-p', '--pub_seed', dest='pub_seed', type=str, required=True,
+            help='public seed (hex)')
+  parser.add_argument('-i', '--init', dest='init', type=int, required=False, default=0,
+            help='first ots index')
+  parser.add_argument('-n', '--num', dest='num', type=int, required=False, default=None,
+            help='number of leaves')
+  parser.add_argument('-t', '--tree_height', dest='tree_height', type=int, required=False, default=10,
+            help='compute all 2^tree_height leaves if --num is not given')
+  parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=None,
+            help='number of processes (default: all cores)')
+  parser.add_argument('-c', '--chunk', dest='chunk', type=int, required=False, default=None,
+            help='leaves per work chunk')
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False, default='leaves.out',
+            help='output file, one "seed leaf" hex pair per line')
+
+  args = parser.parse_args()
+
+  num = args.num if args.num is not None else (1 << args.tree_height)
+
+  res = iter_leaves_raw(bytes.fromhex(args.sk_seed), bytes.fromhex(args.pub_seed), args.init, args.init + num,
+                        processes = args.jobs, chunk_size = args.chunk)
+
+  f = open(args.out, "w")
+  for (seed, leaf) in res:
+    f.write(seed.hex() + " " + leaf.hex() + "\n")
+  f.close()
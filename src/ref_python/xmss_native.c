@@ -0,0 +1,191 @@
+/*
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+/*
+ * Entry points of the x86 build of xmss-reference for native.py (ctypes).
+ *
+ * l_tree() and treehash() are static, so xmss_commons.c and xmss_core.c are
+ * included here instead of being linked. Every function takes the Winternitz
+ * parameter (and the WOTS length where the Python reference does) instead of
+ * an xmss_params struct; n = 32 and SHA2 as in ref_python.
+ */
+
+#include <stdint.h>
+#include <string.h>
+
+#include "../xmss-reference/params.h"
+#include "../xmss-reference/hash.h"
+#include "../xmss-reference/hash_address.h"
+#include "../xmss-reference/wots.h"
+#include "../xmss-reference/xmss_commons.c"
+#include "../xmss-reference/xmss_core.c"
+
+/* not exported by wots.h */
+void gen_chain(const xmss_params *params,
+               unsigned char *out, const unsigned char *in,
+               unsigned int start, unsigned int steps,
+               const unsigned char *pub_seed, uint32_t addr[8]);
+
+static int native_params(xmss_params *params, unsigned int w, unsigned int w_len,
+                         unsigned int tree_height)
+{
+    memset(params, 0, sizeof(*params));
+    params->func = XMSS_SHA2;
+    params->n = 32;
+    params->wots_w = w;
+    params->full_height = tree_height;
+    params->d = 1;
+    if (xmss_xmssmt_initialize_params(params) != 0) {
+        return -1;
+    }
+    /* the Python reference takes the number of chains as its own argument */
+    if (w_len) {
+        params->wots_len = w_len;
+        params->wots_sig_bytes = w_len * params->n;
+    }
+    return 0;
+}
+
+int native_prf(unsigned char *out, const unsigned char *in, const unsigned char *key)
+{
+    xmss_params params;
+    native_params(&params, 16, 0, 0);
+    return prf(&params, out, in, key);
+}
+
+int native_thash_f(unsigned char *out, const unsigned char *in,
+                   const unsigned char *pub_seed, uint32_t addr[8])
+{
+    xmss_params params;
+    native_params(&params, 16, 0, 0);
+    return thash_f(&params, out, in, pub_seed, addr);
+}
+
+int native_thash_h(unsigned char *out, const unsigned char *in,
+                   const unsigned char *pub_seed, uint32_t addr[8])
+{
+    xmss_params params;
+    native_params(&params, 16, 0, 0);
+    return thash_h(&params, out, in, pub_seed, addr);
+}
+
+int native_gen_chain(unsigned int w, unsigned char *out, const unsigned char *in,
+                     unsigned int start, unsigned int steps,
+                     const unsigned char *pub_seed, uint32_t addr[8])
+{
+    xmss_params params;
+    if (native_params(&params, w, 0, 0)) {
+        return -1;
+    }
+    gen_chain(&params, out, in, start, steps, pub_seed, addr);
+    return 0;
+}
+
+int native_wots_pkgen(unsigned int w, unsigned int w_len, unsigned char *pk,
+                      const unsigned char *seed, const unsigned char *pub_seed,
+                      uint32_t addr[8])
+{
+    xmss_params params;
+    if (native_params(&params, w, w_len, 0)) {
+        return -1;
+    }
+    wots_pkgen(&params, pk, seed, pub_seed, addr);
+    return 0;
+}
+
+int native_wots_sign(unsigned int w, unsigned char *sig, const unsigned char *msg,
+                     const unsigned char *seed, const unsigned char *pub_seed,
+                     uint32_t addr[8])
+{
+    xmss_params params;
+    if (native_params(&params, w, 0, 0)) {
+        return -1;
+    }
+    wots_sign(&params, sig, msg, seed, pub_seed, addr);
+    return 0;
+}
+
+int native_wots_pk_from_sig(unsigned int w, unsigned char *pk, const unsigned char *sig,
+                            const unsigned char *msg, const unsigned char *pub_seed,
+                            uint32_t addr[8])
+{
+    xmss_params params;
+    if (native_params(&params, w, 0, 0)) {
+        return -1;
+    }
+    wots_pk_from_sig(&params, pk, sig, msg, pub_seed, addr);
+    return 0;
+}
+
+/* overwrites the w_len nodes in pk like l_tree() */
+int native_l_tree(unsigned int w_len, unsigned char *leaf, unsigned char *pk,
+                  const unsigned char *pub_seed, uint32_t addr[8])
+{
+    xmss_params params;
+    if (native_params(&params, 16, w_len, 0)) {
+        return -1;
+    }
+    l_tree(&params, leaf, pk, pub_seed, addr);
+    return 0;
+}
+
+/* leaves start, ..., end-1 of the subtree selected by subtree_addr, the wots
+   seeds to seeds (if not NULL) and the leaves to leaves, n bytes each */
+int native_gen_leaves(unsigned int w, unsigned int w_len,
+                      unsigned char *seeds, unsigned char *leaves,
+                      const unsigned char *sk_seed, const unsigned char *pub_seed,
+                      uint32_t start, uint32_t end, const uint32_t subtree_addr[8])
+{
+    xmss_params params;
+    uint32_t ots_addr[8] = {0};
+    uint32_t ltree_addr[8] = {0};
+    uint32_t idx;
+
+    if (native_params(&params, w, w_len, 0)) {
+        return -1;
+    }
+    copy_subtree_addr(ots_addr, subtree_addr);
+    copy_subtree_addr(ltree_addr, subtree_addr);
+    set_type(ots_addr, XMSS_ADDR_TYPE_OTS);
+    set_type(ltree_addr, XMSS_ADDR_TYPE_LTREE);
+
+    for (idx = start; idx < end; idx++) {
+        set_ltree_addr(ltree_addr, idx);
+        set_ots_addr(ots_addr, idx);
+        gen_leaf_wots(&params, leaves, sk_seed, pub_seed, ltree_addr, ots_addr);
+        leaves += params.n;
+        if (seeds) {
+            get_seed(&params, seeds, sk_seed, ots_addr);
+            seeds += params.n;
+        }
+    }
+    return 0;
+}
+
+int native_treehash(unsigned int w, unsigned int tree_height,
+                    unsigned char *root, unsigned char *auth_path,
+                    const unsigned char *sk_seed, const unsigned char *pub_seed,
+                    uint32_t leaf_idx, const uint32_t subtree_addr[8])
+{
+    xmss_params params;
+    if (native_params(&params, w, 0, tree_height)) {
+        return -1;
+    }
+    treehash(&params, root, auth_path, sk_seed, pub_seed, leaf_idx, subtree_addr);
+    return 0;
+}
@@ -0,0 +1,140 @@
+#
+# Copyright (C) 2019
+# Authors: Wen Wang <wen.wang.ww349@yale.edu>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# XMSS tree: Merkle's TreeHash with a node stack of at most tree_height+1
+# entries, authentication paths and root computation as in xmss_core.c.
+# Leaves are consumed one at a time, so the 2^h leaves never have to be held
+# in memory together.
+
+from .hash_function import thash_h_raw
+from .hash_address import copy_subtree_addr, set_type, set_tree_height, set_tree_index, \
+                          XMSS_ADDR_TYPE_HASHTREE
+from .xmss_leaf import iter_leaves_raw
+
+
+# compute the root of the subtree selected by subtree_addr and the
+# authentication paths of the leaves in leaf_idxs, see treehash() in xmss_core.c
+# input:  byte strings sk_seed, pub_seed; leaf_idxs is one index or a list
+#         leaves optionally replaces the leaf computation by an iterator over
+#           (wots seed, leaf) pairs in index order, e.g. from iter_leaves_raw
+# output: (root, auth paths), each auth path is a list of tree_height nodes
+def treehash_raw(sk_seedRaw, pub_seedRaw, tree_height, leaf_idxs = 0,
+                 subtree_addr = [0, 0, 0], processes = 1, leaves = None):
+  if not isinstance(leaf_idxs, (list, tuple)):
+    leaf_idxs = [leaf_idxs]
+  auth_paths = [[None] * tree_height for i in leaf_idxs]
+
+  node_addr = [0] * 8
+  node_addr = copy_subtree_addr(subtree_addr, node_addr)
+  node_addr = set_type(XMSS_ADDR_TYPE_HASHTREE, node_addr)
+
+  if leaves is None:
+    leaves = iter_leaves_raw(sk_seedRaw, pub_seedRaw, 0, 1 << tree_height,
+                             subtree_addr, processes)
+
+  # stack entries are (height, node)
+  stack = []
+
+  idx = 0
+  for (seed, leaf) in leaves:
+    if idx == (1 << tree_height):
+      break
+
+    # add the next leaf node to the stack
+    stack.append((0, leaf))
+
+    # if this is a node we need for an auth path..
+    for k in range(len(leaf_idxs)):
+      if (leaf_idxs[k] ^ 1) == idx:
+        auth_paths[k][0] = leaf
+
+    # while the top-most nodes are of equal height..
+    while len(stack) >= 2 and stack[-1][0] == stack[-2][0]:
+      (height, right) = stack.pop()
+      (height, left) = stack.pop()
+
+      # tree height is the 'lower' layer, the index is the one of the new node
+      tree_idx = idx >> (height + 1)
+      node_addr = set_tree_height(height, node_addr)
+      node_addr = set_tree_index(tree_idx, node_addr)
+      node = thash_h_raw(left + right, pub_seedRaw, node_addr)
+      stack.append((height + 1, node))
+
+      if height + 1 < tree_height:
+        for k in range(len(leaf_idxs)):
+          if ((leaf_idxs[k] >> (height + 1)) ^ 1) == tree_idx:
+            auth_paths[k][height + 1] = node
+
+    idx += 1
+
+  return stack[0][1], auth_paths
+
+# compute a root node given a leaf and an auth path, see compute_root() in xmss_core.c
+def compute_root_raw(leaf, leafidx, auth_path, pub_seedRaw, subtree_addr = [0, 0, 0]):
+  node_addr = [0] * 8
+  node_addr = copy_subtree_addr(subtree_addr, node_addr)
+  node_addr = set_type(XMSS_ADDR_TYPE_HASHTREE, node_addr)
+
+  node = leaf
+  for height in range(len(auth_path)):
+    node_addr = set_tree_height(height, node_addr)
+    node_addr = set_tree_index(leafidx >> (height + 1), node_addr)
+    # odd index: the current node is a right child
+    if (leafidx >> height) & 1:
+      node = thash_h_raw(auth_path[height] + node, pub_seedRaw, node_addr)
+    else:
+      node = thash_h_raw(node + auth_path[height], pub_seedRaw, node_addr)
+  return node
+
+# hex-string version of treehash_raw
+def treehash(sk_seedHex, pub_seedHex, tree_height, leaf_idxs = 0,
+             subtree_addr = [0, 0, 0], processes = 1):
+  (root, auth_paths) = treehash_raw(bytes.fromhex(sk_seedHex), bytes.fromhex(pub_seedHex), tree_height,
+                                    leaf_idxs, subtree_addr, processes)
+  return root.hex(), [[node.hex() for node in auth] for auth in auth_paths]
+
+
+if __name__ == '__main__':
+  import argparse
+
+  parser = argparse.ArgumentParser(description='Compute an XMSS root and authentication paths.',
+                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-s', '--sk_seed', dest='sk_seed', type=str, required=True,
+            help='secret seed (hex)')
+  parser.add_argument('-p', '--pub_seed', dest='pub_seed', type=str, required=True,
+            help='public seed (hex)')
+  parser.add_argument('-t', '--tree_height', dest='tree_height', type=int, required=False, default=10,
+            help='tree height')
+  parser.add_argument('-a', '--auth', dest='auth', type=int, nargs='*', default=[0],
+            help='leaf indices to compute authentication paths for')
+  parser.add_argument('-j', '--jobs', dest='jobs', type=int, required=False, default=None,
+            help='number of processes for the leaf computation (default: all cores)')
+  parser.add_argument('-o', '--out', dest='out', type=str, required=False, default='root.out',
+            help='output file: root, then one line per auth path node')
+
+  args = parser.parse_args()
+
+  (root, auth_paths) = treehash(args.sk_seed, args.pub_seed, args.tree_height, args.auth,
+                                processes = args.jobs)
+
+  f = open(args.out, "w")
+  f.write(root + "\n")
+  for auth in auth_paths:
+    for node in auth:
+      f.write(node + "\n")
+  f.close()